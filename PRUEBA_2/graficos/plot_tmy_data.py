@@ -1,6 +1,13 @@
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Sin ventana: los gráficos se generan en procesos en paralelo
 import matplotlib.pyplot as plt
 import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from herramientas.ingesta import mapa_paralelo
 
 def plot_tmy_data(file_path, title):
     """
@@ -25,6 +32,9 @@ def plot_tmy_data(file_path, title):
         plt.savefig(file_path.replace('.csv', f'_{column}_plot.png'))
         plt.close()
 
+def _graficar(argumentos):
+    plot_tmy_data(*argumentos)
+
 def main():
     # Directorio base
     base_dir = '/home/josefa_montoya/Josefamontoya/josefamontoya/PRUEBA_2'
@@ -36,11 +46,10 @@ def main():
         'salvador_processed.csv'
     ]
     
-    # Graficar cada archivo
-    for file_name in files_to_plot:
-        file_path = os.path.join(base_dir, file_name)
-        title = f'Datos de {file_name.replace("_processed.csv", "")}'
-        plot_tmy_data(file_path, title)
+    # Graficar los archivos en paralelo, uno por proceso
+    tareas = [(os.path.join(base_dir, file_name), f'Datos de {file_name.replace("_processed.csv", "")}')
+              for file_name in files_to_plot]
+    mapa_paralelo(_graficar, tareas)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,8 +1,13 @@
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from herramientas.sensibilidad_global import indices_sobol, ranking_tornado
 
 def calculate_lcoe(annual_energy, capex, opex_percent, fcr, lifetime=20):
     """
@@ -115,24 +120,20 @@ def run_tornado_analysis(location, base_params, variations):
     
     return results, base_lcoe, base_npv
 
-def plot_tornado(location, results, base_lcoe, base_npv, variations, output_file):
+def rank_tornado_impacts(results, base_lcoe, base_npv):
     """
-    Genera gráfico tornado para una ubicación
+    Ordena los parámetros por su impacto máximo sobre el LCOE
     
     Args:
-        location (str): Nombre de la ubicación
         results (dict): Resultados del análisis
         base_lcoe (float): LCOE base
         base_npv (float): VAN base
-        variations (dict): Variaciones utilizadas
-        output_file (str): Ruta del archivo de salida
-    """
-    # Preparar datos para el gráfico
-    params = list(results.keys())
-    lcoe_impacts = []
-    npv_impacts = []
     
-    for param in params:
+    Returns:
+        list: (parámetro, impacto en LCOE %, impacto en VAN %), de mayor a menor impacto en LCOE
+    """
+    ranking = []
+    for param in results.keys():
         min_lcoe = min(r['lcoe'] for r in results[param])
         max_lcoe = max(r['lcoe'] for r in results[param])
         min_npv = min(r['npv'] for r in results[param])
@@ -140,15 +141,28 @@ def plot_tornado(location, results, base_lcoe, base_npv, variations, output_file
         
         lcoe_impact = max(abs(max_lcoe - base_lcoe), abs(min_lcoe - base_lcoe)) / base_lcoe * 100
         npv_impact = max(abs(max_npv - base_npv), abs(min_npv - base_npv)) / abs(base_npv) * 100
-        
-        lcoe_impacts.append(lcoe_impact)
-        npv_impacts.append(npv_impact)
+        ranking.append((param, lcoe_impact, npv_impact))
     
-    # Ordenar por impacto
-    sorted_idx = np.argsort(lcoe_impacts)
-    params = [params[i] for i in sorted_idx]
-    lcoe_impacts = [lcoe_impacts[i] for i in sorted_idx]
-    npv_impacts = [npv_impacts[i] for i in sorted_idx]
+    return sorted(ranking, key=lambda fila: fila[1], reverse=True)
+
+def plot_tornado_ranking(location, ranking, output_file, lcoe_label='Impacto en LCOE (%)',
+                         npv_label='Impacto en VAN (%)', title='Análisis de Sensibilidad'):
+    """
+    Genera gráfico tornado a partir de una lista ordenada de impactos
+    
+    Args:
+        location (str): Nombre de la ubicación
+        ranking (list): (parámetro, impacto en LCOE, impacto en VAN), de mayor a menor
+            (p. ej. de rank_tornado_impacts o de los índices de Sobol)
+        output_file (str): Ruta del archivo de salida
+        lcoe_label (str): Etiqueta del eje del LCOE
+        npv_label (str): Etiqueta del eje del VAN
+        title (str): Inicio del título de cada gráfico
+    """
+    # El mayor impacto queda arriba
+    params = [fila[0] for fila in reversed(ranking)]
+    lcoe_impacts = [fila[1] for fila in reversed(ranking)]
+    npv_impacts = [fila[2] for fila in reversed(ranking)]
     
     # Crear figura con dos subplots
     plt.style.use('default')
@@ -159,16 +173,16 @@ def plot_tornado(location, results, base_lcoe, base_npv, variations, output_file
     ax1.barh(y_pos, lcoe_impacts, color='skyblue', edgecolor='black')
     ax1.set_yticks(y_pos)
     ax1.set_yticklabels(params)
-    ax1.set_xlabel('Impacto en LCOE (%)')
-    ax1.set_title(f'Análisis de Sensibilidad LCOE - {location.upper()}')
+    ax1.set_xlabel(lcoe_label)
+    ax1.set_title(f'{title} LCOE - {location.upper()}')
     ax1.grid(True, alpha=0.3)
     
     # Gráfico tornado para VAN
     ax2.barh(y_pos, npv_impacts, color='lightgreen', edgecolor='black')
     ax2.set_yticks(y_pos)
     ax2.set_yticklabels(params)
-    ax2.set_xlabel('Impacto en VAN (%)')
-    ax2.set_title(f'Análisis de Sensibilidad VAN - {location.upper()}')
+    ax2.set_xlabel(npv_label)
+    ax2.set_title(f'{title} VAN - {location.upper()}')
     ax2.grid(True, alpha=0.3)
     
     # Ajustar layout y guardar
@@ -176,6 +190,61 @@ def plot_tornado(location, results, base_lcoe, base_npv, variations, output_file
     plt.savefig(output_file, dpi=300, bbox_inches='tight')
     plt.close()
 
+def plot_tornado(location, results, base_lcoe, base_npv, variations, output_file):
+    """
+    Genera gráfico tornado para una ubicación
+    
+    Args:
+        location (str): Nombre de la ubicación
+        results (dict): Resultados del análisis
+        base_lcoe (float): LCOE base
+        base_npv (float): VAN base
+        variations (dict): Variaciones utilizadas
+        output_file (str): Ruta del archivo de salida
+    """
+    plot_tornado_ranking(location, rank_tornado_impacts(results, base_lcoe, base_npv), output_file)
+
+def sobol_model(base_params):
+    """
+    Versión vectorizada del LCOE y el VAN de run_tornado_analysis
+    
+    Args:
+        base_params (dict): Parámetros base
+    
+    Returns:
+        callable: Función que recibe arrays por parámetro de variations y devuelve {'lcoe', 'npv'}
+    """
+    def model(inputs):
+        fcr = inputs['FCR']
+        capex = inputs['CapEx'] * 50000  # Convertir USD/kW a USD total
+        lifetime = np.round(inputs['Vida Inversor'])
+        loss_factor = (100 - inputs['Pérdidas']) / (100 - base_params.get('losses', 14))
+        annual_energy = base_params['annual_energy'] * loss_factor
+        opex = capex * base_params['opex_percent'] / 100
+        
+        lcoe = (capex * fcr + opex) / annual_energy
+        # Flujos anuales iguales descontados a la tasa FCR, como en calculate_npv
+        annuity = (1 - (1 + fcr) ** -lifetime) / fcr
+        npv = -capex + (annual_energy * inputs['Precio Spot'] / 1000 - opex) * annuity
+        return {'lcoe': lcoe, 'npv': npv}
+    return model
+
+def run_sobol_analysis(base_params, variations, n=4096):
+    """
+    Índices de Sobol con cada parámetro uniforme entre los extremos de sus variaciones
+    
+    Args:
+        base_params (dict): Parámetros base
+        variations (dict): Variaciones para cada parámetro
+        n (int): Puntos base del diseño de Saltelli
+    
+    Returns:
+        list: (parámetro, índice total LCOE %, índice total VAN %), de mayor a menor
+    """
+    distributions = {param: ('uniforme', min(values), max(values)) for param, values in variations.items()}
+    indices = indices_sobol(sobol_model(base_params), distributions, n)
+    return ranking_tornado(indices, ('lcoe', 'npv'))
+
 def main():
     # Parámetros base
     base_params = {
@@ -214,6 +283,13 @@ def main():
         # Generar el gráfico tornado
         plot_tornado(location, results, base_lcoe, base_npv, variations, f'{location}_tornado.png')
         
+        # Sensibilidad global: incluye las interacciones entre parámetros
+        sobol_ranking = run_sobol_analysis(base_params, variations)
+        plot_tornado_ranking(location, sobol_ranking, f'{location}_tornado_sobol.png',
+                             lcoe_label='Índice total de Sobol LCOE (%)',
+                             npv_label='Índice total de Sobol VAN (%)',
+                             title='Sensibilidad Global')
+        
         # Imprimir resultados base
         print(f"\nResultados base para {location.upper()}:")
         print(f"LCOE base: {base_lcoe:.4f} USD/kWh")
@@ -230,6 +306,10 @@ def main():
             print(f"\n{param}:")
             print(f"LCOE: {min_lcoe:.4f} - {max_lcoe:.4f} USD/kWh")
             print(f"VAN: {min_npv/1e6:.2f} - {max_npv/1e6:.2f} MUSD")
+        
+        print("\nÍndices totales de Sobol:")
+        for param, st_lcoe, st_npv in sobol_ranking:
+            print(f"{param}: LCOE {st_lcoe:.1f}%, VAN {st_npv:.1f}%")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,5 +1,11 @@
 import pandas as pd
 import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from herramientas.ingesta import escribir_tmy3, mapa_paralelo
+from herramientas.relleno import rellenar_huecos
 
 def process_csv_for_pysam(input_file, output_file, lat, lon):
     """
@@ -14,37 +20,19 @@ def process_csv_for_pysam(input_file, output_file, lat, lon):
     # Leer el archivo CSV original
     df = pd.read_csv(input_file)
     
-    # Seleccionar y renombrar columnas estándar TMY3
-    columnas_tmy3 = {
-        'Year': 'Year',
-        'Month': 'Month',
-        'Day': 'Day',
-        'Hour': 'Hour',
-        'Minute': 'Minute',
-        'GHI': 'GHI',
-        'DNI': 'DNI',
-        'DHI': 'DHI',
-        'Tdry': 'DryBulb',
-        'Tdew': 'DewPoint',
-        'RH': 'RelativeHumidity',
-        'Pres': 'Pressure',
-        'Wspd': 'WindSpeed',
-        'Wdir': 'WindDirection'
-    }
-    # Filtrar y renombrar
-    df_tmy3 = df[list(columnas_tmy3.keys())].rename(columns=columnas_tmy3)
+    # PySAM no admite valores faltantes: rellenar los que hayan quedado tras la limpieza
+    if df.isnull().values.any():
+        df, _ = rellenar_huecos(df, lat, lon, -4)
     
-    # Crear el encabezado TMY3 estándar
+    # Guardar con las columnas y el encabezado TMY3 estándar
     site_name = os.path.basename(input_file).replace('_processed.csv', '')
-    header = f"""TMY3 data for {site_name}\n{site_name}, {lat}, {lon}, -4, 0, TMY3, W/m2, C, %, m/s, deg, mm\n"""
-    
-    # Guardar el archivo con el nuevo formato
-    with open(output_file, 'w') as f:
-        f.write(header)
-        df_tmy3.to_csv(f, index=False)
+    escribir_tmy3(df, output_file, site_name, lat, lon, -4, 0)
     
     print(f"Archivo procesado guardado en: {output_file}")
 
+def _procesar(argumentos):
+    process_csv_for_pysam(*argumentos)
+
 def main():
     # Directorio base
     base_dir = '/home/josefa_montoya/Josefamontoya/josefamontoya/PRUEBA_2'
@@ -56,11 +44,11 @@ def main():
         'Vallenar': (-28.57, -70.76)
     }
     
-    # Procesar cada archivo
-    for site_name, (lat, lon) in sites.items():
-        input_file = os.path.join(base_dir, f'{site_name}_processed.csv')
-        output_file = os.path.join(base_dir, f'{site_name}_pysam.csv')
-        process_csv_for_pysam(input_file, output_file, lat, lon)
+    # Procesar los archivos en paralelo, uno por proceso
+    tareas = [(os.path.join(base_dir, f'{site_name}_processed.csv'),
+               os.path.join(base_dir, f'{site_name}_pysam.csv'), lat, lon)
+              for site_name, (lat, lon) in sites.items()]
+    mapa_paralelo(_procesar, tareas)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,8 +1,13 @@
 import os
+import sys
 import pandas as pd
 import PySAM.Pvwattsv8 as pvwatts
 import PySAM.Pvsamv1 as pvsam
 import numpy as np
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from herramientas.lector_tmy import leer_tmy
 
 def run_pv_simulation(input_file, output_file, system_size_mw=50, dc_ac_ratio=1.2, losses=14):
     """
@@ -17,16 +22,12 @@ def run_pv_simulation(input_file, output_file, system_size_mw=50, dc_ac_ratio=1.
     """
     print(f"\nProcesando archivo: {input_file}")
     
-    # Leer latitud y longitud desde la segunda línea del archivo TMY3
-    with open(input_file, 'r') as f:
-        f.readline()  # Saltar la primera línea
-        meta_line = f.readline().strip()  # Leer la segunda línea
-    meta_parts = meta_line.split(',')
-    lat = float(meta_parts[1])
-    lon = float(meta_parts[2])
-    
-    # Leer el archivo TMY3 ignorando las dos primeras líneas de encabezado
-    df = pd.read_csv(input_file, skiprows=2)
+    # Leer encabezado y datos del archivo TMY3 en una sola pasada
+    datos = leer_tmy(input_file)
+    lat = datos.metadatos.lat
+    lon = datos.metadatos.lon
+    tz = datos.metadatos.tz if datos.metadatos.tz is not None else -4
+    df = datos.a_dataframe()
     
     # Configurar PySAM
     pv = pvwatts.new()
@@ -43,7 +44,7 @@ def run_pv_simulation(input_file, output_file, system_size_mw=50, dc_ac_ratio=1.
     solar_resource_data = {
         'lat': lat,
         'lon': lon,
-        'tz': -4,  # Zona horaria
+        'tz': tz,  # Zona horaria
         'year': df['Year'].tolist(),
         'month': df['Month'].tolist(),
         'day': df['Day'].tolist(),
@@ -1,10 +1,21 @@
-import PySAM.Pvwattsv8 as pv
-import PySAM.Lcoefcr as lcoe
+import argparse
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from herramientas.cache_resultados import simular_pv
+from herramientas.cola_trabajo import ColaArchivos, recoger_resultados, trabajar
+from herramientas.ejecutor import ejecutar_barrido
+from herramientas.escenarios import PlanEscenarios, diseno_oat, limites
+from herramientas.kernel_ac import barrer_inversor
+from herramientas.muestreo_adaptativo import refinar_curvas
+from herramientas.pool_modelos import calcular_lcoe_fcr
+from herramientas.puntos_control import PuntosControl, clave_punto_control
+from herramientas.recurso import UBICACIONES
+
 # Configuración de matplotlib
 plt.style.use('default')
 plt.rcParams['figure.dpi'] = 300
@@ -15,31 +26,6 @@ plt.rcParams['axes.labelsize'] = 12
 plt.rcParams['axes.grid'] = True
 plt.rcParams['grid.alpha'] = 0.3
 
-# Definición de ubicaciones
-UBICACIONES = {
-    'Sevilla': {
-        'archivo': '/home/josefa_montoya/Josefamontoya/josefamontoya/tmy_corregidos/Sevilla_tmy_corregido.csv',
-        'lat': 37.37,
-        'lon': -5.98,
-        'elev': 14,
-        'tz': 1
-    },
-    'Iquique': {
-        'archivo': '/home/josefa_montoya/Josefamontoya/josefamontoya/tmy_corregidos/Iquique_tmy_corregido.csv',
-        'lat': -20.22,
-        'lon': -70.15,
-        'elev': 45,
-        'tz': -4
-    },
-    'Jodhpur': {
-        'archivo': '/home/josefa_montoya/Josefamontoya/josefamontoya/tmy_corregidos/Jodhpur_tmy_corregido.csv',
-        'lat': 26.30,
-        'lon': 73.02,
-        'elev': 224,
-        'tz': 5.5
-    }
-}
-
 # Parámetros de costos y configuración
 PARAMETROS = {
     'PV': {
@@ -60,79 +46,97 @@ PARAMETROS = {
     }
 }
 
-def crear_modelo_pv(ubicacion, capacidad, config):
-    """Crea y configura un modelo PV para una ubicación y capacidad específica."""
-    sistema = pv.default("PVWattsNone")
-    
-    # Cargar datos meteorológicos
-    df = pd.read_csv(ubicacion['archivo'], skiprows=2)
-    
-    # Configurar recurso solar
-    sistema.SolarResource.solar_resource_data = {
-        'lat': ubicacion['lat'],
-        'lon': ubicacion['lon'],
-        'tz': ubicacion['tz'],
-        'elev': ubicacion['elev'],
-        'year': df['Year'].values.tolist(),
-        'month': df['Month'].values.tolist(),
-        'day': df['Day'].values.tolist(),
-        'hour': df['Hour'].values.tolist(),
-        'minute': df['Minute'].values.tolist(),
-        'dn': df['DNI'].values.tolist(),
-        'df': df['DHI'].values.tolist(),
-        'gh': df['GHI'].values.tolist(),
-        'tdry': df['Temperature'].values.tolist(),
-        'wspd': df['Wind Speed'].values.tolist()
-    }
+# Parámetros de PARAMETROS que cambian la simulación (el resto son costos)
+CAMPOS_SIMULACION = ('dc_ac_ratio', 'losses')
 
-    # Configurar sistema con parámetros variables
-    sistema.SystemDesign.system_capacity = capacidad
-    sistema.SystemDesign.dc_ac_ratio = config['dc_ac_ratio']
-    sistema.SystemDesign.inv_eff = 96
-    sistema.SystemDesign.losses = config['losses']
-    sistema.SystemDesign.array_type = 0
-    sistema.SystemDesign.tilt = abs(ubicacion['lat'])
-    sistema.SystemDesign.azimuth = 180 if ubicacion['lat'] > 0 else 0
+def diseno_pv(ubicacion, capacidad, config):
+    """Campos de SystemDesign del sistema PV para una capacidad y escenario."""
+    # Solo los parámetros físicos: los de costos no afectan a la simulación
+    return {
+        'system_capacity': capacidad,
+        'dc_ac_ratio': config['dc_ac_ratio'],
+        'inv_eff': 96,
+        'losses': config['losses'],
+        'array_type': 0,
+        'tilt': abs(ubicacion['lat']),
+        'azimuth': 180 if ubicacion['lat'] > 0 else 0
+    }
 
-    return sistema
+def energias_anuales(ubicacion, capacidad, configs):
+    """Energía anual de varios escenarios que solo difieren en dc_ac_ratio y pérdidas."""
+    # Una sola simulación DC y la etapa del inversor vectorizada para todos
+    barrido = barrer_inversor(
+        ubicacion,
+        diseno_pv(ubicacion, capacidad, configs[0]),
+        dc_ac_ratio=[config['dc_ac_ratio'] for config in configs],
+        inv_eff=96,
+        losses=[config['losses'] for config in configs]
+    )
+    return barrido['energia_anual']
 
-def calcular_lcoe(ubicacion, capacidad, tecnologia, config):
+def calcular_lcoe(ubicacion, capacidad, tecnologia, config, annual_energy=None):
     """Calcula el LCOE para un sistema solar."""
-    # Crear y ejecutar modelo
-    sistema = crear_modelo_pv(ubicacion, capacidad, config)
-    sistema.execute()
-    annual_energy = sistema.Outputs.annual_energy
+    if annual_energy is None:
+        # Simular (o reutilizar la simulación en caché si el diseño no cambió)
+        annual_energy = simular_pv(ubicacion, diseno_pv(ubicacion, capacidad, config))['annual_energy']
 
-    # Calcular LCOE
-    lcoe_model = lcoe.new()
-    lcoe_model.SimpleLCOE.annual_energy = annual_energy
-    lcoe_model.SimpleLCOE.capital_cost = config['capital_cost'] * (capacidad / 1000)
-    lcoe_model.SimpleLCOE.fixed_charge_rate = config['fixed_charge_rate']
-    lcoe_model.SimpleLCOE.fixed_operating_cost = config['fixed_operating_cost'] * (capacidad / 1000)
-    lcoe_model.SimpleLCOE.variable_operating_cost = config['variable_operating_cost']
+    # Calcular LCOE con el modelo Lcoefcr caliente del proceso
+    return calcular_lcoe_fcr(
+        annual_energy,
+        capital_cost=config['capital_cost'] * (capacidad / 1000),
+        fixed_charge_rate=config['fixed_charge_rate'],
+        fixed_operating_cost=config['fixed_operating_cost'] * (capacidad / 1000),
+        variable_operating_cost=config['variable_operating_cost']
+    )
+
+def calcular_lcoes(ubicacion, capacidad, tecnologia, configs):
+    """Calcula el LCOE de varios escenarios evaluando cada diseño y configuración distintos una sola vez."""
+    # Energía solo de los diseños físicos distintos, en una pasada
+    plan_energia = PlanEscenarios(configs, campos=CAMPOS_SIMULACION)
+    energias = plan_energia.expandir(energias_anuales(ubicacion, capacidad, plan_energia.unicos))
     
-    lcoe_model.execute()
-    return lcoe_model.Outputs.lcoe_fcr
+    # LCOE una vez por configuración distinta (la base aparece una vez por parámetro)
+    plan_lcoe = PlanEscenarios([{**config, 'energia': energia} for config, energia in zip(configs, energias)])
+    return plan_lcoe.expandir([
+        calcular_lcoe(ubicacion, capacidad, tecnologia, config, annual_energy=config['energia'])
+        for config in plan_lcoe.unicos
+    ])
 
-def analisis_sensibilidad(ubicacion, capacidad, tecnologia):
-    """Realiza análisis de sensibilidad para diferentes parámetros."""
+def analisis_sensibilidad(ubicacion, capacidad, tecnologia, adaptativo=False, tolerancia=2e-4, presupuesto=30):
+    """
+    Realiza análisis de sensibilidad para diferentes parámetros.
+    
+    Con `adaptativo`, en lugar de la malla fija de PARAMETROS cada curva se
+    muestrea en su rango por bisección, refinando solo donde el LCOE se aparta
+    de la interpolación lineal más que `tolerancia` (relativa), con
+    `presupuesto` evaluaciones en total (ver `muestreo_adaptativo.refinar_curvas`).
+    """
     resultados = []
     
-    # Configuración base
-    config_base = {param: np.mean(valores) for param, valores in PARAMETROS[tecnologia].items()}
+    if adaptativo:
+        # Configuración base: la media de los valores de cada parámetro
+        base = {p: float(np.mean(v)) for p, v in PARAMETROS[tecnologia].items()}
+        curvas = refinar_curvas(
+            lambda puntos: calcular_lcoes(ubicacion, capacidad, tecnologia,
+                                          [{**base, param: valor} for param, valor in puntos]),
+            limites(PARAMETROS[tecnologia]), tolerancia, presupuesto
+        )
+        for param, (valores, lcoes) in curvas.items():
+            resultados += [{'Parametro': param, 'Valor': valor, 'LCOE': lcoe_valor}
+                           for valor, lcoe_valor in zip(valores, lcoes)]
+        return pd.DataFrame(resultados)
+    
+    # Variar cada parámetro individualmente alrededor de la configuración base
+    # (la media de sus valores, que coincide con el valor central de cada uno)
+    escenarios = diseno_oat(PARAMETROS[tecnologia])
+    lcoes = calcular_lcoes(ubicacion, capacidad, tecnologia, [config for _, _, config in escenarios])
     
-    # Variar cada parámetro individualmente
-    for param, valores in PARAMETROS[tecnologia].items():
-        for valor in valores:
-            config = config_base.copy()
-            config[param] = valor
-            
-            lcoe_valor = calcular_lcoe(ubicacion, capacidad, tecnologia, config)
-            resultados.append({
-                'Parametro': param,
-                'Valor': valor,
-                'LCOE': lcoe_valor
-            })
+    for (param, valor, _), lcoe_valor in zip(escenarios, lcoes):
+        resultados.append({
+            'Parametro': param,
+            'Valor': valor,
+            'LCOE': lcoe_valor
+        })
     
     return pd.DataFrame(resultados)
 
@@ -160,7 +164,32 @@ def generar_graficos_sensibilidad(df_sensibilidad, tecnologia, ubicacion):
     plt.savefig(f'sensibilidad_{tecnologia}_{ubicacion}.png', bbox_inches='tight')
     plt.close()
 
+def _analizar(escenario):
+    """Análisis de sensibilidad de una ubicación y tecnología (se ejecuta en un trabajador)"""
+    ubicacion, tecnologia, capacidad, *muestreo = escenario
+    return analisis_sensibilidad(UBICACIONES[ubicacion], capacidad, tecnologia, *muestreo)
+
 def main():
+    parser = argparse.ArgumentParser(description='Análisis de sensibilidad del LCOE')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos en paralelo (por defecto, todos los núcleos)')
+    parser.add_argument('--cola', default=None,
+                        help='Directorio compartido de una cola de trabajo: los escenarios se reparten entre los '
+                             'trabajadores (python -m herramientas.cola_trabajo trabajar DIR) y este proceso')
+    parser.add_argument('--adaptativo', action='store_true',
+                        help='Muestrear cada parámetro por bisección adaptativa en vez de la malla fija de 5 puntos')
+    parser.add_argument('--tolerancia', type=float, default=2e-4,
+                        help='Error relativo de interpolación lineal admitido en el muestreo adaptativo')
+    parser.add_argument('--presupuesto', type=int, default=30,
+                        help='Evaluaciones totales por ubicación y tecnología en el muestreo adaptativo')
+    parser.add_argument('--puntos-control', default='resultados_lcoe/puntos_control.jsonl',
+                        help='Archivo donde se registra cada escenario terminado')
+    reanudacion = parser.add_mutually_exclusive_group()
+    reanudacion.add_argument('--reanudar', action='store_true',
+                             help='Continuar un análisis interrumpido sin repetir los escenarios ya registrados')
+    reanudacion.add_argument('--reiniciar', action='store_true',
+                             help='Descartar los escenarios ya registrados y empezar de nuevo')
+    args = parser.parse_args()
+    
     print("Iniciando análisis avanzado de LCOE...")
     
     # Capacidad del sistema en kW
@@ -169,26 +198,64 @@ def main():
     # Crear directorio para resultados
     Path('resultados_lcoe').mkdir(exist_ok=True)
     
-    # Realizar análisis para cada ubicación y tecnología
-    for ubicacion, datos_ubicacion in UBICACIONES.items():
-        print(f"\nAnalizando {ubicacion}...")
+    # Realizar análisis para cada ubicación y tecnología en paralelo
+    muestreo = (True, args.tolerancia, args.presupuesto) if args.adaptativo else ()
+    escenarios = [(ubicacion, tecnologia, capacidad, *muestreo)
+                  for ubicacion in UBICACIONES for tecnologia in ['PV', 'CSP']]
+    try:
+        puntos_control = PuntosControl(args.puntos_control, reanudar=args.reanudar, reiniciar=args.reiniciar)
+    except FileExistsError as e:
+        parser.error(f"{e}: use --reanudar para continuar o --reiniciar para empezar de nuevo")
+    if args.reanudar:
+        print(f"Reanudando: {puntos_control.resumen()}")
+    if args.cola:
+        # Otros procesos o máquinas pueden tomar lotes de la misma cola
+        cola = ColaArchivos(args.cola, funcion=f'{Path(__file__).resolve()}:_analizar')
+        pendientes = [i for i, escenario in enumerate(escenarios) if escenario not in puntos_control]
+        # Los escenarios que ya están en la cola (de una ejecución interrumpida) no se
+        # vuelven a encolar: se reutilizan sus lotes y los resultados que ya tengan
+        ubicacion_lote = {}  # Clave del escenario -> (lote, posición en el lote)
+        for id_lote, lote in cola.lotes().items():
+            for posicion, escenario in enumerate(lote):
+                ubicacion_lote.setdefault(clave_punto_control(escenario), (id_lote, posicion))
+        nuevos = [i for i in pendientes if clave_punto_control(escenarios[i]) not in ubicacion_lote]
+        for i, id_lote in zip(nuevos, cola.encolar([escenarios[i] for i in nuevos])):
+            ubicacion_lote[clave_punto_control(escenarios[i])] = (id_lote, 0)
+        por_lote = {}  # Lote -> [(escenario, posición)]
+        for i in pendientes:
+            id_lote, posicion = ubicacion_lote[clave_punto_control(escenarios[i])]
+            por_lote.setdefault(id_lote, []).append((i, posicion))
+
+        trabajar(cola, _analizar)
+        salidas = [puntos_control.obtener(escenario) for escenario in escenarios]
+        for id_lote, resultados in recoger_resultados(cola, list(por_lote)):
+            for i, posicion in por_lote[id_lote]:
+                salidas[i] = resultados[posicion]
+                puntos_control.guardar(escenarios[i], resultados[posicion])
+    else:
+        salidas = ejecutar_barrido(_analizar, escenarios, recursos=UBICACIONES, n_procesos=args.procesos,
+                                   puntos_control=puntos_control)
+    
+    for (ubicacion, tecnologia, *_), salida in zip(escenarios, salidas):
+        if tecnologia == 'PV':
+            print(f"\nAnalizando {ubicacion}...")
+        print(f"  Tecnología: {tecnologia}")
+        
+        if salida['estado'] == 'error':
+            print(f"    Error en el análisis: {salida['error']}")
+            continue
+        df_sensibilidad = salida['resultado']
+        
+        # Guardar resultados
+        df_sensibilidad.to_csv(f'resultados_lcoe/sensibilidad_{tecnologia}_{ubicacion}.csv', index=False)
+        
+        # Generar gráficos
+        generar_graficos_sensibilidad(df_sensibilidad, tecnologia, ubicacion)
         
-        for tecnologia in ['PV', 'CSP']:
-            print(f"  Tecnología: {tecnologia}")
-            
-            # Análisis de sensibilidad
-            df_sensibilidad = analisis_sensibilidad(datos_ubicacion, capacidad, tecnologia)
-            
-            # Guardar resultados
-            df_sensibilidad.to_csv(f'resultados_lcoe/sensibilidad_{tecnologia}_{ubicacion}.csv', index=False)
-            
-            # Generar gráficos
-            generar_graficos_sensibilidad(df_sensibilidad, tecnologia, ubicacion)
-            
-            # Imprimir resumen
-            print(f"    LCOE promedio: {df_sensibilidad['LCOE'].mean():.4f} $/kWh")
-            print(f"    LCOE mínimo: {df_sensibilidad['LCOE'].min():.4f} $/kWh")
-            print(f"    LCOE máximo: {df_sensibilidad['LCOE'].max():.4f} $/kWh")
+        # Imprimir resumen
+        print(f"    LCOE promedio: {df_sensibilidad['LCOE'].mean():.4f} $/kWh")
+        print(f"    LCOE mínimo: {df_sensibilidad['LCOE'].min():.4f} $/kWh")
+        print(f"    LCOE máximo: {df_sensibilidad['LCOE'].max():.4f} $/kWh")
     
     print("\nAnálisis completado. Los resultados se han guardado en:")
     print("- Directorio: resultados_lcoe/")
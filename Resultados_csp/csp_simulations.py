@@ -1,86 +1,83 @@
+import argparse
 import os
+import sys
 import pandas as pd
-import PySAM.Pvwattsv8 as pv
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from herramientas.cache_tmy import cargar_tmy
+from herramientas.ejecutor import ejecutar_barrido, recurso_compartido
+from herramientas.pool_modelos import modelo_pv
+from herramientas.puntos_control import PuntosControl
+from herramientas.recurso import recurso_desde_dataframe
 
 def load_tmy_data(file_path):
-    """Carga datos TMY desde un archivo CSV"""
-    # Leer los metadatos de las primeras dos líneas
-    with open(file_path, 'r') as f:
-        header1 = f.readline().strip().split(',')
-        header2 = f.readline().strip().split(',')
-    
-    # Crear diccionario de metadatos
-    metadata = dict(zip(header1, header2))
-    
-    # Leer los datos
-    df = pd.read_csv(file_path, skiprows=2)
+    """Carga datos TMY desde la caché columnar del archivo CSV"""
+    # Los metadatos de las dos primeras líneas se guardan junto con los datos
+    df, metadata = cargar_tmy(file_path)
     
     return df, metadata
 
-def create_csp_system(config_type='default'):
-    """Crea y configura un sistema CSP con diferentes configuraciones"""
-    system = pv.default("PVWattsNone")
-    
-    # Configuración base común
-    system.SystemDesign.system_capacity = 100000  # 100 MW
-    
-    if config_type == 'default':
-        # Configuración por defecto (actual)
-        system.SystemDesign.dc_ac_ratio = 1.2
-        system.SystemDesign.inv_eff = 96
-        system.SystemDesign.losses = 14.075
-        system.SystemDesign.array_type = 2  # Single axis tracking
-        system.SystemDesign.gcr = 0.4
-        system.SystemDesign.tilt = 0
-        system.SystemDesign.azimuth = 180
-    elif config_type == 'high_efficiency':
-        # Configuración de alta eficiencia
-        system.SystemDesign.dc_ac_ratio = 1.3
-        system.SystemDesign.inv_eff = 98
-        system.SystemDesign.losses = 10.0
-        system.SystemDesign.array_type = 1  # Two axis tracking
-        system.SystemDesign.gcr = 0.5
-        system.SystemDesign.tilt = 0
-        system.SystemDesign.azimuth = 180
-    elif config_type == 'optimized_land':
-        # Configuración optimizada para uso de terreno
-        system.SystemDesign.dc_ac_ratio = 1.1
-        system.SystemDesign.inv_eff = 95
-        system.SystemDesign.losses = 12.0
-        system.SystemDesign.array_type = 2
-        system.SystemDesign.gcr = 0.6
-        system.SystemDesign.tilt = 0
-        system.SystemDesign.azimuth = 180
-    
-    return system
+# Configuraciones del sistema (campos de SystemDesign de PVWatts)
+CONFIGURACIONES = {
+    # Configuración por defecto (actual)
+    'default': {
+        'dc_ac_ratio': 1.2,
+        'inv_eff': 96,
+        'losses': 14.075,
+        'array_type': 2,  # Single axis tracking
+        'gcr': 0.4,
+        'tilt': 0,
+        'azimuth': 180
+    },
+    # Configuración de alta eficiencia
+    'high_efficiency': {
+        'dc_ac_ratio': 1.3,
+        'inv_eff': 98,
+        'losses': 10.0,
+        'array_type': 1,  # Two axis tracking
+        'gcr': 0.5,
+        'tilt': 0,
+        'azimuth': 180
+    },
+    # Configuración optimizada para uso de terreno
+    'optimized_land': {
+        'dc_ac_ratio': 1.1,
+        'inv_eff': 95,
+        'losses': 12.0,
+        'array_type': 2,
+        'gcr': 0.6,
+        'tilt': 0,
+        'azimuth': 180
+    }
+}
+
+def create_csp_system(resource, config_type='default'):
+    """Devuelve el sistema CSP de la ubicación con la configuración indicada"""
+    # Modelo caliente del pool del proceso: el recurso ya está asignado y solo
+    # se actualizan los campos que cambian respecto de la configuración anterior
+    return modelo_pv(resource, {
+        'system_capacity': 100000,  # 100 MW
+        **CONFIGURACIONES[config_type]
+    })
 
 def calculate_capacity_factor(annual_energy_kwh, capacity_kw):
     """Calcula el factor de capacidad real"""
     hours_per_year = 8760
     return (annual_energy_kwh / (capacity_kw * hours_per_year)) * 100
 
-def run_simulation(tmy_data, metadata, location_name, config_type='default'):
+def build_resource(tmy_data, metadata, location_name):
+    """Convierte los datos meteorológicos de una ubicación al formato de PySAM (una sola vez)"""
+    return recurso_desde_dataframe(
+        location_name, tmy_data,
+        lat=float(metadata['Latitude']),
+        lon=float(metadata['Longitude']),
+        tz=float(metadata['Time Zone'])
+    )
+
+def run_simulation(resource, metadata, location_name, config_type='default'):
     """Ejecuta la simulación para una ubicación específica con configuración dada"""
-    system = create_csp_system(config_type)
-    
-    # Configurar datos meteorológicos
-    weather_data = {
-        'year': tmy_data['Year'].tolist(),
-        'month': tmy_data['Month'].tolist(),
-        'day': tmy_data['Day'].tolist(),
-        'hour': tmy_data['Hour'].tolist(),
-        'minute': tmy_data['Minute'].tolist(),
-        'dn': tmy_data['DNI'].tolist(),
-        'df': tmy_data['DHI'].tolist(),
-        'gh': tmy_data['GHI'].tolist(),
-        'tdry': tmy_data['Temperature'].tolist(),
-        'wspd': tmy_data['Wind Speed'].tolist(),
-        'lat': float(metadata['Latitude']),
-        'lon': float(metadata['Longitude']),
-        'tz': float(metadata['Time Zone'])
-    }
-    
-    system.SolarResource.solar_resource_data = weather_data
+    system = create_csp_system(resource, config_type)
     
     # Ejecutar simulación
     system.execute()
@@ -113,7 +110,23 @@ def run_simulation(tmy_data, metadata, location_name, config_type='default'):
     
     return monthly_data, annual_data
 
+def _simulate(scenario):
+    """Simula una ubicación y configuración con el recurso compartido (se ejecuta en un trabajador)"""
+    location, metadata, config = scenario
+    return run_simulation(recurso_compartido(location), metadata, location, config)
+
 def main():
+    parser = argparse.ArgumentParser(description='Simulaciones CSP (aproximadas con PVWatts)')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos en paralelo (por defecto, todos los núcleos)')
+    parser.add_argument('--puntos-control', default='puntos_control_csp.jsonl',
+                        help='Archivo donde se registra cada simulación terminada')
+    reanudacion = parser.add_mutually_exclusive_group()
+    reanudacion.add_argument('--reanudar', action='store_true',
+                             help='Continuar un barrido interrumpido sin repetir las simulaciones ya registradas')
+    reanudacion.add_argument('--reiniciar', action='store_true',
+                             help='Descartar las simulaciones ya registradas y empezar de nuevo')
+    args = parser.parse_args()
+    
     # Rutas de los archivos TMY
     locations = {
         'Iquique': 'Iquique_tmy_corregido.csv',
@@ -131,17 +144,34 @@ def main():
     all_monthly_data = []
     all_annual_data = []
     
-    # Ejecutar simulaciones para cada ubicación y configuración
+    # Cargar cada ubicación una vez; sus series se comparten con los trabajadores
+    resources, scenarios = {}, []
     for location, file_name in locations.items():
-        print(f"\nProcesando {location}...")
         file_path = os.path.join(base_dir, file_name)
         tmy_data, metadata = load_tmy_data(file_path)
-        
-        for config in configs:
-            print(f"  Configuración: {config}")
-            monthly_data, annual_data = run_simulation(tmy_data, metadata, location, config)
-            all_monthly_data.append(monthly_data)
-            all_annual_data.append(annual_data)
+        resources[location] = build_resource(tmy_data, metadata, location)
+        scenarios += [(location, metadata, config) for config in configs]
+    
+    # Ejecutar simulaciones para cada ubicación y configuración en paralelo
+    try:
+        checkpoint = PuntosControl(args.puntos_control, reanudar=args.reanudar, reiniciar=args.reiniciar)
+    except FileExistsError as e:
+        parser.error(f"{e}: use --reanudar para continuar o --reiniciar para empezar de nuevo")
+    if args.reanudar:
+        print(f"Reanudando: {checkpoint.resumen()}")
+    outputs = ejecutar_barrido(_simulate, scenarios, recursos=resources, n_procesos=args.procesos,
+                               puntos_control=checkpoint)
+    
+    for (location, _, config), output in zip(scenarios, outputs):
+        if config == configs[0]:
+            print(f"\nProcesando {location}...")
+        print(f"  Configuración: {config}")
+        if output['estado'] == 'error':
+            print(f"    Error en la simulación: {output['error']}")
+            continue
+        monthly_data, annual_data = output['resultado']
+        all_monthly_data.append(monthly_data)
+        all_annual_data.append(annual_data)
     
     # Combinar todos los resultados
     monthly_results = pd.concat(all_monthly_data, ignore_index=True)
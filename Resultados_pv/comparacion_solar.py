@@ -1,6 +1,10 @@
-import pandas as pd
-import numpy as np
+import sys
 import matplotlib.pyplot as plt
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from herramientas.cache_tmy import cargar_tmy
+from herramientas.recurso import UBICACIONES
 
 # Configurar el estilo de matplotlib
 plt.rcParams['figure.dpi'] = 300
@@ -11,19 +15,15 @@ plt.rcParams['font.size'] = 10
 plt.rcParams['axes.titlesize'] = 14
 plt.rcParams['axes.labelsize'] = 12
 
-# Leer los archivos CSV
-archivos = {
-    'Sevilla': '/home/josefa_montoya/Josefamontoya/josefamontoya/tmy_corregidos/Sevilla_tmy_corregido.csv',
-    'Iquique': '/home/josefa_montoya/Josefamontoya/josefamontoya/tmy_corregidos/Iquique_tmy_corregido.csv',
-    'Jodhpur': '/home/josefa_montoya/Josefamontoya/josefamontoya/tmy_corregidos/Jodhpur_tmy_corregido.csv'
-}
+# Leer los archivos CSV (rutas del registro común de ubicaciones)
+archivos = {ciudad: ubicacion['archivo'] for ciudad, ubicacion in UBICACIONES.items()}
 
 datos = {}
 promedios_mensuales = {}
 
 for ciudad, archivo in archivos.items():
     # Leer datos
-    df = pd.read_csv(archivo, skiprows=2)  # Saltamos las dos primeras filas de metadatos
+    df, _ = cargar_tmy(archivo, columnas=['Month', 'GHI', 'Temperature'])  # Caché columnar sin las filas de metadatos
     
     # Calcular promedios mensuales
     promedios = df.groupby('Month').agg({
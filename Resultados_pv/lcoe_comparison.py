@@ -1,8 +1,15 @@
-import PySAM.Pvwattsv8 as pv
-import PySAM.Lcoefcr as lcoe
+import argparse
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from herramientas.cache_resultados import cache_por_defecto, resumen_estadisticas, simular_pv
+from herramientas.ejecutor import ejecutar_barrido
+from herramientas.pool_modelos import calcular_lcoe_fcr
+from herramientas.recurso import UBICACIONES
 
 # Configuración de matplotlib
 plt.rcParams['figure.dpi'] = 300
@@ -13,31 +20,6 @@ plt.rcParams['font.size'] = 10
 plt.rcParams['axes.titlesize'] = 14
 plt.rcParams['axes.labelsize'] = 12
 
-# Definición de ubicaciones
-UBICACIONES = {
-    'Sevilla': {
-        'archivo': '/home/josefa_montoya/Josefamontoya/josefamontoya/tmy_corregidos/Sevilla_tmy_corregido.csv',
-        'lat': 37.37,
-        'lon': -5.98,
-        'elev': 14,
-        'tz': 1
-    },
-    'Iquique': {
-        'archivo': '/home/josefa_montoya/Josefamontoya/josefamontoya/tmy_corregidos/Iquique_tmy_corregido.csv',
-        'lat': -20.22,
-        'lon': -70.15,
-        'elev': 45,
-        'tz': -4
-    },
-    'Jodhpur': {
-        'archivo': '/home/josefa_montoya/Josefamontoya/josefamontoya/tmy_corregidos/Jodhpur_tmy_corregido.csv',
-        'lat': 26.30,
-        'lon': 73.02,
-        'elev': 224,
-        'tz': 5.5
-    }
-}
-
 # Parámetros de costos para PV
 PV_COSTS = {
     'capital_cost': 1_000_000,  # $/MW
@@ -52,77 +34,46 @@ CSP_COSTS = {
     'variable_operating_cost': 0.02  # $/kWh
 }
 
-def crear_modelo_pv(ubicacion, capacidad):
-    """Crea y configura un modelo PV para una ubicación y capacidad específica."""
-    sistema = pv.default("PVWattsNone")
-    
-    # Cargar datos meteorológicos
-    df = pd.read_csv(ubicacion['archivo'], skiprows=2)
-    
-    # Configurar recurso solar
-    sistema.SolarResource.solar_resource_data = {
-        'lat': ubicacion['lat'],
-        'lon': ubicacion['lon'],
-        'tz': ubicacion['tz'],
-        'elev': ubicacion['elev'],
-        'year': df['Year'].values.tolist(),
-        'month': df['Month'].values.tolist(),
-        'day': df['Day'].values.tolist(),
-        'hour': df['Hour'].values.tolist(),
-        'minute': df['Minute'].values.tolist(),
-        'dn': df['DNI'].values.tolist(),
-        'df': df['DHI'].values.tolist(),
-        'gh': df['GHI'].values.tolist(),
-        'tdry': df['Temperature'].values.tolist(),
-        'wspd': df['Wind Speed'].values.tolist()
+def diseno_pv(ubicacion, capacidad):
+    """Campos de SystemDesign del sistema PV para una capacidad específica."""
+    return {
+        'system_capacity': capacidad,
+        'dc_ac_ratio': 1.2,
+        'inv_eff': 96,
+        'losses': 14.0,
+        'array_type': 0,
+        'tilt': abs(ubicacion['lat']),
+        'azimuth': 180 if ubicacion['lat'] > 0 else 0
     }
 
-    # Configurar sistema
-    sistema.SystemDesign.system_capacity = capacidad
-    sistema.SystemDesign.dc_ac_ratio = 1.2
-    sistema.SystemDesign.inv_eff = 96
-    sistema.SystemDesign.losses = 14.0
-    sistema.SystemDesign.array_type = 0
-    sistema.SystemDesign.tilt = abs(ubicacion['lat'])
-    sistema.SystemDesign.azimuth = 180 if ubicacion['lat'] > 0 else 0
-
-    return sistema
-
 def calcular_lcoe_pv(ubicacion, capacidad, fixed_charge_rate):
     """Calcula el LCOE para un sistema PV."""
-    # Crear y ejecutar modelo PV
-    sistema = crear_modelo_pv(ubicacion, capacidad)
-    sistema.execute()
-    annual_energy = sistema.Outputs.annual_energy
+    # Simular el sistema PV (o reutilizar la simulación en caché)
+    annual_energy = simular_pv(ubicacion, diseno_pv(ubicacion, capacidad))['annual_energy']
 
     # Calcular LCOE
-    lcoe_model = lcoe.default("LCOEFCR")
-    lcoe_model.SimpleLCOE.annual_energy = annual_energy
-    lcoe_model.SimpleLCOE.capital_cost = PV_COSTS['capital_cost'] * (capacidad / 1000)  # Convertir a $/MW
-    lcoe_model.SimpleLCOE.fixed_charge_rate = fixed_charge_rate
-    lcoe_model.SimpleLCOE.fixed_operating_cost = PV_COSTS['fixed_operating_cost'] * (capacidad / 1000)
-    lcoe_model.SimpleLCOE.variable_operating_cost = PV_COSTS['variable_operating_cost']
-    
-    lcoe_model.execute()
-    return lcoe_model.Outputs.lcoe_fcr
+    return calcular_lcoe_fcr(
+        annual_energy,
+        capital_cost=PV_COSTS['capital_cost'] * (capacidad / 1000),  # Convertir a $/MW
+        fixed_charge_rate=fixed_charge_rate,
+        fixed_operating_cost=PV_COSTS['fixed_operating_cost'] * (capacidad / 1000),
+        variable_operating_cost=PV_COSTS['variable_operating_cost']
+    )
 
 def calcular_lcoe_csp(ubicacion, capacidad, fixed_charge_rate):
     """Calcula el LCOE para un sistema CSP."""
-    # Crear y ejecutar modelo CSP (usando PVWatts como aproximación)
-    sistema = crear_modelo_pv(ubicacion, capacidad)
-    sistema.execute()
-    annual_energy = sistema.Outputs.annual_energy
+    # Modelo CSP aproximado con PVWatts: es la misma simulación que la del PV,
+    # por lo que se obtiene de la caché sin volver a ejecutar PySAM
+    annual_energy = simular_pv(ubicacion, diseno_pv(ubicacion, capacidad))['annual_energy']
 
     # Calcular LCOE
-    lcoe_model = lcoe.default("LCOEFCR")
-    lcoe_model.SimpleLCOE.annual_energy = annual_energy
-    lcoe_model.SimpleLCOE.capital_cost = CSP_COSTS['capital_cost'] * (capacidad / 1000)
-    lcoe_model.SimpleLCOE.fixed_charge_rate = fixed_charge_rate
-    lcoe_model.SimpleLCOE.fixed_operating_cost = CSP_COSTS['fixed_operating_cost'] * (capacidad / 1000)
-    lcoe_model.SimpleLCOE.variable_operating_cost = CSP_COSTS['variable_operating_cost']
-    
-    lcoe_model.execute()
-    return lcoe_model.Outputs.lcoe_fcr
+    return calcular_lcoe_fcr(
+        annual_energy,
+        capital_cost=CSP_COSTS['capital_cost'] * (capacidad / 1000),
+        fixed_charge_rate=fixed_charge_rate,
+        fixed_operating_cost=CSP_COSTS['fixed_operating_cost'] * (capacidad / 1000),
+        variable_operating_cost=CSP_COSTS['variable_operating_cost']
+    )
 
 def generar_graficos(resultados):
     """Genera gráficos comparativos del LCOE."""
@@ -145,7 +96,22 @@ def generar_graficos(resultados):
     plt.savefig('comparacion_lcoe.png', bbox_inches='tight')
     plt.close()
 
+def _calcular_ubicacion(escenario):
+    """LCOE de PV y CSP de una ubicación (se ejecuta en un trabajador)"""
+    ubicacion, capacidad, fixed_charge_rate = escenario
+    estadisticas = cache_por_defecto().estadisticas
+    antes = dict(estadisticas)
+    lcoe_pv = calcular_lcoe_pv(UBICACIONES[ubicacion], capacidad, fixed_charge_rate)
+    lcoe_csp = calcular_lcoe_csp(UBICACIONES[ubicacion], capacidad, fixed_charge_rate)
+    # Uso de la caché en este escenario, para sumarlo en el proceso principal
+    uso_cache = {clave: estadisticas[clave] - antes[clave] for clave in estadisticas}
+    return lcoe_pv, lcoe_csp, uso_cache
+
 def main():
+    parser = argparse.ArgumentParser(description='Comparación del LCOE de PV y CSP')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos en paralelo (por defecto, todos los núcleos)')
+    args = parser.parse_args()
+    
     print("Iniciando cálculo de LCOE...")
     
     # Capacidad del sistema en kW
@@ -159,18 +125,27 @@ def main():
         'PV': {},
         'CSP': {}
     }
+    uso_cache = {'aciertos': 0, 'fallos': 0, 'escrituras': 0, 'desalojos': 0}
+    
+    # Calcular LCOE para cada ubicación y tecnología en paralelo
+    escenarios = [(ubicacion, capacidad, fixed_charge_rate) for ubicacion in UBICACIONES]
+    salidas = ejecutar_barrido(_calcular_ubicacion, escenarios, recursos=UBICACIONES, n_procesos=args.procesos)
     
-    # Calcular LCOE para cada ubicación y tecnología
-    for ubicacion, datos in UBICACIONES.items():
+    for (ubicacion, *_), salida in zip(escenarios, salidas):
         print(f"\nCalculando LCOE para {ubicacion}...")
+        if salida['estado'] == 'error':
+            print(f"  Error en el cálculo: {salida['error']}")
+            resultados['PV'][ubicacion] = resultados['CSP'][ubicacion] = np.nan
+            continue
+        lcoe_pv, lcoe_csp, uso = salida['resultado']
+        for clave in uso_cache:
+            uso_cache[clave] += uso[clave]
         
         # LCOE para PV
-        lcoe_pv = calcular_lcoe_pv(datos, capacidad, fixed_charge_rate)
         resultados['PV'][ubicacion] = lcoe_pv
         print(f"  PV: {lcoe_pv:.4f} $/kWh")
         
         # LCOE para CSP
-        lcoe_csp = calcular_lcoe_csp(datos, capacidad, fixed_charge_rate)
         resultados['CSP'][ubicacion] = lcoe_csp
         print(f"  CSP: {lcoe_csp:.4f} $/kWh")
     
@@ -183,6 +158,7 @@ def main():
     df.to_csv('resultados_lcoe.csv')
     print("\nResultados guardados en 'resultados_lcoe.csv'")
     print("Gráfico guardado como 'comparacion_lcoe.png'")
+    print(resumen_estadisticas(uso_cache))
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,9 +1,17 @@
-import PySAM.Pvwattsv8 as pv
+import argparse
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from herramientas.ejecutor import ejecutar_barrido
+from herramientas.pool_modelos import modelo_pv
+from herramientas.puntos_control import PuntosControl
+from herramientas.recurso import UBICACIONES
+from herramientas.rendimiento_especifico import barrer_capacidades
+
 # Configuración de matplotlib
 plt.rcParams['figure.dpi'] = 300
 plt.rcParams['savefig.dpi'] = 300
@@ -13,91 +21,82 @@ plt.rcParams['font.size'] = 10
 plt.rcParams['axes.titlesize'] = 14
 plt.rcParams['axes.labelsize'] = 12
 
-# Definición de ubicaciones
-UBICACIONES = {
-    'Sevilla': {
-        'archivo': '/home/josefa_montoya/Josefamontoya/josefamontoya/tmy_corregidos/Sevilla_tmy_corregido.csv',
-        'lat': 37.37,
-        'lon': -5.98,
-        'elev': 14,
-        'tz': 1
-    },
-    'Iquique': {
-        'archivo': '/home/josefa_montoya/Josefamontoya/josefamontoya/tmy_corregidos/Iquique_tmy_corregido.csv',
-        'lat': -20.22,
-        'lon': -70.15,
-        'elev': 45,
-        'tz': -4
-    },
-    'Jodhpur': {
-        'archivo': '/home/josefa_montoya/Josefamontoya/josefamontoya/tmy_corregidos/Jodhpur_tmy_corregido.csv',
-        'lat': 26.30,
-        'lon': 73.02,
-        'elev': 224,
-        'tz': 5.5
-    }
-}
-
 # Capacidades a simular (kW)
 CAPACIDADES = [500, 1000, 5000]
 
-def crear_modelo_pv(ubicacion, capacidad):
-    """Crea y configura un modelo PV para una ubicación y capacidad específica."""
-    # Crear sistema PV
-    sistema = pv.default("PVWattsNone")
-    
-    # Cargar datos meteorológicos
-    df = pd.read_csv(ubicacion['archivo'], skiprows=2)  # Saltar las dos primeras filas de metadatos
-    
-    # Configurar recurso solar
-    sistema.SolarResource.solar_resource_data = {
-        'lat': ubicacion['lat'],
-        'lon': ubicacion['lon'],
-        'tz': ubicacion['tz'],
-        'elev': ubicacion['elev'],
-        'year': df['Year'].values.tolist(),
-        'month': df['Month'].values.tolist(),
-        'day': df['Day'].values.tolist(),
-        'hour': df['Hour'].values.tolist(),
-        'minute': df['Minute'].values.tolist(),
-        'dn': df['DNI'].values.tolist(),
-        'df': df['DHI'].values.tolist(),
-        'gh': df['GHI'].values.tolist(),
-        'tdry': df['Temperature'].values.tolist(),
-        'wspd': df['Wind Speed'].values.tolist()
+def diseno_pv(ubicacion):
+    """Campos de SystemDesign comunes a todas las capacidades."""
+    return {
+        'dc_ac_ratio': 1.2,
+        'inv_eff': 96,
+        'losses': 14.0,
+        'array_type': 0,  # Fixed open rack
+        'tilt': abs(ubicacion['lat']),  # Tilt = latitude
+        'azimuth': 180 if ubicacion['lat'] > 0 else 0  # Sur en hemisferio norte, norte en hemisferio sur
     }
 
-    # Configurar sistema
-    sistema.SystemDesign.system_capacity = capacidad  # kW DC
-    sistema.SystemDesign.dc_ac_ratio = 1.2
-    sistema.SystemDesign.inv_eff = 96
-    sistema.SystemDesign.losses = 14.0
-    sistema.SystemDesign.array_type = 0  # Fixed open rack
-    sistema.SystemDesign.tilt = abs(ubicacion['lat'])  # Tilt = latitude
-    sistema.SystemDesign.azimuth = 180 if ubicacion['lat'] > 0 else 0  # Sur en hemisferio norte, norte en hemisferio sur
-
-    return sistema
+def crear_modelo_pv(ubicacion, capacidad):
+    """Devuelve el modelo PV de la ubicación configurado para una capacidad específica."""
+    # Modelo caliente del pool del proceso: el recurso solar ya está asignado y
+    # solo se actualizan los campos de SystemDesign que cambian
+    return modelo_pv(ubicacion, {
+        'system_capacity': capacidad,  # kW DC
+        **diseno_pv(ubicacion)
+    })
 
-def simular_ubicaciones():
+def simular_ubicacion(escenario):
     """
-    Realiza simulaciones para todas las ubicaciones y capacidades.
+    Simula todas las capacidades de una ubicación (se ejecuta en un trabajador).
     """
+    nombre, capacidades, rendimiento_especifico, n_anclas = escenario
+    ubicacion = UBICACIONES[nombre]
     resultados = {}
     
-    for nombre, ubicacion in UBICACIONES.items():
-        resultados[nombre] = {}
-        
-        for capacidad in CAPACIDADES:
-            # Crear y ejecutar modelo
-            sistema = crear_modelo_pv(ubicacion, capacidad)
-            sistema.execute()
-            
-            # Guardar resultados
-            resultados[nombre][capacidad] = {
-                'energia_anual': sistema.Outputs.annual_energy,
-                'energia_mensual': sistema.Outputs.monthly_energy,
-                'factor_capacidad': (sistema.Outputs.annual_energy / (capacidad * 8760)) * 100
+    if rendimiento_especifico:
+        barrido = barrer_capacidades(ubicacion, diseno_pv(ubicacion), capacidades, n_anclas)
+        for i, capacidad in enumerate(capacidades):
+            resultados[capacidad] = {
+                'energia_anual': barrido['energia_anual'][i],
+                'energia_mensual': tuple(barrido['energia_mensual'][i]),
+                'factor_capacidad': barrido['factor_capacidad'][i]
             }
+        return resultados
+    
+    for capacidad in capacidades:
+        # Crear y ejecutar modelo
+        sistema = crear_modelo_pv(ubicacion, capacidad)
+        sistema.execute()
+        
+        # Guardar resultados
+        resultados[capacidad] = {
+            'energia_anual': sistema.Outputs.annual_energy,
+            'energia_mensual': sistema.Outputs.monthly_energy,
+            'factor_capacidad': (sistema.Outputs.annual_energy / (capacidad * 8760)) * 100
+        }
+    
+    return resultados
+
+def simular_ubicaciones(capacidades=CAPACIDADES, rendimiento_especifico=True, n_anclas=3, n_procesos=None,
+                        puntos_control=None):
+    """
+    Realiza simulaciones para todas las ubicaciones y capacidades.
+
+    Con `rendimiento_especifico` solo se simulan `n_anclas` capacidades por
+    ubicación y la producción del resto se obtiene escalando su rendimiento
+    por kW; si es False se simula cada capacidad por separado. Las ubicaciones
+    se reparten entre `n_procesos` procesos. Con `puntos_control` cada
+    ubicación terminada se registra en disco y las ya registradas no se repiten.
+    """
+    escenarios = [(nombre, list(capacidades), rendimiento_especifico, n_anclas) for nombre in UBICACIONES]
+    salidas = ejecutar_barrido(simular_ubicacion, escenarios, recursos=UBICACIONES, n_procesos=n_procesos,
+                               puntos_control=puntos_control)
+    
+    resultados = {}
+    for (nombre, *_), salida in zip(escenarios, salidas):
+        if salida['estado'] == 'error':
+            print(f"Error al simular {nombre}: {salida['error']}")
+            continue
+        resultados[nombre] = salida['resultado']
     
     return resultados
 
@@ -143,10 +142,27 @@ def guardar_resultados(resultados):
     print("\nResultados guardados en 'resultados_simulacion.csv'")
 
 def main():
+    parser = argparse.ArgumentParser(description='Producción anual PV por ubicación y capacidad')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos en paralelo (por defecto, todos los núcleos)')
+    parser.add_argument('--puntos-control', default='puntos_control_pv.jsonl',
+                        help='Archivo donde se registra cada ubicación terminada')
+    reanudacion = parser.add_mutually_exclusive_group()
+    reanudacion.add_argument('--reanudar', action='store_true',
+                             help='Continuar un barrido interrumpido sin repetir las ubicaciones ya registradas')
+    reanudacion.add_argument('--reiniciar', action='store_true',
+                             help='Descartar las ubicaciones ya registradas y empezar de nuevo')
+    args = parser.parse_args()
+    
     print("Iniciando simulaciones PV...")
+    try:
+        puntos_control = PuntosControl(args.puntos_control, reanudar=args.reanudar, reiniciar=args.reiniciar)
+    except FileExistsError as e:
+        parser.error(f"{e}: use --reanudar para continuar o --reiniciar para empezar de nuevo")
+    if args.reanudar:
+        print(f"Reanudando: {puntos_control.resumen()}")
     
     # Ejecutar simulaciones
-    resultados = simular_ubicaciones()
+    resultados = simular_ubicaciones(n_procesos=args.procesos, puntos_control=puntos_control)
     
     # Generar gráficos
     print("\nGenerando gráfico de producción anual...")
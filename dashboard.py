@@ -7,6 +7,7 @@ import pandas as pd
 import numpy as np
 import glob
 import os
+from herramientas.cache_tmy import cargar_tmy
 
 # Inicializar la aplicación Dash
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
@@ -22,9 +23,8 @@ def cargar_datos():
     
     dfs_tmy = {}
     for ciudad, archivo in archivos_tmy.items():
-        df = pd.read_csv(archivo, skiprows=2)
+        df, _ = cargar_tmy(archivo, con_timestamp=True)
         df['Ciudad'] = ciudad
-        df['Fecha'] = pd.to_datetime(df[['Year', 'Month', 'Day', 'Hour', 'Minute']])
         dfs_tmy[ciudad] = df
     
     # Datos de LCOE
@@ -0,0 +1 @@
+"""Utilidades compartidas por los scripts de simulación, análisis y dashboard."""
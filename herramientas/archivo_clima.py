@@ -0,0 +1,255 @@
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from herramientas.cache_tmy import cargar_columnas, guardar_columnas, tipo_columna
+from herramientas.lector_tmy import COLUMNAS_FECHA
+
+# Estructura del archivo: <raiz>/sitio=<sitio>/anio=<año>/{meta.json, col_*.npy}.
+# Un año típico (TMY) de un sitio se guarda aparte en <raiz>/sitio=<sitio>/tmy/
+PATRON_SITIO = re.compile(r'^sitio=(.+)$')
+PATRON_ANIO = re.compile(r'^anio=(\d{4})$')
+
+
+def _validar_sitio(sitio):
+    sitio = str(sitio)
+    if not sitio or any(c in sitio for c in '/\\=') or sitio.startswith('.'):
+        raise ValueError(f"Nombre de sitio no válido para el archivo: {sitio!r}")
+    return sitio
+
+
+def directorio_particion(raiz, sitio, anio):
+    """Directorio de la partición de un sitio y año"""
+    return Path(raiz) / f'sitio={_validar_sitio(sitio)}' / f'anio={int(anio):04d}'
+
+
+def directorio_tmy(raiz, sitio):
+    """Directorio del año típico (TMY) de un sitio"""
+    return Path(raiz) / f'sitio={_validar_sitio(sitio)}' / 'tmy'
+
+
+def es_tmy(df):
+    """
+    Indica si los datos son un año típico (TMY) y no una serie real.
+
+    Un TMY junta meses de años distintos en orden de calendario: tiene varios
+    años pero el mes nunca retrocede. Una serie real que abarca varios años
+    siempre vuelve de diciembre a enero.
+
+    Args:
+        df (pd.DataFrame): Datos con columnas Year y Month
+
+    Returns:
+        bool: True si parece un TMY
+    """
+    if 'Year' not in df.columns or 'Month' not in df.columns:
+        return False
+    anios = pd.to_numeric(df['Year'], errors='coerce')
+    meses = pd.to_numeric(df['Month'], errors='coerce').to_numpy()
+    return anios.nunique() > 1 and bool(np.all(np.diff(meses) >= 0))
+
+
+def _escribir_json_atomico(ruta, datos):
+    """Escribe un JSON en un temporal y lo renombra (nunca queda a medio escribir)"""
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=ruta.parent, prefix='.tmp_', suffix='.json')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(datos, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, ruta)
+
+
+def listar_particiones(raiz, sitios=None, anio_desde=None, anio_hasta=None):
+    """
+    Lista las particiones disponibles filtrando solo por los nombres de directorio.
+
+    Args:
+        raiz (str): Directorio raíz del archivo
+        sitios (list): Sitios a incluir (None = todos)
+        anio_desde, anio_hasta (int): Rango de años inclusivo (None = sin límite)
+
+    Returns:
+        list: Tuplas (sitio, año, directorio) ordenadas por sitio y año
+    """
+    raiz = Path(raiz)
+    if not raiz.is_dir():
+        return []
+    sitios = None if sitios is None else {str(s) for s in ([sitios] if isinstance(sitios, str) else sitios)}
+    particiones = []
+    for dir_sitio in raiz.iterdir():
+        coincide = PATRON_SITIO.match(dir_sitio.name)
+        if not dir_sitio.is_dir() or not coincide:
+            continue
+        sitio = coincide.group(1)
+        if sitios is not None and sitio not in sitios:
+            continue
+        for dir_anio in dir_sitio.iterdir():
+            coincide = PATRON_ANIO.match(dir_anio.name)
+            if not coincide or not (dir_anio / 'meta.json').exists():
+                continue
+            anio = int(coincide.group(1))
+            if (anio_desde is not None and anio < anio_desde) or (anio_hasta is not None and anio > anio_hasta):
+                continue
+            particiones.append((sitio, anio, dir_anio))
+    return sorted(particiones, key=lambda p: (p[0], p[1]))
+
+
+def anios_disponibles(raiz, sitio):
+    """Años archivados de un sitio"""
+    return [anio for _, anio, _ in listar_particiones(raiz, [sitio])]
+
+
+def _guardar_particion(destino, sitio, df, anio):
+    """Escribe un DataFrame como partición columnar (con marcas de tiempo si hay fechas)"""
+    columnas = {}
+    if all(c in df.columns for c in COLUMNAS_FECHA):
+        fechas = pd.to_datetime(df[COLUMNAS_FECHA], errors='coerce')
+        columnas['timestamp'] = fechas.values.astype('datetime64[s]')
+    for columna in df.columns:
+        columnas[columna] = df[columna].to_numpy().astype(tipo_columna(df[columna]))
+    guardar_columnas(destino, columnas, {
+        'sitio': sitio,
+        'anio': anio,
+        'n_filas': len(df),
+        'orden_columnas': list(df.columns)
+    })
+
+
+def agregar_anios(raiz, sitio, df, metadatos=None, reemplazar=False):
+    """
+    Agrega al archivo los años contenidos en un DataFrame, una partición por año.
+
+    Solo se escriben las particiones de los años presentes en `df`: las de
+    otros años no se leen ni se reescriben. Cada partición se escribe de forma
+    atómica, por lo que un lector concurrente nunca ve datos a medio escribir.
+
+    Un TMY (ver `es_tmy`) no se reparte por año, porque dejaría particiones
+    de meses sueltos que luego impedirían archivar los años reales: se guarda
+    completo en la partición `tmy` del sitio (ver `leer_tmy_archivado`).
+
+    Args:
+        raiz (str): Directorio raíz del archivo
+        sitio (str): Nombre del sitio
+        df (pd.DataFrame): Datos con columnas Year, Month, Day, Hour, Minute
+        metadatos (dict): Metadatos del sitio (lat, lon, tz, elev, campos del encabezado...)
+        reemplazar (bool): Reescribir los años que ya estén archivados
+
+    Returns:
+        dict: 'escritos' y 'omitidos' (años ya archivados que no se reemplazaron;
+            'tmy' en lugar de los años si los datos son un TMY)
+    """
+    sitio = _validar_sitio(sitio)
+    if 'Year' not in df.columns:
+        raise ValueError("El DataFrame necesita la columna Year para particionar por año")
+    anios = pd.to_numeric(df['Year'], errors='coerce')
+    if anios.isna().any():
+        raise ValueError("Hay filas sin año: no se pueden asignar a una partición")
+
+    if metadatos is not None:
+        _escribir_json_atomico(Path(raiz) / f'sitio={sitio}' / 'sitio.json', metadatos)
+
+    if es_tmy(df):
+        destino = directorio_tmy(raiz, sitio)
+        if (destino / 'meta.json').exists() and not reemplazar:
+            return {'escritos': [], 'omitidos': ['tmy']}
+        _guardar_particion(destino, sitio, df, 'tmy')
+        return {'escritos': ['tmy'], 'omitidos': []}
+
+    escritos, omitidos = [], []
+    for anio, grupo in df.groupby(anios.astype(int).to_numpy(), sort=True):
+        destino = directorio_particion(raiz, sitio, anio)
+        if (destino / 'meta.json').exists() and not reemplazar:
+            omitidos.append(int(anio))
+            continue
+        _guardar_particion(destino, sitio, grupo, int(anio))
+        escritos.append(int(anio))
+    return {'escritos': escritos, 'omitidos': omitidos}
+
+
+def leer_tmy_archivado(raiz, sitio):
+    """
+    Lee el año típico (TMY) archivado de un sitio.
+
+    Returns:
+        pd.DataFrame: Datos del TMY con sus años originales (vacío si no hay)
+    """
+    directorio = directorio_tmy(raiz, sitio)
+    if not (directorio / 'meta.json').exists():
+        return pd.DataFrame()
+    with open(directorio / 'meta.json', 'r') as f:
+        meta = json.load(f)
+    datos, _ = cargar_columnas(directorio, meta['orden_columnas'])
+    return pd.DataFrame(datos)[meta['orden_columnas']]
+
+
+def metadatos_sitio(raiz, sitio):
+    """Metadatos guardados de un sitio (dict vacío si no hay)"""
+    ruta = Path(raiz) / f'sitio={_validar_sitio(sitio)}' / 'sitio.json'
+    if not ruta.exists():
+        return {}
+    with open(ruta, 'r') as f:
+        return json.load(f)
+
+
+def leer_archivo(raiz, sitios=None, anio_desde=None, anio_hasta=None, columnas=None,
+                 con_timestamp=False):
+    """
+    Lee del archivo solo las particiones y columnas pedidas.
+
+    Los filtros de sitio y año se resuelven con los nombres de directorio, sin
+    abrir las particiones descartadas; de las seleccionadas solo se cargan
+    (mapeadas en memoria) las columnas pedidas. Si una columna no existe en
+    algún año se devuelve como NaN para esas filas.
+
+    Args:
+        raiz (str): Directorio raíz del archivo
+        sitios (str o list): Sitio o sitios a leer (None = todos)
+        anio_desde, anio_hasta (int): Rango de años inclusivo (None = sin límite)
+        columnas (list): Columnas a leer (None = todas las de cada partición)
+        con_timestamp (bool): Añadir la columna 'Fecha' con las marcas de tiempo
+
+    Returns:
+        pd.DataFrame: Datos con una columna 'sitio' al inicio, ordenados por sitio y año
+    """
+    partes = []
+    for sitio, anio, directorio in listar_particiones(raiz, sitios, anio_desde, anio_hasta):
+        with open(directorio / 'meta.json', 'r') as f:
+            meta = json.load(f)
+        disponibles = meta['columnas']
+        nombres = meta['orden_columnas'] if columnas is None else list(columnas)
+        presentes = [c for c in nombres if c in disponibles]
+        if con_timestamp and 'timestamp' in disponibles:
+            presentes.append('timestamp')
+        datos, _ = cargar_columnas(directorio, presentes)
+        parte = pd.DataFrame(datos, copy=False)
+        for faltante in (c for c in nombres if c not in disponibles):
+            parte[faltante] = np.nan
+        parte = parte[nombres + (['timestamp'] if 'timestamp' in parte.columns else [])]
+        parte.insert(0, 'sitio', sitio)
+        partes.append(parte)
+
+    if not partes:
+        return pd.DataFrame(columns=['sitio'] + (list(columnas) if columnas else []))
+    df = pd.concat(partes, ignore_index=True)
+    return df.rename(columns={'timestamp': 'Fecha'}) if con_timestamp else df
+
+
+def resumen_archivo(raiz):
+    """
+    Inventario del archivo: una fila por partición con su número de filas y columnas.
+
+    Returns:
+        pd.DataFrame: Columnas sitio, anio, n_filas, columnas
+    """
+    filas = []
+    for sitio, anio, directorio in listar_particiones(raiz):
+        with open(directorio / 'meta.json', 'r') as f:
+            meta = json.load(f)
+        filas.append({'sitio': sitio, 'anio': anio, 'n_filas': meta['n_filas'],
+                      'columnas': ', '.join(meta['orden_columnas'])})
+    return pd.DataFrame(filas, columns=['sitio', 'anio', 'n_filas', 'columnas'])
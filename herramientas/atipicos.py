@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from herramientas.control_calidad import VARIABLES
+
+# Factor que convierte la MAD en una estimación de la desviación estándar (datos normales)
+K_MAD = 1.4826
+
+# MAD mínima por variable: evita marcar como atípicos pequeños cambios en
+# tramos casi constantes (noches, temperatura estable). Para la irradiancia
+# horaria es alta a propósito: el paso de nubes produce saltos reales de
+# cientos de W/m² que no deben tratarse como errores de medición
+MAD_MINIMA = {
+    'GHI': 150.0,
+    'DNI': 250.0,
+    'DHI': 100.0,
+    'Tdry': 0.5,
+    'Tdew': 0.5,
+    'RH': 2.0,
+    'Pres': 1.0,
+    'Wspd': 0.5,
+    'Wdir': 10.0,
+    'Snow Depth': 1.0
+}
+
+
+# Valores de ventana (filas · columnas · ancho) que se procesan por lote como máximo
+ELEMENTOS_LOTE = 1 << 22
+
+
+def _mediana_parcial(datos, validos):
+    """
+    Mediana por fila de las ventanas `datos` (los NaN ya cambiados por +inf), con `validos` valores.
+
+    Las ventanas completas se resuelven por selección parcial (np.partition,
+    O(w) por ventana) en su índice central; solo las que tienen huecos, cuyo
+    centro depende del número de valores, se ordenan. `datos` se reordena en el lugar.
+    """
+    centro = datos.shape[-1] // 2  # Ventanas de ancho impar: un solo índice central
+    completas = validos == datos.shape[-1]
+    if completas.all():
+        datos.partition(centro, axis=-1)
+        return datos[..., centro].copy()
+    mediana = np.full(validos.shape, np.nan)
+    if completas.any():
+        filas = datos[completas]
+        filas.partition(centro, axis=-1)
+        mediana[completas] = filas[:, centro]
+    incompletas = ~completas & (validos > 0)
+    if incompletas.any():
+        filas = np.sort(datos[incompletas], axis=-1)
+        k = validos[incompletas]
+        indice = np.arange(len(filas))
+        mediana[incompletas] = 0.5 * (filas[indice, (k - 1) // 2] + filas[indice, k // 2])
+    return mediana
+
+
+def hampel(valores, semiventana=3, n_sigmas=3.0, mad_minima=0.0, tam_lote=None):
+    """
+    Filtro de Hampel: mediana y MAD móviles centradas, exactas y vectorizadas.
+
+    Un valor es atípico si se aleja de la mediana de su ventana más de
+    `n_sigmas` veces la desviación robusta (1.4826·MAD). La mediana y la MAD
+    de cada ventana se obtienen por selección parcial (np.partition) por lotes
+    de filas en NumPy, con costo O(n·w): lineal en el largo de la serie y en
+    el ancho de ventana (solo las pocas ventanas con huecos se ordenan). Cada
+    lote copia a lo sumo ELEMENTOS_LOTE valores de ventana, así que la memoria
+    no crece con n ni con w. Los NaN se ignoran dentro de cada ventana.
+
+    Args:
+        valores (array): Serie (n,) o matriz (n, columnas)
+        semiventana (int): Vecinos a cada lado (ventana de 2·semiventana + 1)
+        n_sigmas (float): Umbral en desviaciones robustas
+        mad_minima (float o array): MAD mínima (por columna si es array)
+        tam_lote (int): Filas procesadas por lote (None = las que quepan en ELEMENTOS_LOTE)
+
+    Returns:
+        tuple: (mediana móvil, máscara booleana de atípicos), con la forma de `valores`
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    es_vector = valores.ndim == 1
+    if es_vector:
+        valores = valores[:, None]
+    n, m = valores.shape
+    w = 2 * semiventana + 1
+    tam_lote = tam_lote or max(1, ELEMENTOS_LOTE // (m * w))
+
+    relleno = np.full((semiventana, m), np.nan)
+    extendido = np.vstack([relleno, valores, relleno])
+    mad_minima = np.broadcast_to(np.asarray(mad_minima, dtype=np.float64), (m,))
+
+    mediana = np.empty((n, m))
+    atipico = np.zeros((n, m), dtype=bool)
+    for inicio in range(0, n, tam_lote):
+        fin = min(inicio + tam_lote, n)
+        ventanas = sliding_window_view(extendido[inicio:fin + 2 * semiventana], w, axis=0)  # (b, m, w)
+        faltantes = np.isnan(ventanas)
+        validos = w - np.count_nonzero(faltantes, axis=-1)
+        med = _mediana_parcial(np.where(faltantes, np.inf, ventanas), validos)
+        with np.errstate(invalid='ignore'):
+            desvios = np.abs(ventanas - med[..., None])
+        desvios[faltantes] = np.inf
+        mad = _mediana_parcial(desvios, validos)
+
+        escala = K_MAD * np.maximum(mad, mad_minima)
+        with np.errstate(invalid='ignore'):
+            atipico[inicio:fin] = np.abs(valores[inicio:fin] - med) > n_sigmas * escala
+        mediana[inicio:fin] = med
+
+    if es_vector:
+        return mediana[:, 0], atipico[:, 0]
+    return mediana, atipico
+
+
+def filtrar_atipicos(df, columnas=None, semiventana=3, n_sigmas=3.0, reemplazo='mediana'):
+    """
+    Detecta y reemplaza valores atípicos en todas las columnas meteorológicas a la vez.
+
+    Es una operación local (cada fila depende de `semiventana` vecinos a cada
+    lado), por lo que sirve tanto en memoria como dentro de `procesar_por_bloques`.
+
+    Args:
+        df (pd.DataFrame): Datos meteorológicos
+        columnas (list): Columnas a filtrar (por defecto, todas las reconocidas)
+        semiventana (int): Vecinos a cada lado de la ventana
+        n_sigmas (float): Umbral en desviaciones robustas
+        reemplazo (str): 'mediana' (mediana móvil) o 'nan' (deja el hueco para rellenarlo)
+
+    Returns:
+        tuple: (DataFrame filtrado, dict columna -> número de atípicos)
+    """
+    if columnas is None:
+        columnas = [c for c in df.columns if VARIABLES.get(c) in MAD_MINIMA]
+    df = df.copy()
+    if not columnas:
+        return df, {}
+
+    valores = np.column_stack([
+        pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=np.float64) for c in columnas
+    ])
+    mad_minima = [MAD_MINIMA.get(VARIABLES.get(c), 0.0) for c in columnas]
+    mediana, atipico = hampel(valores, semiventana, n_sigmas, mad_minima)
+
+    sustituto = mediana if reemplazo == 'mediana' else np.full_like(valores, np.nan)
+    filtrado = np.where(atipico, sustituto, valores)
+    for j, columna in enumerate(columnas):
+        df[columna] = filtrado[:, j]
+    return df, dict(zip(columnas, atipico.sum(axis=0).tolist()))
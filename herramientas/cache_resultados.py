@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import PySAM
+
+from herramientas.pool_modelos import modelo_pv
+from herramientas.recurso import RAIZ, obtener_recurso
+
+# Directorio de la caché de simulaciones por defecto (en la raíz del repositorio)
+DIR_CACHE_RESULTADOS = RAIZ / '.cache_resultados'
+
+# Tamaño máximo por defecto de la caché en disco (bytes)
+TAM_MAXIMO = 64 * 1024 * 1024
+
+# Salidas de Pvwattsv8 que se guardan de cada simulación
+SALIDAS_PV = ('annual_energy', 'monthly_energy', 'capacity_factor', 'kwh_per_kw', 'solrad_annual')
+
+
+def _normalizar(valor):
+    """Convierte números de NumPy y tuplas a tipos JSON estables"""
+    if isinstance(valor, (list, tuple)):
+        return [_normalizar(v) for v in valor]
+    if isinstance(valor, bool) or valor is None or isinstance(valor, str):
+        return valor
+    return float(valor)
+
+
+def clave_simulacion(recurso, diseno, base='PVWattsNone', modelo='Pvwattsv8'):
+    """
+    Clave de contenido de una simulación.
+
+    Depende solo de lo que puede cambiar el resultado físico: el contenido del
+    recurso solar, los campos de diseño, la configuración base y la versión de
+    PySAM. Los parámetros financieros no forman parte de la clave.
+
+    Args:
+        recurso (RecursoSolar): Recurso solar de la ubicación
+        diseno (dict): Campos de SystemDesign -> valor
+        base (str): Configuración por defecto de PySAM
+        modelo (str): Módulo de PySAM que se simula
+
+    Returns:
+        str: Hash hexadecimal
+    """
+    contenido = {
+        'recurso': recurso.huella(),
+        'modelo': modelo,
+        'base': base,
+        'pysam': PySAM.__version__,
+        'diseno': {nombre: _normalizar(valor) for nombre, valor in diseno.items()}
+    }
+    return hashlib.sha256(json.dumps(contenido, sort_keys=True).encode()).hexdigest()
+
+
+class CacheResultados:
+    """
+    Caché persistente de resultados de simulación, direccionada por contenido.
+
+    Cada entrada es un JSON `<clave>.json` en el directorio de la caché. La
+    fecha de modificación de la entrada marca su último uso: cuando el tamaño
+    total supera `tam_maximo` se eliminan primero las menos usadas recientemente.
+    """
+
+    def __init__(self, directorio=DIR_CACHE_RESULTADOS, tam_maximo=TAM_MAXIMO):
+        self.directorio = Path(directorio)
+        self.tam_maximo = tam_maximo
+        self._tam_total = None  # Se mide al primer guardado
+        self.estadisticas = {'aciertos': 0, 'fallos': 0, 'escrituras': 0, 'desalojos': 0}
+
+    def _ruta(self, clave):
+        return self.directorio / f'{clave}.json'
+
+    def obtener(self, clave):
+        """Devuelve los resultados guardados para una clave, o None si no están"""
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, 'r') as f:
+                resultados = json.load(f)
+            os.utime(ruta)  # Marca el uso para el desalojo LRU
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.estadisticas['fallos'] += 1
+            return None
+        self.estadisticas['aciertos'] += 1
+        return resultados
+
+    def guardar(self, clave, resultados):
+        """Guarda los resultados de una clave (escritura atómica) y aplica el límite de tamaño"""
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        ruta = self._ruta(clave)
+        fd, tmp = tempfile.mkstemp(dir=self.directorio, prefix='.tmp_', suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(resultados, f)
+        anterior = ruta.stat().st_size if ruta.exists() else 0
+        os.replace(tmp, ruta)
+        self.estadisticas['escrituras'] += 1
+
+        if self._tam_total is None:
+            self._tam_total = self.tamano()
+        else:
+            self._tam_total += ruta.stat().st_size - anterior
+        if self._tam_total > self.tam_maximo:
+            self._desalojar()
+
+    def _entradas(self):
+        """Entradas de la caché como (último uso, tamaño, ruta)"""
+        entradas = []
+        if not self.directorio.is_dir():
+            return entradas
+        for entrada in os.scandir(self.directorio):
+            if entrada.name.endswith('.json') and not entrada.name.startswith('.'):
+                try:
+                    stat = entrada.stat()
+                except FileNotFoundError:  # Eliminada por otro proceso
+                    continue
+                entradas.append((stat.st_mtime_ns, stat.st_size, entrada.path))
+        return entradas
+
+    def tamano(self):
+        """Tamaño total en bytes de las entradas de la caché"""
+        return sum(tam for _, tam, _ in self._entradas())
+
+    def _desalojar(self):
+        """Elimina las entradas menos usadas hasta quedar bajo el 90 % del tamaño máximo"""
+        entradas = sorted(self._entradas())
+        total = sum(tam for _, tam, _ in entradas)
+        objetivo = 0.9 * self.tam_maximo
+        for _, tam, ruta in entradas:
+            if total <= objetivo:
+                break
+            try:
+                os.remove(ruta)
+                self.estadisticas['desalojos'] += 1
+            except FileNotFoundError:
+                pass
+            total -= tam
+        self._tam_total = total
+
+    def vaciar(self):
+        """Elimina todas las entradas de la caché"""
+        for _, _, ruta in self._entradas():
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+        self._tam_total = 0
+
+    def resumen(self):
+        """Texto con aciertos y fallos de la caché en este proceso"""
+        return resumen_estadisticas(self.estadisticas)
+
+
+def resumen_estadisticas(estadisticas):
+    """Texto con aciertos y fallos a partir de un dict de estadísticas (p. ej. sumadas entre procesos)"""
+    e = estadisticas
+    consultas = e['aciertos'] + e['fallos']
+    tasa = 100 * e['aciertos'] / consultas if consultas else 0.0
+    return (f"Caché de simulaciones: {e['aciertos']} aciertos, {e['fallos']} fallos "
+            f"({tasa:.1f}% de aciertos), {e['desalojos']} entradas desalojadas")
+
+
+# Caché por defecto del proceso (se crea al primer uso)
+_cache = None
+
+
+def cache_por_defecto():
+    """Caché de simulaciones compartida por los scripts del repositorio"""
+    global _cache
+    if _cache is None:
+        _cache = CacheResultados()
+    return _cache
+
+
+def simular_pv(ubicacion, diseno, base='PVWattsNone', cache=None):
+    """
+    Simula un sistema PVWatts reutilizando resultados previos si existen.
+
+    Si la misma combinación de recurso solar y diseño ya se simuló (en esta o
+    en otra ejecución) se devuelven las salidas guardadas sin ejecutar PySAM.
+
+    Args:
+        ubicacion (str, dict o RecursoSolar): Ubicación (ver `obtener_recurso`)
+        diseno (dict): Campos de SystemDesign -> valor (el diseño completo)
+        base (str): Configuración por defecto de PySAM
+        cache (CacheResultados): Caché a usar (None = la caché por defecto,
+            False = simular siempre sin caché)
+
+    Returns:
+        dict: Salidas de `SALIDAS_PV` (monthly_energy como tupla, igual que PySAM)
+    """
+    if cache is None:
+        cache = cache_por_defecto()
+    recurso = obtener_recurso(ubicacion)
+
+    if cache:
+        clave = clave_simulacion(recurso, diseno, base)
+        resultados = cache.obtener(clave)
+        if resultados is not None:
+            return {nombre: tuple(v) if isinstance(v, list) else v for nombre, v in resultados.items()}
+
+    modelo = modelo_pv(recurso, diseno, base)
+    modelo.execute()
+    resultados = {nombre: getattr(modelo.Outputs, nombre) for nombre in SALIDAS_PV}
+    if cache:
+        cache.guardar(clave, {nombre: _normalizar(valor) for nombre, valor in resultados.items()})
+    return resultados
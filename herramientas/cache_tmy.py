@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from herramientas.lector_tmy import COLUMNAS_FECHA, leer_tmy
+
+# Directorio de caché por defecto (junto al archivo de origen)
+NOMBRE_DIR_CACHE = '.cache_tmy'
+
+# Hashes ya calculados en este proceso: (ruta, mtime, tamaño) -> hash
+_hashes = {}
+
+
+def hash_archivo(ruta):
+    """
+    Calcula el hash SHA-256 del contenido de un archivo.
+
+    El resultado se memoriza por ruta, fecha de modificación y tamaño para no
+    releer el archivo en llamadas sucesivas dentro del mismo proceso.
+
+    Args:
+        ruta (str): Ruta del archivo
+
+    Returns:
+        str: Hash hexadecimal del contenido
+    """
+    ruta = os.path.abspath(ruta)
+    stat = os.stat(ruta)
+    clave = (ruta, stat.st_mtime_ns, stat.st_size)
+    if clave not in _hashes:
+        h = hashlib.sha256()
+        with open(ruta, 'rb') as f:
+            for bloque in iter(lambda: f.read(1 << 20), b''):
+                h.update(bloque)
+        _hashes[clave] = h.hexdigest()
+    return _hashes[clave]
+
+
+def recordar_hash(ruta, valor):
+    """
+    Registra el hash ya conocido de un archivo para que `hash_archivo` no lo relea.
+
+    Lo usan los procesos trabajadores, que reciben el hash calculado por el
+    proceso principal junto con los datos del recurso.
+
+    Args:
+        ruta (str): Ruta del archivo
+        valor (str): Hash hexadecimal de su contenido
+    """
+    ruta = os.path.abspath(ruta)
+    stat = os.stat(ruta)
+    _hashes[(ruta, stat.st_mtime_ns, stat.st_size)] = valor
+
+
+def tipo_columna(serie):
+    """Tipo compacto con que se guarda una columna: int16 las fechas, float32 las numéricas y str el resto"""
+    if serie.name in COLUMNAS_FECHA:
+        return np.int16
+    if pd.api.types.is_numeric_dtype(serie):
+        return np.float32
+    return str
+
+
+def _nombre_archivo_columna(i):
+    return f'col_{i:03d}.npy'
+
+
+def guardar_columnas(directorio, columnas, meta):
+    """
+    Guarda un conjunto de columnas como archivos .npy y sus metadatos en JSON.
+
+    La escritura se hace en un directorio temporal que luego se renombra, de
+    modo que un lector nunca ve un directorio a medio escribir.
+
+    Args:
+        directorio (str): Directorio de destino (se reemplaza si existe)
+        columnas (dict): Nombre de columna -> array de NumPy
+        meta (dict): Metadatos serializables en JSON
+    """
+    directorio = Path(directorio)
+    directorio.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=directorio.parent, prefix='.tmp_'))
+    try:
+        indice = {}
+        for i, (nombre, valores) in enumerate(columnas.items()):
+            archivo = _nombre_archivo_columna(i)
+            np.save(tmp / archivo, np.ascontiguousarray(valores), allow_pickle=False)
+            indice[nombre] = {'archivo': archivo, 'dtype': str(valores.dtype)}
+        with open(tmp / 'meta.json', 'w') as f:
+            json.dump({**meta, 'columnas': indice}, f, indent=2, ensure_ascii=False)
+        if directorio.exists():
+            shutil.rmtree(directorio)
+        os.replace(tmp, directorio)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def cargar_columnas(directorio, columnas=None, mmap=True):
+    """
+    Carga columnas guardadas con `guardar_columnas`.
+
+    Args:
+        directorio (str): Directorio con meta.json y los archivos .npy
+        columnas (list): Columnas a cargar (None = todas)
+        mmap (bool): Si True, los arrays se mapean en memoria en solo lectura
+
+    Returns:
+        tuple: (dict nombre -> array, dict de metadatos)
+    """
+    directorio = Path(directorio)
+    with open(directorio / 'meta.json', 'r') as f:
+        meta = json.load(f)
+    indice = meta['columnas']
+    nombres = list(indice) if columnas is None else list(columnas)
+    modo = 'r' if mmap else None
+    datos = {}
+    for nombre in nombres:
+        if nombre not in indice:
+            raise KeyError(f"Columna no disponible en {directorio}: {nombre}")
+        datos[nombre] = np.load(directorio / indice[nombre]['archivo'], mmap_mode=modo)
+    return datos, meta
+
+
+def directorio_cache(ruta_csv, dir_cache=None):
+    """Devuelve el directorio de caché correspondiente al contenido actual del CSV"""
+    ruta_csv = Path(ruta_csv)
+    base = Path(dir_cache) if dir_cache else ruta_csv.parent / NOMBRE_DIR_CACHE
+    return base / f'{ruta_csv.stem}-{hash_archivo(ruta_csv)[:16]}'
+
+
+def convertir_a_cache(ruta_csv, dir_cache=None):
+    """
+    Convierte un TMY corregido en CSV a la caché columnar binaria.
+
+    Se guardan los metadatos del encabezado, una columna de marcas de tiempo
+    precalculadas y cada columna de datos como float32 (int16 para las fechas).
+
+    Args:
+        ruta_csv (str): Ruta del archivo *_tmy_corregido.csv (puede venir
+            comprimido en .gz, .bz2 o .zip)
+        dir_cache (str): Directorio base de la caché (por defecto .cache_tmy
+            junto al archivo)
+
+    Returns:
+        Path: Directorio de la caché generada
+    """
+    destino = directorio_cache(ruta_csv, dir_cache)
+    datos = leer_tmy(ruta_csv)
+    df = datos.a_dataframe()
+
+    columnas = {}
+    if all(c in df.columns for c in COLUMNAS_FECHA):
+        fechas = pd.to_datetime(df[COLUMNAS_FECHA])
+        columnas['timestamp'] = fechas.values.astype('datetime64[s]')
+    for columna in df.columns:
+        columnas[columna] = df[columna].to_numpy().astype(tipo_columna(df[columna]))
+
+    guardar_columnas(destino, columnas, {
+        'fuente': os.path.basename(ruta_csv),
+        'hash': hash_archivo(ruta_csv),
+        'n_filas': len(df),
+        'metadatos': datos.metadatos.campos,
+        'orden_columnas': list(df.columns)
+    })
+    return destino
+
+
+def _asegurar_cache(ruta_csv, dir_cache=None):
+    """Devuelve el directorio de caché del CSV, generándolo si no existe"""
+    destino = directorio_cache(ruta_csv, dir_cache)
+    if not (destino / 'meta.json').exists():
+        convertir_a_cache(ruta_csv, dir_cache)
+    return destino
+
+
+def cargar_columnas_tmy(ruta_csv, columnas=None, dir_cache=None):
+    """
+    Carga columnas de un TMY corregido desde la caché, creándola si hace falta.
+
+    Si el contenido del CSV cambia, su hash cambia y la caché se regenera.
+
+    Args:
+        ruta_csv (str): Ruta del archivo *_tmy_corregido.csv
+        columnas (list): Columnas a cargar (None = todas, incluida 'timestamp')
+        dir_cache (str): Directorio base de la caché
+
+    Returns:
+        tuple: (dict nombre -> array mapeado en memoria, dict de metadatos del encabezado)
+    """
+    datos, meta = cargar_columnas(_asegurar_cache(ruta_csv, dir_cache), columnas)
+    return datos, meta['metadatos']
+
+
+def cargar_tmy(ruta_csv, columnas=None, dir_cache=None, con_timestamp=False):
+    """
+    Equivalente rápido a `pd.read_csv(ruta_csv, skiprows=2)` usando la caché.
+
+    Args:
+        ruta_csv (str): Ruta del archivo *_tmy_corregido.csv
+        columnas (list): Columnas a cargar (None = todas las del CSV)
+        dir_cache (str): Directorio base de la caché
+        con_timestamp (bool): Si True, añade la columna 'Fecha' con las marcas
+            de tiempo precalculadas
+
+    Returns:
+        tuple: (DataFrame con los datos, dict de metadatos del encabezado)
+    """
+    destino = _asegurar_cache(ruta_csv, dir_cache)
+    with open(destino / 'meta.json', 'r') as f:
+        orden = json.load(f)['orden_columnas']
+    nombres = list(orden) if columnas is None else list(columnas)
+    if con_timestamp:
+        nombres.append('timestamp')
+    datos, meta = cargar_columnas(destino, nombres)
+    df = pd.DataFrame(datos, copy=False)
+    if con_timestamp:
+        df = df.rename(columns={'timestamp': 'Fecha'})
+    return df, meta['metadatos']
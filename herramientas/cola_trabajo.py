@@ -0,0 +1,524 @@
+import argparse
+import importlib
+import importlib.util
+import json
+import os
+import pickle
+import socket
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+
+from herramientas.ejecutor import _ejecutar
+
+# Duración por defecto de la concesión de un lote (s): si el trabajador no la
+# renueva en ese tiempo se considera caído y el lote vuelve a la cola
+DURACION_CONCESION = 120.0
+
+# Intentos antes de dar un lote por fallido
+MAX_INTENTOS = 3
+
+
+def identificador_trabajador():
+    """Nombre por defecto de un trabajador: host y PID"""
+    return f'{socket.gethostname()}-{os.getpid()}'
+
+
+def cargar_funcion(referencia):
+    """
+    Resuelve la función de evaluación a partir de una referencia de texto.
+
+    Args:
+        referencia (str): 'paquete.modulo:funcion' o 'ruta/al/script.py:funcion'
+
+    Returns:
+        callable: Función referenciada
+    """
+    modulo, _, nombre = referencia.rpartition(':')
+    if modulo.endswith('.py'):
+        ruta = Path(modulo).resolve()
+        spec = importlib.util.spec_from_file_location(ruta.stem, ruta)
+        objeto = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(objeto)
+    else:
+        objeto = importlib.import_module(modulo)
+    return getattr(objeto, nombre)
+
+
+def repartir(escenarios, tam_lote):
+    """Divide los escenarios en lotes consecutivos de `tam_lote`"""
+    escenarios = list(escenarios)
+    return [escenarios[i:i + tam_lote] for i in range(0, len(escenarios), tam_lote)]
+
+
+class ColaTrabajo(ABC):
+    """
+    Interfaz de una cola de lotes de escenarios con concesiones.
+
+    Un trabajador toma un lote (`tomar`), lo renueva mientras lo evalúa
+    (`renovar`) y entrega sus resultados (`entregar`). Las concesiones no
+    renovadas a tiempo se devuelven a la cola (`liberar_vencidas`) hasta
+    `max_intentos` veces.
+    """
+
+    funcion = None  # Referencia 'modulo:funcion' de la evaluación, si la cola la define
+
+    def referencia_funcion(self):
+        """Referencia de la función de evaluación definida para la cola"""
+        return self.funcion
+
+    @abstractmethod
+    def encolar(self, escenarios, tam_lote=1):
+        """Agrega escenarios en lotes y devuelve los identificadores de los lotes"""
+
+    @abstractmethod
+    def tomar(self, trabajador):
+        """Concede un lote pendiente: (id, escenarios) o None si no hay"""
+
+    @abstractmethod
+    def renovar(self, id_lote, trabajador):
+        """Extiende la concesión de un lote"""
+
+    @abstractmethod
+    def entregar(self, id_lote, resultados, trabajador):
+        """Guarda los resultados de un lote y lo da por terminado"""
+
+    @abstractmethod
+    def liberar_vencidas(self):
+        """Devuelve a la cola los lotes con concesión vencida; retorna cuántos"""
+
+    @abstractmethod
+    def estado(self):
+        """Número de lotes pendientes, concedidos, terminados y fallidos"""
+
+    @abstractmethod
+    def resultados(self, ids):
+        """Salidas de los lotes indicados, aplanadas en el orden de los escenarios"""
+
+    @abstractmethod
+    def lotes(self):
+        """Lotes encolados que no fallaron: id -> escenarios"""
+
+    @abstractmethod
+    def terminado(self, id_lote):
+        """Si el lote tiene resultados o agotó sus intentos"""
+
+    def terminada(self):
+        e = self.estado()
+        return e['pendientes'] == 0 and e['concedidos'] == 0
+
+
+class ColaMemoria(ColaTrabajo):
+    """Cola dentro del proceso (para hilos o para ejecutar en serie)"""
+
+    def __init__(self, duracion_concesion=DURACION_CONCESION, max_intentos=MAX_INTENTOS):
+        self.duracion_concesion = duracion_concesion
+        self.max_intentos = max_intentos
+        self._candado = threading.Lock()
+        self._lotes = {}
+        self._pendientes = []
+        self._concedidos = {}  # id -> (trabajador, vencimiento)
+        self._intentos = {}
+        self._resultados = {}
+        self._fallidos = set()
+        self._siguiente = 0
+
+    def encolar(self, escenarios, tam_lote=1):
+        ids = []
+        with self._candado:
+            for lote in repartir(escenarios, tam_lote):
+                id_lote = f'{self._siguiente:06d}'
+                self._siguiente += 1
+                self._lotes[id_lote] = lote
+                self._intentos[id_lote] = 0
+                self._pendientes.append(id_lote)
+                ids.append(id_lote)
+        return ids
+
+    def tomar(self, trabajador):
+        with self._candado:
+            if not self._pendientes:
+                return None
+            id_lote = self._pendientes.pop(0)
+            self._intentos[id_lote] += 1
+            self._concedidos[id_lote] = (trabajador, time.monotonic() + self.duracion_concesion)
+            return id_lote, self._lotes[id_lote]
+
+    def renovar(self, id_lote, trabajador):
+        with self._candado:
+            if id_lote in self._concedidos:
+                self._concedidos[id_lote] = (trabajador, time.monotonic() + self.duracion_concesion)
+
+    def entregar(self, id_lote, resultados, trabajador):
+        with self._candado:
+            self._resultados.setdefault(id_lote, resultados)
+            self._concedidos.pop(id_lote, None)
+            if id_lote in self._pendientes:
+                self._pendientes.remove(id_lote)
+
+    def liberar_vencidas(self):
+        ahora = time.monotonic()
+        with self._candado:
+            vencidos = [i for i, (_, vence) in self._concedidos.items() if vence < ahora]
+            for id_lote in vencidos:
+                del self._concedidos[id_lote]
+                if self._intentos[id_lote] >= self.max_intentos:
+                    self._fallidos.add(id_lote)
+                else:
+                    self._pendientes.append(id_lote)
+        return len(vencidos)
+
+    def estado(self):
+        with self._candado:
+            return {'pendientes': len(self._pendientes), 'concedidos': len(self._concedidos),
+                    'terminados': len(self._resultados), 'fallidos': len(self._fallidos)}
+
+    def resultados(self, ids):
+        salidas = []
+        for id_lote in ids:
+            salidas += _salidas_lote(self._resultados.get(id_lote), self._lotes[id_lote],
+                                     id_lote in self._fallidos)
+        return salidas
+
+    def lotes(self):
+        with self._candado:
+            return {i: lote for i, lote in self._lotes.items() if i not in self._fallidos}
+
+    def terminado(self, id_lote):
+        with self._candado:
+            return id_lote in self._resultados or id_lote in self._fallidos
+
+
+class ColaArchivos(ColaTrabajo):
+    """
+    Cola en un directorio compartido (local o de red) para varios procesos o máquinas.
+
+    Estructura del directorio:
+        cola.json             configuración (función, duración de concesión, intentos)
+        lotes/<id>.pkl        escenarios de cada lote (se escriben una vez)
+        pendientes/<id>.json  lotes a la espera, con su número de intentos
+        concedidos/<id>.json  lotes en evaluación; su fecha de modificación es
+                              la última renovación de la concesión
+        resultados/<id>.pkl   salidas de los lotes terminados
+        fallidos/<id>.json    lotes que agotaron sus intentos
+
+    Tomar un lote es un `os.rename` de pendientes/ a concedidos/, atómico en
+    POSIX: si dos trabajadores compiten solo uno lo consigue. Con varias
+    máquinas los relojes deben estar razonablemente sincronizados.
+    """
+
+    def __init__(self, directorio, funcion=None, duracion_concesion=DURACION_CONCESION,
+                 max_intentos=MAX_INTENTOS):
+        self.directorio = Path(directorio)
+        config = self.directorio / 'cola.json'
+        self._config = config
+        if config.exists():
+            datos = self._leer_json(config)
+        else:
+            datos = {'funcion': None, 'duracion_concesion': duracion_concesion,
+                     'max_intentos': max_intentos}
+            for sub in ('lotes', 'pendientes', 'concedidos', 'resultados', 'fallidos'):
+                (self.directorio / sub).mkdir(parents=True, exist_ok=True)
+        if funcion is not None and datos.get('funcion') != funcion:
+            # El coordinador define la función aunque un trabajador haya creado la cola antes
+            datos['funcion'] = funcion
+            self._escribir(config, json.dumps(datos, indent=2).encode())
+        elif not config.exists():
+            self._escribir(config, json.dumps(datos, indent=2).encode())
+        self.funcion = datos['funcion']
+        self.duracion_concesion = datos['duracion_concesion']
+        self.max_intentos = datos['max_intentos']
+
+    def referencia_funcion(self):
+        if self.funcion is None:
+            self.funcion = self._leer_json(self._config).get('funcion')
+        return self.funcion
+
+    def _ruta(self, estado, id_lote, extension='.json'):
+        return self.directorio / estado / f'{id_lote}{extension}'
+
+    @staticmethod
+    def _escribir(ruta, contenido):
+        """Escritura atómica: temporal en el mismo directorio y rename"""
+        fd, tmp = tempfile.mkstemp(dir=ruta.parent, prefix='.tmp_')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(contenido)
+        os.replace(tmp, ruta)
+
+    @staticmethod
+    def _leer_json(ruta):
+        try:
+            with open(ruta, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _reservar_id(self, desde):
+        """
+        Reserva el primer identificador libre a partir de `desde`.
+
+        La reserva es la creación exclusiva (O_EXCL) del archivo del lote: si
+        dos coordinadores encolan a la vez, cada identificador lo obtiene uno solo.
+        """
+        numero = desde
+        while True:
+            id_lote = f'{numero:06d}'
+            try:
+                os.close(os.open(self._ruta('lotes', id_lote, '.pkl'), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return id_lote, numero
+            except FileExistsError:
+                numero += 1
+
+    def encolar(self, escenarios, tam_lote=1):
+        ids = []
+        numero = len(list((self.directorio / 'lotes').glob('*.pkl')))
+        for lote in repartir(escenarios, tam_lote):
+            id_lote, numero = self._reservar_id(numero)
+            numero += 1
+            self._escribir(self._ruta('lotes', id_lote, '.pkl'), pickle.dumps(lote))
+            self._escribir(self._ruta('pendientes', id_lote), json.dumps({'intentos': 0}).encode())
+            ids.append(id_lote)
+        return ids
+
+    def tomar(self, trabajador):
+        for ruta in sorted((self.directorio / 'pendientes').glob('*.json')):
+            id_lote = ruta.stem
+            destino = self._ruta('concedidos', id_lote)
+            try:
+                os.rename(ruta, destino)
+                # rename conserva la fecha de cuando se encoló: sin renovarla, otro
+                # proceso vería la concesión vencida y devolvería el lote a la cola
+                os.utime(destino)
+            except FileNotFoundError:  # Otro trabajador lo tomó antes
+                continue
+            if self._ruta('resultados', id_lote, '.pkl').exists():
+                os.remove(destino)  # Ya lo terminó un trabajador anterior
+                continue
+            datos = self._leer_json(destino)
+            datos.update(intentos=datos.get('intentos', 0) + 1, trabajador=trabajador)
+            self._escribir(destino, json.dumps(datos).encode())  # También marca la concesión
+            try:
+                # Si una liberación concurrente lo devolvió a pendientes, se retira de ahí
+                # para que el lote no quede en dos directorios
+                os.remove(self._ruta('pendientes', id_lote))
+            except FileNotFoundError:
+                pass
+            with open(self._ruta('lotes', id_lote, '.pkl'), 'rb') as f:
+                return id_lote, pickle.load(f)
+        return None
+
+    def renovar(self, id_lote, trabajador):
+        try:
+            os.utime(self._ruta('concedidos', id_lote))
+        except FileNotFoundError:
+            pass
+
+    def entregar(self, id_lote, resultados, trabajador):
+        self._escribir(self._ruta('resultados', id_lote, '.pkl'), pickle.dumps(resultados))
+        try:
+            os.remove(self._ruta('concedidos', id_lote))
+        except FileNotFoundError:
+            pass
+
+    def liberar_vencidas(self):
+        liberados = 0
+        ahora = time.time()
+        for ruta in (self.directorio / 'concedidos').glob('*.json'):
+            try:
+                if ahora - ruta.stat().st_mtime <= self.duracion_concesion:
+                    continue
+                datos = self._leer_json(ruta)
+                if ahora - ruta.stat().st_mtime <= self.duracion_concesion:
+                    continue  # Concedido o renovado mientras se leía
+                estado = 'fallidos' if datos.get('intentos', 0) >= self.max_intentos else 'pendientes'
+                os.rename(ruta, self._ruta(estado, ruta.stem))
+            except FileNotFoundError:  # Entregado o liberado por otro proceso
+                continue
+            liberados += 1
+        return liberados
+
+    def estado(self):
+        def contar(sub, extension='.json'):
+            return len(list((self.directorio / sub).glob(f'*{extension}')))
+        return {'pendientes': contar('pendientes'), 'concedidos': contar('concedidos'),
+                'terminados': contar('resultados', '.pkl'), 'fallidos': contar('fallidos')}
+
+    def resultados(self, ids):
+        salidas = []
+        for id_lote in ids:
+            with open(self._ruta('lotes', id_lote, '.pkl'), 'rb') as f:
+                lote = pickle.load(f)
+            ruta = self._ruta('resultados', id_lote, '.pkl')
+            resultados = None
+            if ruta.exists():
+                with open(ruta, 'rb') as f:
+                    resultados = pickle.load(f)
+            salidas += _salidas_lote(resultados, lote, self._ruta('fallidos', id_lote).exists())
+        return salidas
+
+    def lotes(self):
+        lotes = {}
+        for ruta in sorted((self.directorio / 'lotes').glob('*.pkl')):
+            if self._ruta('fallidos', ruta.stem).exists():
+                continue
+            try:
+                with open(ruta, 'rb') as f:
+                    lotes[ruta.stem] = pickle.load(f)
+            except (EOFError, pickle.UnpicklingError):
+                continue  # Identificador reservado por un encolado en curso
+        return lotes
+
+    def terminado(self, id_lote):
+        return (self._ruta('resultados', id_lote, '.pkl').exists()
+                or self._ruta('fallidos', id_lote).exists())
+
+
+def _salidas_lote(resultados, lote, fallido):
+    """Salidas de un lote; si no terminó, una entrada de error por escenario"""
+    if resultados is not None:
+        return resultados
+    motivo = 'lote fallido: se agotaron los intentos' if fallido else 'lote sin terminar'
+    return [{'estado': 'error', 'resultado': None, 'error': motivo} for _ in lote]
+
+
+@contextmanager
+def mantener_concesion(cola, id_lote, trabajador, intervalo=None):
+    """
+    Renueva la concesión de un lote desde un hilo mientras dura el bloque `with`.
+
+    Así un escenario más largo que la duración de la concesión no se vuelve a
+    conceder a otro trabajador mientras sigue en evaluación.
+
+    Args:
+        cola (ColaTrabajo): Cola del lote
+        id_lote (str): Lote concedido
+        trabajador (str): Identificador del trabajador
+        intervalo (float): Segundos entre renovaciones (por defecto, un tercio de la concesión)
+    """
+    intervalo = intervalo or getattr(cola, 'duracion_concesion', DURACION_CONCESION) / 3
+    parar = threading.Event()
+
+    def latir():
+        while not parar.wait(intervalo):
+            try:
+                cola.renovar(id_lote, trabajador)
+            except OSError:
+                pass  # Falla pasajera del directorio compartido: se reintenta en el siguiente latido
+
+    hilo = threading.Thread(target=latir, name=f'concesion-{id_lote}', daemon=True)
+    hilo.start()
+    try:
+        yield
+    finally:
+        parar.set()
+        hilo.join()
+
+
+def trabajar(cola, funcion=None, trabajador=None, esperar=False, pausa=1.0):
+    """
+    Bucle de un trabajador: toma lotes, evalúa sus escenarios y entrega los resultados.
+
+    Mientras se evalúa un lote, un hilo renueva su concesión
+    (`mantener_concesion`), de modo que los escenarios pueden durar más que
+    la concesión; si el trabajador muere, los latidos cesan y el lote vuelve a
+    la cola. Los errores de un escenario quedan en su salida y no detienen el lote.
+
+    Args:
+        cola (ColaTrabajo): Cola de la que se toman los lotes
+        funcion (callable): Evaluación de un escenario (None = la de la cola)
+        trabajador (str): Identificador del trabajador
+        esperar (bool): Esperar a que se encolen lotes y seguir mientras haya
+            concesiones de otros trabajadores (por si se liberan); si False,
+            termina cuando no hay lotes pendientes
+        pausa (float): Segundos entre consultas cuando no hay lotes
+
+    Returns:
+        int: Lotes evaluados por este trabajador
+    """
+    trabajador = trabajador or identificador_trabajador()
+    evaluados = 0
+    while True:
+        cola.liberar_vencidas()
+        tomado = cola.tomar(trabajador)
+        if tomado is None:
+            # Con `esperar` una cola aún vacía no se da por terminada: el coordinador puede no haber encolado
+            if not esperar or (cola.terminada() and any(cola.estado().values())):
+                return evaluados
+            time.sleep(pausa)
+            continue
+        id_lote, escenarios = tomado
+        if funcion is None:
+            funcion = cargar_funcion(cola.referencia_funcion())
+        with mantener_concesion(cola, id_lote, trabajador):
+            salidas = [_ejecutar((funcion, escenario)) for escenario in escenarios]
+        cola.entregar(id_lote, salidas, trabajador)
+        evaluados += 1
+
+
+def recoger_resultados(cola, ids, pausa=1.0, tiempo_maximo=None):
+    """
+    Entrega las salidas de cada lote en cuanto termina, liberando las concesiones vencidas.
+
+    Así el coordinador puede registrar cada lote sin esperar al resto. Los
+    lotes que no terminan antes de `tiempo_maximo` se entregan al final con
+    una salida de error por escenario.
+
+    Args:
+        cola (ColaTrabajo): Cola de los lotes
+        ids (list): Lotes a recoger
+        pausa (float): Segundos entre consultas
+        tiempo_maximo (float): Segundos de espera como máximo (None = sin límite)
+
+    Yields:
+        tuple: (id del lote, salidas de sus escenarios en orden)
+    """
+    inicio = time.monotonic()
+    faltan = list(ids)
+    while True:
+        for id_lote in [i for i in faltan if cola.terminado(i)]:
+            faltan.remove(id_lote)
+            yield id_lote, cola.resultados([id_lote])
+        if not faltan or (tiempo_maximo is not None and time.monotonic() - inicio > tiempo_maximo):
+            break
+        cola.liberar_vencidas()
+        time.sleep(pausa)
+    for id_lote in faltan:
+        yield id_lote, cola.resultados([id_lote])
+
+
+def esperar_resultados(cola, ids, pausa=1.0, tiempo_maximo=None):
+    """
+    Espera a que terminen los lotes, liberando las concesiones vencidas.
+
+    Returns:
+        list: Salidas de todos los escenarios en orden
+    """
+    por_lote = dict(recoger_resultados(cola, ids, pausa, tiempo_maximo))
+    return [salida for id_lote in ids for salida in por_lote[id_lote]]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Trabajador de una cola de escenarios en un directorio compartido',
+        epilog='Uso: python -m herramientas.cola_trabajo trabajar /ruta/compartida/cola --esperar')
+    sub = parser.add_subparsers(dest='orden', required=True)
+    p_trabajar = sub.add_parser('trabajar', help='Evaluar lotes de la cola')
+    p_trabajar.add_argument('cola', help='Directorio de la cola')
+    p_trabajar.add_argument('--id', default=None, help='Identificador del trabajador (por defecto, host-PID)')
+    p_trabajar.add_argument('--esperar', action='store_true', help='Esperar nuevos lotes hasta que la cola termine')
+    p_estado = sub.add_parser('estado', help='Mostrar el estado de la cola')
+    p_estado.add_argument('cola', help='Directorio de la cola')
+    args = parser.parse_args()
+
+    cola = ColaArchivos(args.cola)
+    if args.orden == 'trabajar':
+        evaluados = trabajar(cola, trabajador=args.id, esperar=args.esperar)
+        print(f"Lotes evaluados: {evaluados}")
+    print(json.dumps(cola.estado(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from herramientas.posicion_solar import geometria_para_df
+
+# Nombre de columna en los distintos formatos -> variable canónica
+VARIABLES = {
+    'GHI': 'GHI',
+    'DNI': 'DNI',
+    'DHI': 'DHI',
+    'Temperature': 'Tdry', 'Tdry': 'Tdry', 'DryBulb': 'Tdry',
+    'Dew Point': 'Tdew', 'Tdew': 'Tdew', 'DewPoint': 'Tdew',
+    'Relative Humidity': 'RH', 'RH': 'RH', 'RelativeHumidity': 'RH',
+    'Pressure': 'Pres', 'Pres': 'Pres',
+    'Wind Speed': 'Wspd', 'Wspd': 'Wspd', 'WindSpeed': 'Wspd',
+    'Wind Direction': 'Wdir', 'Wdir': 'Wdir', 'WindDirection': 'Wdir',
+    'Snow Depth': 'Snow Depth',
+    'Solar Zenith Angle': 'Zenith'
+}
+
+IRRADIANCIA = ['GHI', 'DNI', 'DHI']
+
+# Tabla de reglas. Cada regla ocupa un bit de la máscara uint16 según su posición.
+# Tipos:
+#   nulo        valor ausente o no numérico
+#   rango       fuera de [min, max]
+#   variacion   salto entre pasos consecutivos mayor que max_paso (datos horarios)
+#   cruzada     izquierda > factor * derecha + margen (se marcan ambas columnas)
+#   nocturna    irradiancia > umbral con el sol bajo el horizonte (requiere cenit)
+#   cierre      |GHI - (DNI·cosZ + DHI)| > tolerancia relativa (requiere cenit)
+#   persistencia  mismo valor durante más de max_repeticiones pasos (sensor pegado)
+REGLAS_QC = [
+    {'nombre': 'nulo', 'tipo': 'nulo', 'variables': '*'},
+    {'nombre': 'rango', 'tipo': 'rango', 'limites': {
+        'GHI': (0, 1500),
+        'DNI': (0, 1400),
+        'DHI': (0, 800),
+        'Tdry': (-20, 50),
+        'Tdew': (-25, 30),
+        'RH': (0, 100),
+        'Pres': (500, 1100),
+        'Wspd': (0, 40),
+        'Wdir': (0, 360),
+        'Snow Depth': (0, 500),
+        'Zenith': (0, 180)
+    }},
+    {'nombre': 'variacion', 'tipo': 'variacion', 'max_paso': {
+        'GHI': 1000,
+        'DNI': 1100,
+        'DHI': 500,
+        'Tdry': 10,
+        'Tdew': 10,
+        'RH': 50,
+        'Pres': 10,
+        'Wspd': 20
+    }},
+    {'nombre': 'dhi_mayor_ghi', 'tipo': 'cruzada', 'izquierda': 'DHI', 'derecha': 'GHI',
+     'factor': 1.1, 'margen': 50},
+    {'nombre': 'tdew_mayor_tdry', 'tipo': 'cruzada', 'izquierda': 'Tdew', 'derecha': 'Tdry',
+     'factor': 1.0, 'margen': 0.5},
+    {'nombre': 'irradiancia_nocturna', 'tipo': 'nocturna', 'variables': IRRADIANCIA,
+     'cenit_noche': 90, 'umbral': 10},
+    {'nombre': 'cierre_componentes', 'tipo': 'cierre', 'tolerancia': 0.15,
+     'ghi_minimo': 50, 'cenit_maximo': 85},
+    {'nombre': 'persistencia', 'tipo': 'persistencia',
+     'variables': ['Tdry', 'Tdew', 'RH', 'Wspd'], 'max_repeticiones': 12}
+]
+
+TIPOS_CON_CENIT = ('nocturna', 'cierre')
+
+
+def limites_rango(columnas, reglas=REGLAS_QC):
+    """
+    Devuelve los límites físicos de la tabla de reglas para las columnas dadas.
+
+    Args:
+        columnas (iterable): Nombres de columna (en cualquiera de los formatos)
+        reglas (list): Tabla de reglas
+
+    Returns:
+        dict: Columna -> (mínimo, máximo)
+    """
+    limites = {}
+    for regla in reglas:
+        if regla['tipo'] != 'rango':
+            continue
+        for columna in columnas:
+            variable = VARIABLES.get(columna)
+            if variable in regla['limites']:
+                limites[columna] = tuple(regla['limites'][variable])
+    return limites
+
+
+def _longitud_rachas(iguales):
+    """Para cada posición, largo de la racha de valores iguales que termina ahí (por columna)"""
+    n = iguales.shape[0]
+    indice = np.arange(n)[:, None]
+    inicio = np.where(~iguales, indice, 0)
+    np.maximum.accumulate(inicio, axis=0, out=inicio)
+    return indice - inicio + 1
+
+
+def evaluar_qc(df, reglas=REGLAS_QC, cenit=None, ubicacion=None):
+    """
+    Evalúa todas las reglas de calidad sobre un DataFrame de una sola vez.
+
+    Args:
+        df (pd.DataFrame): Datos meteorológicos
+        reglas (list): Tabla de reglas (como máximo 16)
+        cenit (array): Ángulo cenital solar en grados por fila. Si es None se
+            usa la columna 'Solar Zenith Angle' cuando existe o se calcula a
+            partir de `ubicacion`; las reglas que lo necesitan se omiten si no
+            hay cenit disponible.
+        ubicacion (tuple): (lat, lon, tz) del sitio, para calcular el cenit
+
+    Returns:
+        tuple: (máscara uint16 de forma (filas, columnas), lista de columnas
+            evaluadas, lista de reglas omitidas)
+    """
+    if len(reglas) > 16:
+        raise ValueError("La máscara uint16 admite como máximo 16 reglas")
+
+    columnas = [c for c in df.columns if c in VARIABLES]
+    variables = [VARIABLES[c] for c in columnas]
+    posicion = {v: j for j, v in enumerate(variables)}
+    valores = np.column_stack([
+        pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=np.float64) for c in columnas
+    ]) if columnas else np.empty((len(df), 0))
+    n = len(df)
+
+    if cenit is None and 'Solar Zenith Angle' in df.columns:
+        cenit = pd.to_numeric(df['Solar Zenith Angle'], errors='coerce').to_numpy(dtype=np.float64)
+    elif cenit is None and ubicacion is not None:
+        cenit = geometria_para_df(df, *ubicacion)['cenit']
+    if cenit is not None:
+        cenit = np.asarray(cenit, dtype=np.float64)
+
+    flags = np.zeros(valores.shape, dtype=np.uint16)
+    omitidas = []
+    nulos = np.isnan(valores)
+
+    def columnas_de(nombres):
+        if nombres == '*':
+            return list(range(len(columnas)))
+        return [posicion[v] for v in nombres if v in posicion]
+
+    with np.errstate(invalid='ignore'):
+        for bit, regla in enumerate(reglas):
+            marca = np.zeros(valores.shape, dtype=bool)
+            tipo = regla['tipo']
+
+            if tipo in TIPOS_CON_CENIT and cenit is None:
+                omitidas.append(regla['nombre'])
+                continue
+
+            if tipo == 'nulo':
+                idx = columnas_de(regla['variables'])
+                marca[:, idx] = nulos[:, idx]
+            elif tipo == 'rango':
+                for variable, (minimo, maximo) in regla['limites'].items():
+                    if variable in posicion:
+                        j = posicion[variable]
+                        marca[:, j] = (valores[:, j] < minimo) | (valores[:, j] > maximo)
+            elif tipo == 'variacion':
+                for variable, max_paso in regla['max_paso'].items():
+                    if variable in posicion and n > 1:
+                        j = posicion[variable]
+                        salto = np.abs(np.diff(valores[:, j])) > max_paso
+                        marca[1:, j] |= salto
+            elif tipo == 'cruzada':
+                izq, der = regla['izquierda'], regla['derecha']
+                if izq in posicion and der in posicion:
+                    i, j = posicion[izq], posicion[der]
+                    viola = valores[:, i] > regla['factor'] * valores[:, j] + regla['margen']
+                    marca[:, i] = viola
+                    marca[:, j] = viola
+            elif tipo == 'nocturna':
+                noche = cenit > regla['cenit_noche']
+                for j in columnas_de(regla['variables']):
+                    marca[:, j] = noche & (valores[:, j] > regla['umbral'])
+            elif tipo == 'cierre':
+                if all(v in posicion for v in IRRADIANCIA):
+                    ghi, dni, dhi = (valores[:, posicion[v]] for v in IRRADIANCIA)
+                    calculado = dni * np.cos(np.radians(cenit)) + dhi
+                    aplica = (ghi > regla['ghi_minimo']) & (cenit < regla['cenit_maximo'])
+                    viola = aplica & (np.abs(ghi - calculado) > regla['tolerancia'] * ghi)
+                    for v in IRRADIANCIA:
+                        marca[:, posicion[v]] = viola
+            elif tipo == 'persistencia':
+                idx = columnas_de(regla['variables'])
+                if idx and n > 1:
+                    sub = valores[:, idx]
+                    iguales = np.zeros(sub.shape, dtype=bool)
+                    iguales[1:] = sub[1:] == sub[:-1]
+                    marca[:, idx] = _longitud_rachas(iguales) > regla['max_repeticiones']
+            else:
+                raise ValueError(f"Tipo de regla desconocido: {tipo}")
+
+            flags |= marca.astype(np.uint16) << np.uint16(bit)
+
+    return flags, columnas, omitidas
+
+
+def reporte_qc(flags, columnas, reglas=REGLAS_QC, meses=None, omitidas=()):
+    """
+    Resume la máscara de calidad en conteos por regla, columna y mes.
+
+    Args:
+        flags (array): Máscara uint16 devuelta por `evaluar_qc`
+        columnas (list): Columnas evaluadas
+        reglas (list): Tabla de reglas usada
+        meses (array): Mes (1-12) de cada fila, para el desglose mensual
+        omitidas (list): Reglas omitidas por falta de datos
+
+    Returns:
+        dict: Reporte serializable en JSON
+    """
+    n = flags.shape[0]
+    if meses is not None:
+        meses = np.asarray(meses, dtype=np.int64)
+        por_mes = np.zeros((n, 12), dtype=np.int64)
+        validos = (meses >= 1) & (meses <= 12)
+        por_mes[np.flatnonzero(validos), meses[validos] - 1] = 1
+
+    reporte = {
+        'n_filas': int(n),
+        'columnas': list(columnas),
+        'celdas_marcadas': int(np.count_nonzero(flags)),
+        'filas_marcadas': int(np.count_nonzero(flags.any(axis=1))) if flags.size else 0,
+        'reglas_omitidas': list(omitidas),
+        'reglas': {}
+    }
+    for bit, regla in enumerate(reglas):
+        marca = ((flags >> np.uint16(bit)) & 1).astype(np.int64)
+        por_columna = marca.sum(axis=0)
+        resumen = {
+            'bit': bit,
+            'tipo': regla['tipo'],
+            'total': int(por_columna.sum()),
+            'por_columna': {c: int(k) for c, k in zip(columnas, por_columna) if k}
+        }
+        if meses is not None:
+            conteo_mes = por_mes.T @ marca  # (12, columnas)
+            resumen['por_mes'] = {
+                str(m + 1): int(conteo_mes[m].sum()) for m in range(12) if conteo_mes[m].any()
+            }
+        reporte['reglas'][regla['nombre']] = resumen
+    return reporte
+
+
+def guardar_qc(ruta_base, flags, columnas, reporte):
+    """
+    Guarda la máscara de calidad (.npy) y el reporte (.json).
+
+    Args:
+        ruta_base (str): Ruta sin extensión; se generan <ruta_base>_qc.npy y <ruta_base>_qc.json
+        flags (array): Máscara uint16
+        columnas (list): Columnas evaluadas (orden de la segunda dimensión)
+        reporte (dict): Reporte devuelto por `reporte_qc`
+
+    Returns:
+        tuple: (ruta del .npy, ruta del .json)
+    """
+    ruta_base = Path(ruta_base)
+    ruta_npy = ruta_base.with_name(ruta_base.name + '_qc.npy')
+    ruta_json = ruta_base.with_name(ruta_base.name + '_qc.json')
+    np.save(ruta_npy, flags)
+    with open(ruta_json, 'w') as f:
+        json.dump({**reporte, 'columnas': list(columnas)}, f, indent=2, ensure_ascii=False)
+    return ruta_npy, ruta_json
+
+
+def filas_marcadas(flags, columnas, reglas=REGLAS_QC, regla=None, columna=None):
+    """
+    Devuelve una máscara booleana de las filas marcadas.
+
+    Args:
+        flags (array): Máscara uint16
+        columnas (list): Columnas evaluadas
+        reglas (list): Tabla de reglas usada
+        regla (str): Nombre de la regla a consultar (None = cualquiera)
+        columna (str): Columna a consultar (None = cualquiera)
+
+    Returns:
+        array: Booleano por fila
+    """
+    if columna is not None:
+        flags = flags[:, [columnas.index(columna)]]
+    if regla is not None:
+        bit = [r['nombre'] for r in reglas].index(regla)
+        flags = (flags >> np.uint16(bit)) & 1
+    return flags.any(axis=1)
+
+
+def evaluar_y_guardar_qc(df, ruta_base, reglas=REGLAS_QC, cenit=None, ubicacion=None):
+    """
+    Evalúa la calidad de un DataFrame y guarda máscara y reporte junto a `ruta_base`.
+
+    Args:
+        df (pd.DataFrame): Datos meteorológicos
+        ruta_base (str): Ruta sin extensión para los archivos de salida
+        reglas (list): Tabla de reglas
+        cenit (array): Ángulo cenital solar por fila (opcional)
+        ubicacion (tuple): (lat, lon, tz) del sitio para calcular el cenit (opcional)
+
+    Returns:
+        dict: Reporte de calidad
+    """
+    flags, columnas, omitidas = evaluar_qc(df, reglas, cenit, ubicacion)
+    meses = df['Month'].to_numpy() if 'Month' in df.columns else None
+    reporte = reporte_qc(flags, columnas, reglas, meses, omitidas)
+    guardar_qc(ruta_base, flags, columnas, reporte)
+    return reporte
+
+
+def _acumular_reporte(total, parcial):
+    """Suma al reporte `total` los conteos del reporte de un bloque"""
+    for clave, valor in parcial.items():
+        if isinstance(valor, dict):
+            _acumular_reporte(total.setdefault(clave, {}), valor)
+        elif isinstance(valor, int) and not isinstance(valor, bool) and clave != 'bit':
+            total[clave] = total.get(clave, 0) + valor
+        else:
+            total.setdefault(clave, valor)
+
+
+def evaluar_y_guardar_qc_por_bloques(bloques, ruta_base, reglas=REGLAS_QC, ubicacion=None, filas_copia=1 << 16):
+    """
+    Evalúa la calidad de una serie leída por bloques, con memoria acotada por el tamaño del bloque.
+
+    Cada bloque se evalúa junto con las últimas filas del anterior, las
+    necesarias para que las reglas de variación y persistencia den el mismo
+    resultado que sobre la serie completa. La máscara se va escribiendo a
+    disco y los conteos del reporte se suman bloque a bloque; se generan los
+    mismos <ruta_base>_qc.npy y <ruta_base>_qc.json que `evaluar_y_guardar_qc`.
+
+    Args:
+        bloques (iterable): DataFrames consecutivos con las mismas columnas
+        ruta_base (str): Ruta sin extensión para los archivos de salida
+        reglas (list): Tabla de reglas
+        ubicacion (tuple): (lat, lon, tz) del sitio para calcular el cenit (opcional)
+        filas_copia (int): Filas de la máscara que se copian a la vez al .npy final
+
+    Returns:
+        dict: Reporte de calidad
+    """
+    # Filas previas que necesita cada bloque: una para la variación y el
+    # máximo de repeticiones para que las rachas que vienen del bloque anterior se cuenten enteras
+    contexto = max([1] + [r['max_repeticiones'] for r in reglas if r['tipo'] == 'persistencia'])
+    reporte, columnas, anterior, n = {}, None, None, 0
+    with tempfile.TemporaryFile() as crudo:
+        for bloque in bloques:
+            buffer = bloque if anterior is None else pd.concat([anterior, bloque])
+            flags, columnas_bloque, omitidas = evaluar_qc(buffer, reglas, ubicacion=ubicacion)
+            if columnas is not None and columnas_bloque != columnas:
+                raise ValueError("Los bloques no tienen las mismas columnas")
+            columnas = columnas_bloque
+            flags = flags[len(buffer) - len(bloque):]
+            meses = bloque['Month'].to_numpy() if 'Month' in bloque.columns else None
+            _acumular_reporte(reporte, reporte_qc(flags, columnas, reglas, meses, omitidas))
+            crudo.write(np.ascontiguousarray(flags).tobytes())
+            n += len(bloque)
+            anterior = bloque.iloc[-contexto:]
+
+        ruta_base = Path(ruta_base)
+        columnas = columnas or []
+        mascara = np.lib.format.open_memmap(ruta_base.with_name(ruta_base.name + '_qc.npy'), mode='w+',
+                                            dtype=np.uint16, shape=(n, len(columnas)))
+        crudo.seek(0)
+        for inicio in range(0, n, filas_copia):
+            filas = min(filas_copia, n - inicio)
+            mascara[inicio:inicio + filas] = np.fromfile(crudo, dtype=np.uint16,
+                                                         count=filas * len(columnas)).reshape(filas, -1)
+        mascara.flush()
+        del mascara
+
+    reporte['columnas'] = list(columnas)
+    with open(ruta_base.with_name(ruta_base.name + '_qc.json'), 'w') as f:
+        json.dump(reporte, f, indent=2, ensure_ascii=False)
+    return reporte
@@ -0,0 +1,185 @@
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from herramientas.cache_tmy import hash_archivo, recordar_hash
+from herramientas.recurso import RecursoSolar, obtener_recurso, registrar_recurso
+
+# Recursos de este proceso recibidos por memoria compartida: nombre -> RecursoSolar
+_recursos_compartidos = {}
+
+
+def _publicar(recursos):
+    """
+    Copia las series de cada recurso a un bloque de memoria compartida.
+
+    Returns:
+        tuple: (bloques creados, descriptores serializables para los trabajadores)
+    """
+    bloques, descriptores = [], {}
+    try:
+        for nombre, ubicacion in recursos.items():
+            recurso = obtener_recurso(ubicacion)
+            claves = list(recurso.series)
+            matriz = np.array([recurso.series[c] for c in claves], dtype=np.float64)
+            bloque = shared_memory.SharedMemory(create=True, size=max(matriz.nbytes, 1))
+            bloques.append(bloque)
+            np.ndarray(matriz.shape, dtype=np.float64, buffer=bloque.buf)[:] = matriz
+            # El hash del archivo va con el descriptor: el trabajador lo necesita
+            # para registrar el recurso y así no relee el CSV completo
+            por_archivo = not isinstance(ubicacion, RecursoSolar) and recurso.archivo
+            descriptores[nombre] = {
+                'memoria': bloque.name,
+                'forma': matriz.shape,
+                'claves': claves,
+                # La ubicación original permite que obtener_recurso() la encuentre en el trabajador
+                'ubicacion': None if isinstance(ubicacion, RecursoSolar) else ubicacion,
+                'hash_archivo': hash_archivo(recurso.archivo) if por_archivo else None,
+                'metadatos': {'nombre': recurso.nombre, 'lat': recurso.lat, 'lon': recurso.lon,
+                              'tz': recurso.tz, 'elev': recurso.elev, 'archivo': recurso.archivo}
+            }
+    except BaseException:
+        _liberar(bloques)
+        raise
+    return bloques, descriptores
+
+
+def _liberar(bloques):
+    for bloque in bloques:
+        bloque.close()
+        bloque.unlink()
+
+
+def _adjuntar(descriptores):
+    """Reconstruye en este proceso los recursos publicados en memoria compartida"""
+    for nombre, descriptor in descriptores.items():
+        bloque = shared_memory.SharedMemory(name=descriptor['memoria'])
+        matriz = np.ndarray(descriptor['forma'], dtype=np.float64, buffer=bloque.buf)
+        # PySAM necesita listas: se convierten una vez por trabajador, no por escenario
+        series = {clave: matriz[i].tolist() for i, clave in enumerate(descriptor['claves'])}
+        del matriz
+        bloque.close()
+        recurso = RecursoSolar(series=series, **descriptor['metadatos'])
+        if descriptor['ubicacion'] is not None:
+            if descriptor['hash_archivo'] is not None:
+                recordar_hash(recurso.archivo, descriptor['hash_archivo'])
+            registrar_recurso(descriptor['ubicacion'], recurso)
+        _recursos_compartidos[nombre] = recurso
+
+
+def _inicializar(descriptores, inicializador, argumentos_inicializador):
+    _adjuntar(descriptores)
+    if inicializador is not None:
+        inicializador(*argumentos_inicializador)
+
+
+def recurso_compartido(nombre):
+    """Recurso publicado por `ejecutar_barrido` con ese nombre (en el trabajador o en serie)"""
+    return _recursos_compartidos[nombre]
+
+
+def _ejecutar(tarea):
+    """Ejecuta un escenario capturando su error para no detener el barrido"""
+    funcion, escenario = tarea
+    try:
+        return {'estado': 'ok', 'resultado': funcion(escenario), 'error': ''}
+    except Exception as e:
+        return {'estado': 'error', 'resultado': None, 'error': f'{type(e).__name__}: {e}',
+                'traza': traceback.format_exc()}
+
+
+def _ejecutar_lote(tareas):
+    """Ejecuta un envío de varios escenarios en un trabajador"""
+    return [_ejecutar(tarea) for tarea in tareas]
+
+
+def ejecutar_barrido(funcion, escenarios, recursos=None, n_procesos=None, tam_envio=None,
+                     inicializador=None, argumentos_inicializador=(), puntos_control=None):
+    """
+    Ejecuta un barrido de escenarios en un pool de procesos.
+
+    Las series meteorológicas de cada recurso se copian una sola vez a memoria
+    compartida; cada trabajador las reconstruye al iniciar y las registra, de
+    modo que `obtener_recurso(ubicacion)` y `recurso_compartido(nombre)` las
+    devuelven sin leer archivos ni recibirlas con cada escenario. Los modelos
+    de `pool_modelos` quedan calientes por trabajador.
+
+    Un escenario que falla no detiene el barrido: su entrada lleva estado
+    'error', el mensaje y la traza. Si un trabajador muere (BrokenProcessPool)
+    se conservan las salidas ya recibidas y los escenarios sin terminar
+    quedan con estado 'error'.
+
+    Los envíos se recogen a medida que terminan, sin esperar a los anteriores.
+    Con `puntos_control`, los escenarios que ya tienen salida guardada no se
+    evalúan y cada salida nueva se registra en cuanto llega, de modo que un
+    barrido interrumpido puede reanudarse sin repetir lo terminado.
+
+    Args:
+        funcion (callable): Función de nivel de módulo que recibe un escenario
+        escenarios (list): Escenarios (cualquier objeto serializable con pickle)
+        recursos (dict): nombre -> ubicación (str, dict o RecursoSolar) a publicar
+        n_procesos (int): Procesos del pool (None = todos los núcleos, 1 = en serie)
+        tam_envio (int): Escenarios por envío a un trabajador (None = automático;
+            1 con `puntos_control`, para que una interrupción solo pierda los escenarios en curso)
+        inicializador (callable): Función adicional a ejecutar al iniciar cada trabajador
+        argumentos_inicializador (tuple): Argumentos del inicializador
+        puntos_control (PuntosControl): Registro de escenarios terminados (ver `puntos_control`)
+
+    Returns:
+        list: Un dict por escenario, en el mismo orden, con 'estado' ('ok' o
+            'error'), 'resultado' y 'error'
+    """
+    escenarios = list(escenarios)
+    salidas = [None] * len(escenarios)
+    if puntos_control is not None:
+        for i, escenario in enumerate(escenarios):
+            salidas[i] = puntos_control.obtener(escenario)
+    pendientes = [i for i, salida in enumerate(salidas) if salida is None]
+    if not pendientes:
+        return salidas
+    recursos = recursos or {}
+    tareas = [(funcion, escenarios[i]) for i in pendientes]
+    n_procesos = min(n_procesos or os.cpu_count() or 1, max(len(tareas), 1))
+
+    def registrar(indices, resultados):
+        for i, salida in zip(indices, resultados):
+            salidas[i] = salida
+            if puntos_control is not None:
+                puntos_control.guardar(escenarios[i], salida)
+
+    if n_procesos == 1:
+        for nombre, ubicacion in recursos.items():
+            _recursos_compartidos[nombre] = obtener_recurso(ubicacion)
+        if inicializador is not None:
+            inicializador(*argumentos_inicializador)
+        for i, tarea in zip(pendientes, tareas):
+            registrar([i], [_ejecutar(tarea)])
+        return salidas
+
+    if tam_envio is None:
+        # Sin puntos de control se agrupan varios escenarios por envío para
+        # repartir el costo de comunicación entre procesos
+        tam_envio = 1 if puntos_control is not None else max(1, len(tareas) // (4 * n_procesos))
+    bloques, descriptores = _publicar(recursos)
+    try:
+        with ProcessPoolExecutor(max_workers=n_procesos, initializer=_inicializar,
+                                 initargs=(descriptores, inicializador, argumentos_inicializador)) as pool:
+            envios = {}
+            for inicio in range(0, len(tareas), tam_envio):
+                futuro = pool.submit(_ejecutar_lote, tareas[inicio:inicio + tam_envio])
+                envios[futuro] = pendientes[inicio:inicio + tam_envio]
+            for futuro in as_completed(envios):
+                try:
+                    registrar(envios[futuro], futuro.result())
+                except BrokenProcessPool as e:
+                    # Un trabajador murió: los envíos sin terminar quedan con error
+                    for i in envios[futuro]:
+                        salidas[i] = {'estado': 'error', 'resultado': None,
+                                      'error': f'BrokenProcessPool: {e}', 'traza': traceback.format_exc()}
+        return salidas
+    finally:
+        _liberar(bloques)
@@ -0,0 +1,307 @@
+import itertools
+
+import numpy as np
+
+# Direcciones de la secuencia de Sobol (Joe y Kuo, new-joe-kuo-6.21201) para
+# las dimensiones 2 en adelante: (grado s, coeficientes a, números iniciales m)
+DIRECCIONES_SOBOL = [
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)),
+    (5, 14, (1, 3, 5, 5, 31)),
+    (6, 1, (1, 3, 3, 9, 7, 49)),
+    (6, 13, (1, 1, 1, 15, 21, 21)),
+    (6, 16, (1, 3, 1, 13, 27, 49)),
+    (6, 19, (1, 1, 1, 15, 7, 5)),
+    (6, 22, (1, 3, 1, 15, 13, 25)),
+    (6, 25, (1, 1, 5, 5, 19, 61)),
+    (7, 1, (1, 3, 7, 11, 23, 15, 103)),
+    (7, 4, (1, 3, 7, 13, 13, 15, 69)),
+    (7, 7, (1, 1, 3, 13, 7, 35, 63)),
+    (7, 8, (1, 3, 5, 9, 1, 25, 53)),
+    (7, 14, (1, 3, 1, 13, 9, 35, 107)),
+    (7, 19, (1, 3, 1, 5, 27, 61, 31)),
+    (7, 21, (1, 1, 5, 11, 19, 41, 61)),
+    (7, 28, (1, 3, 5, 3, 3, 13, 69)),
+    (7, 31, (1, 1, 7, 13, 1, 19, 1)),
+    (7, 32, (1, 3, 7, 5, 13, 19, 59)),
+    (7, 37, (1, 1, 3, 9, 25, 29, 41)),
+    (7, 41, (1, 3, 5, 13, 23, 1, 55)),
+    (7, 42, (1, 3, 7, 3, 13, 59, 17))
+]
+
+# Bits de cada coordenada de Sobol (admite hasta 2^30 puntos)
+BITS_SOBOL = 30
+
+# Cifras significativas con que se comparan los valores al canonizar un escenario
+CIFRAS_CANONICAS = 12
+
+
+def limites(parametros):
+    """
+    Rango (mínimo, máximo) de cada parámetro.
+
+    Args:
+        parametros (dict): Parámetro -> valores (como en `PARAMETROS`) o (mínimo, máximo)
+
+    Returns:
+        dict: Parámetro -> (mínimo, máximo)
+    """
+    return {p: (float(np.min(v)), float(np.max(v))) for p, v in parametros.items()}
+
+
+def diseno_oat(parametros, base=None):
+    """
+    Diseño de un factor a la vez (OAT).
+
+    Args:
+        parametros (dict): Parámetro -> valores que toma
+        base (dict): Configuración base (por defecto, la media de los valores de cada parámetro)
+
+    Returns:
+        list: (parámetro, valor, configuración) por cada valor de cada parámetro
+    """
+    if base is None:
+        base = {p: float(np.mean(v)) for p, v in parametros.items()}
+    return [(p, valor, {**base, p: valor}) for p, valores in parametros.items() for valor in valores]
+
+
+def diseno_factorial(parametros, base=None):
+    """
+    Diseño factorial completo: todas las combinaciones de valores.
+
+    Args:
+        parametros (dict): Parámetro -> valores que toma
+        base (dict): Valores de los parámetros que no se combinan
+
+    Returns:
+        list: Configuraciones (dict)
+    """
+    nombres = list(parametros)
+    return [{**(base or {}), **dict(zip(nombres, combinacion))}
+            for combinacion in itertools.product(*(parametros[p] for p in nombres))]
+
+
+def _escalar(unitarios, parametros, base):
+    """Lleva puntos de [0, 1]^d a los rangos de los parámetros"""
+    rangos = limites(parametros)
+    inferior = np.array([rangos[p][0] for p in parametros])
+    ancho = np.array([rangos[p][1] - rangos[p][0] for p in parametros])
+    puntos = inferior + unitarios * ancho
+    return [{**(base or {}), **{p: float(v) for p, v in zip(parametros, fila)}} for fila in puntos]
+
+
+def muestreo_lhs(n, dimensiones, semilla=0, candidatos=20):
+    """
+    Muestra por hipercubo latino en [0, 1]^d con criterio maximin.
+
+    Se generan `candidatos` hipercubos y se conserva el de mayor distancia
+    mínima entre puntos, lo que evita agrupamientos con pocas muestras.
+
+    Args:
+        n (int): Número de puntos
+        dimensiones (int): Número de parámetros
+        semilla (int): Semilla del generador aleatorio
+        candidatos (int): Hipercubos evaluados
+
+    Returns:
+        np.ndarray: Puntos de forma (n, dimensiones)
+    """
+    rng = np.random.default_rng(semilla)
+    mejor, mejor_distancia = None, -1.0
+    for _ in range(max(candidatos, 1)):
+        estratos = np.argsort(rng.random((dimensiones, n)), axis=1).T
+        puntos = (estratos + rng.random((n, dimensiones))) / n
+        diferencias = puntos[:, None, :] - puntos[None, :, :]
+        distancias = np.sqrt((diferencias ** 2).sum(axis=2))
+        np.fill_diagonal(distancias, np.inf)
+        if distancias.min() > mejor_distancia:
+            mejor, mejor_distancia = puntos, distancias.min()
+    return mejor
+
+
+def diseno_lhs(parametros, n, semilla=0, base=None):
+    """
+    Diseño por hipercubo latino (maximin) en los rangos de los parámetros.
+
+    Args:
+        parametros (dict): Parámetro -> valores o (mínimo, máximo)
+        n (int): Número de configuraciones
+        semilla (int): Semilla del muestreo
+        base (dict): Valores de los parámetros que no se muestrean
+
+    Returns:
+        list: Configuraciones (dict)
+    """
+    return _escalar(muestreo_lhs(n, len(parametros), semilla), parametros, base)
+
+
+def _direcciones(dimensiones):
+    """Números de dirección (dimensiones, BITS_SOBOL) de la secuencia de Sobol"""
+    if dimensiones > len(DIRECCIONES_SOBOL) + 1:
+        raise ValueError(f"La secuencia de Sobol admite como máximo {len(DIRECCIONES_SOBOL) + 1} dimensiones")
+    v = np.zeros((dimensiones, BITS_SOBOL), dtype=np.int64)
+    k = np.arange(1, BITS_SOBOL + 1)
+    v[0] = 1 << (BITS_SOBOL - k)
+    for d, (s, a, m) in enumerate(DIRECCIONES_SOBOL[:dimensiones - 1], start=1):
+        for i in range(BITS_SOBOL):
+            if i < s:
+                v[d, i] = m[i] << (BITS_SOBOL - 1 - i)
+            else:
+                valor = v[d, i - s] ^ (v[d, i - s] >> s)
+                for j in range(1, s):
+                    if (a >> (s - 1 - j)) & 1:
+                        valor ^= v[d, i - j]
+                v[d, i] = valor
+    return v
+
+
+def secuencia_sobol(n, dimensiones, saltar=0, semilla=None):
+    """
+    Puntos de la secuencia de Sobol en [0, 1)^d (orden de código Gray).
+
+    Args:
+        n (int): Número de puntos (potencia de 2 para el mejor balance)
+        dimensiones (int): Número de parámetros
+        saltar (int): Puntos iniciales que se descartan (el primero es el origen)
+        semilla (int): Si se da, se aplica un desplazamiento digital aleatorio
+            (XOR con un entero por dimensión), que conserva la estructura de la secuencia
+
+    Returns:
+        np.ndarray: Puntos de forma (n, dimensiones)
+    """
+    v = _direcciones(dimensiones)
+    total = saltar + n
+    # Índice (desde 0) del bit que cambia al pasar del punto i-1 al i: el menor bit nulo de i-1
+    anteriores = np.arange(total - 1, dtype=np.int64)
+    bit = np.zeros(total - 1, dtype=np.int64) if total > 1 else np.zeros(0, dtype=np.int64)
+    resto = ~anteriores
+    while np.any((resto & 1) == 0):
+        avanza = (resto & 1) == 0
+        bit[avanza] += 1
+        resto[avanza] >>= 1
+    enteros = np.zeros((total, dimensiones), dtype=np.int64)
+    if total > 1:
+        enteros[1:] = np.bitwise_xor.accumulate(v[:, bit].T, axis=0)
+    if semilla is not None:
+        enteros ^= np.random.default_rng(semilla).integers(0, 1 << BITS_SOBOL, dimensiones)
+    return enteros[saltar:] / float(1 << BITS_SOBOL)
+
+
+def diseno_sobol(parametros, n, saltar=1, semilla=None, base=None):
+    """
+    Diseño con la secuencia de Sobol en los rangos de los parámetros.
+
+    Args:
+        parametros (dict): Parámetro -> valores o (mínimo, máximo)
+        n (int): Número de configuraciones
+        saltar (int): Puntos iniciales descartados (por defecto el origen,
+            que es la esquina inferior de todos los rangos)
+        semilla (int): Semilla del desplazamiento digital (None = secuencia sin aleatorizar)
+        base (dict): Valores de los parámetros que no se muestrean
+
+    Returns:
+        list: Configuraciones (dict)
+    """
+    return _escalar(secuencia_sobol(n, len(parametros), saltar, semilla), parametros, base)
+
+
+def _canonico(valor):
+    """Valor comparable: números con CIFRAS_CANONICAS cifras significativas (1.0 == 1 == np.float64(1))"""
+    if isinstance(valor, (bool, str)) or valor is None:
+        return valor
+    if isinstance(valor, (list, tuple, np.ndarray)):
+        return tuple(_canonico(v) for v in np.asarray(valor).ravel().tolist())
+    valor = float(valor)
+    return 0.0 if valor == 0 else float(f'{valor:.{CIFRAS_CANONICAS}g}')
+
+
+def clave_escenario(config, campos=None):
+    """
+    Clave canónica de una configuración.
+
+    Args:
+        config (dict): Configuración
+        campos (tuple): Campos que determinan el resultado (None = todos)
+
+    Returns:
+        tuple: Pares (campo, valor canónico) ordenados por campo
+    """
+    campos = sorted(config) if campos is None else sorted(campos)
+    return tuple((c, _canonico(config[c])) for c in campos)
+
+
+class PlanEscenarios:
+    """
+    Configuraciones únicas de un conjunto de escenarios.
+
+    Dos escenarios cuyos `campos` coinciden (tras canonizar los valores) se
+    evalúan una sola vez; `expandir` devuelve el resultado a cada escenario
+    que lo pidió, en el orden original.
+    """
+
+    def __init__(self, configs, campos=None):
+        self.campos = campos
+        self.unicos = []  # Configuraciones a evaluar (solo con `campos`, si se dan)
+        indices, posiciones = [], {}
+        for config in configs:
+            clave = clave_escenario(config, campos)
+            if clave not in posiciones:
+                posiciones[clave] = len(self.unicos)
+                self.unicos.append(dict(config) if campos is None else {c: config[c] for c in campos})
+            indices.append(posiciones[clave])
+        self.indices = np.array(indices, dtype=int)
+
+    def __len__(self):
+        return len(self.indices)
+
+    @property
+    def redundantes(self):
+        """Escenarios que no necesitan evaluación propia"""
+        return len(self.indices) - len(self.unicos)
+
+    def expandir(self, resultados):
+        """
+        Resultado de cada escenario a partir de los de las configuraciones únicas.
+
+        Args:
+            resultados (list o np.ndarray): Un resultado por elemento de `unicos`
+
+        Returns:
+            list o np.ndarray: Un resultado por escenario (array si la entrada es array)
+        """
+        if len(resultados) != len(self.unicos):
+            raise ValueError(f"Se esperaban {len(self.unicos)} resultados y llegaron {len(resultados)}")
+        if isinstance(resultados, np.ndarray):
+            return resultados[self.indices]
+        return [resultados[i] for i in self.indices]
+
+    def resumen(self):
+        """Texto con el número de escenarios y evaluaciones ahorradas"""
+        return (f"{len(self)} escenarios, {len(self.unicos)} evaluaciones únicas "
+                f"({self.redundantes} redundantes eliminadas)")
+
+
+def evaluar_escenarios(configs, funcion, campos=None):
+    """
+    Evalúa una función una vez por configuración única y reparte los resultados.
+
+    Args:
+        configs (list): Configuraciones (dict)
+        funcion (callable): Recibe la lista de configuraciones únicas y devuelve
+            un resultado por cada una (permite evaluarlas vectorizadas o en paralelo)
+        campos (tuple): Campos que determinan el resultado (None = todos)
+
+    Returns:
+        tuple: (resultado por configuración, PlanEscenarios)
+    """
+    plan = PlanEscenarios(configs, campos)
+    return plan.expandir(funcion(plan.unicos)), plan
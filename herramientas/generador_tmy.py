@@ -0,0 +1,343 @@
+import argparse
+import json
+import os
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from herramientas.archivo_clima import leer_archivo, listar_particiones, metadatos_sitio
+from herramientas.control_calidad import VARIABLES
+from herramientas.ingesta import mapa_paralelo
+
+# Estadísticos diarios y pesos del método Sandia (TMY2/TMY3 de NREL):
+# (nombre, variable canónica, agregación diaria, peso)
+ESTADISTICOS_SANDIA = [
+    ('Tdry_max', 'Tdry', 'max', 1 / 20),
+    ('Tdry_min', 'Tdry', 'min', 1 / 20),
+    ('Tdry_media', 'Tdry', 'mean', 2 / 20),
+    ('Tdew_max', 'Tdew', 'max', 1 / 20),
+    ('Tdew_min', 'Tdew', 'min', 1 / 20),
+    ('Tdew_media', 'Tdew', 'mean', 2 / 20),
+    ('Wspd_max', 'Wspd', 'max', 1 / 20),
+    ('Wspd_media', 'Wspd', 'mean', 1 / 20),
+    ('GHI_total', 'GHI', 'sum', 5 / 20),
+    ('DNI_total', 'DNI', 'sum', 5 / 20)
+]
+
+# Variables que se suavizan en las uniones entre meses de años distintos
+# (la irradiancia no: de noche es 0 y de día cambia con las nubes)
+VARIABLES_SUAVIZADAS = ['Tdry', 'Tdew', 'RH', 'Pres', 'Wspd']
+
+DIAS_POR_MES = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+def estadisticos_diarios(df, estadisticos=ESTADISTICOS_SANDIA):
+    """
+    Calcula los estadísticos diarios de los días completos de una serie multianual.
+
+    Se descartan el 29 de febrero (convención TMY) y los días con datos
+    faltantes en alguna de las variables usadas.
+
+    Args:
+        df (pd.DataFrame): Serie con columnas Year, Month, Day y las variables meteorológicas
+        estadisticos (list): Tabla (nombre, variable, agregación, peso)
+
+    Returns:
+        tuple: (array de años por día, array de meses por día, matriz (días, estadísticos),
+            lista de estadísticos usados, es decir, los de variables presentes)
+    """
+    columna_de = {}
+    for columna in df.columns:
+        columna_de.setdefault(VARIABLES.get(columna), columna)
+    usados = [e for e in estadisticos if e[1] in columna_de]
+    if not usados:
+        raise ValueError("La serie no contiene ninguna variable de los estadísticos del método")
+
+    df = df[~((df['Month'] == 2) & (df['Day'] == 29))]
+    variables = sorted({e[1] for e in usados})
+    datos = df[['Year', 'Month', 'Day']].copy()
+    for variable in variables:
+        datos[variable] = pd.to_numeric(df[columna_de[variable]], errors='coerce')
+
+    grupos = datos.groupby(['Year', 'Month', 'Day'], sort=True)
+    completos = grupos[variables].count().min(axis=1) == grupos.size()
+    tabla = pd.concat({nombre: grupos[variable].agg(agregacion)
+                       for nombre, variable, agregacion, _ in usados}, axis=1)
+    tabla = tabla[completos.to_numpy()]
+
+    anios = tabla.index.get_level_values('Year').to_numpy(dtype=np.int64)
+    meses = tabla.index.get_level_values('Month').to_numpy(dtype=np.int64)
+    return anios, meses, tabla.to_numpy(dtype=np.float64), usados
+
+
+def estadistico_fs(anios, meses, valores):
+    """
+    Estadístico de Finkelstein-Schafer de cada año-mes candidato y cada estadístico diario.
+
+    FS = media sobre los días del mes candidato de |F_candidato(x) - F_largo_plazo(x)|,
+    donde F_largo_plazo es la distribución acumulada de todos los días de ese
+    mes calendario en todos los años. Todas las distribuciones (por mes, año y
+    estadístico) se evalúan de una vez: cada grupo se desplaza a un intervalo
+    propio de la recta real, de modo que un solo ordenamiento y un solo
+    `searchsorted` sirven para todos los grupos.
+
+    Args:
+        anios, meses (array): Año y mes de cada día, forma (días,)
+        valores (array): Estadísticos diarios, forma (días, k)
+
+    Returns:
+        tuple: (array de pares (año, mes) candidatos, matriz FS de forma (candidatos, k))
+    """
+    n_dias, k = valores.shape
+    columna = np.broadcast_to(np.arange(k), (n_dias, k))
+
+    # Cada estadístico normalizado a [0, 1] para poder apilar grupos en intervalos [2g, 2g + 1]
+    minimo = valores.min(axis=0)
+    rango = valores.max(axis=0) - minimo
+    z = (valores - minimo) / np.where(rango > 0, rango, 1.0)
+
+    # Largo plazo: un grupo por (mes, estadístico)
+    grupo_lp = (meses[:, None] - 1) * k + columna
+    clave = z + 2.0 * grupo_lp
+    ordenada_lp = np.sort(clave, axis=None)
+    n_lp = np.bincount(grupo_lp.ravel(), minlength=12 * k)
+    inicio_lp = np.concatenate(([0], np.cumsum(n_lp)[:-1]))
+    f_lp = (np.searchsorted(ordenada_lp, clave.ravel(), side='right') - inicio_lp[grupo_lp.ravel()]) / n_lp[grupo_lp.ravel()]
+
+    # Candidatos: un grupo por (año, mes, estadístico); la CDF empírica del
+    # i-ésimo valor ordenado del grupo es i / n
+    pares, candidato = np.unique(np.column_stack([anios, meses]), axis=0, return_inverse=True)
+    candidato = candidato.ravel()
+    grupo_c = (candidato[:, None] * k + columna).ravel()
+    orden = np.lexsort((clave.ravel(), grupo_c))
+    n_c = np.bincount(grupo_c, minlength=len(pares) * k)
+    inicio_c = np.concatenate(([0], np.cumsum(n_c)[:-1]))
+    rango_en_grupo = np.empty(len(orden), dtype=np.int64)
+    rango_en_grupo[orden] = np.arange(len(orden)) - inicio_c[grupo_c[orden]] + 1
+    f_c = rango_en_grupo / n_c[grupo_c]
+
+    fs = np.bincount(grupo_c, weights=np.abs(f_c - f_lp), minlength=len(pares) * k) / n_c
+    return pares, fs.reshape(len(pares), k)
+
+
+def seleccionar_meses(anios, meses, valores, usados, n_candidatos=5):
+    """
+    Elige el año representativo de cada mes calendario.
+
+    Se ordenan los años-mes por la suma ponderada de los FS y, entre los
+    `n_candidatos` mejores, se elige el de media y mediana de irradiación
+    diaria (GHI) más cercanas al largo plazo, como en el método Sandia. Solo
+    se consideran meses con todos sus días completos.
+
+    Args:
+        anios, meses (array): Año y mes de cada día
+        valores (array): Estadísticos diarios (días, k)
+        usados (list): Estadísticos presentes, en el orden de las columnas de `valores`
+        n_candidatos (int): Candidatos que pasan a la segunda etapa
+
+    Returns:
+        list: Un dict por mes con 'mes', 'anio', 'ws' y la lista de candidatos
+    """
+    pares, fs = estadistico_fs(anios, meses, valores)
+    pesos = np.array([e[3] for e in usados])
+    ws = fs @ (pesos / pesos.sum())
+
+    # Meses completos: tantos días válidos como días tiene el mes
+    candidato = np.unique(np.column_stack([anios, meses]), axis=0, return_inverse=True)[1].ravel()
+    dias_validos = np.bincount(candidato, minlength=len(pares))
+    completos = dias_validos == DIAS_POR_MES[pares[:, 1] - 1]
+
+    nombres = [e[0] for e in usados]
+    irradiacion = valores[:, nombres.index('GHI_total')] if 'GHI_total' in nombres else None
+    seleccion = []
+    for mes in range(1, 13):
+        indices = np.flatnonzero((pares[:, 1] == mes) & completos)
+        if len(indices) == 0:
+            raise ValueError(f"No hay ningún año con el mes {mes} completo")
+        mejores = indices[np.argsort(ws[indices], kind='stable')[:n_candidatos]]
+        elegido = mejores[0]
+        if irradiacion is not None and len(mejores) > 1:
+            del_mes = meses == mes
+            media_lp = irradiacion[del_mes].mean()
+            mediana_lp = np.median(irradiacion[del_mes])
+            desvios = []
+            for i in mejores:
+                dias = irradiacion[candidato == i]
+                desvios.append(abs(dias.mean() - media_lp) + abs(np.median(dias) - mediana_lp))
+            elegido = mejores[int(np.argmin(desvios))]
+        seleccion.append({
+            'mes': mes,
+            'anio': int(pares[elegido, 0]),
+            'ws': float(ws[elegido]),
+            'candidatos': [{'anio': int(pares[i, 0]), 'ws': float(ws[i])} for i in mejores]
+        })
+    return seleccion
+
+
+def suavizar_uniones(df, inicios_mes, horas=6, variables=VARIABLES_SUAVIZADAS):
+    """
+    Suaviza linealmente las variables continuas en las uniones entre meses.
+
+    En cada unión se reemplazan las `horas` filas a cada lado por una recta
+    entre los valores justo fuera de la ventana (criterio de NREL para TMY3).
+
+    Args:
+        df (pd.DataFrame): TMY ensamblado
+        inicios_mes (list): Índice de la primera fila de cada mes tras una unión
+        horas (int): Filas suavizadas a cada lado
+        variables (list): Variables canónicas a suavizar
+
+    Returns:
+        pd.DataFrame: Copia suavizada
+    """
+    df = df.copy()
+    columnas = [c for c in df.columns if VARIABLES.get(c) in variables]
+    n = len(df)
+    for columna in columnas:
+        valores = df[columna].to_numpy(dtype=np.float64).copy()
+        for inicio in inicios_mes:
+            a, b = inicio - horas - 1, inicio + horas
+            if a < 0 or b >= n:
+                continue
+            valores[a:b + 1] = np.linspace(valores[a], valores[b], b - a + 1)
+        df[columna] = valores
+    return df
+
+
+def generar_tmy(df, anio_objetivo=None, n_candidatos=5, horas_suavizado=6):
+    """
+    Construye un año meteorológico típico a partir de una serie multianual.
+
+    Args:
+        df (pd.DataFrame): Serie horaria multianual (columnas Year, Month, Day, Hour, Minute, ...)
+        anio_objetivo (int): Año con que se etiqueta el TMY (None = conserva el año de origen de cada mes)
+        n_candidatos (int): Candidatos por mes para la segunda etapa de selección
+        horas_suavizado (int): Horas suavizadas a cada lado de las uniones (0 = sin suavizado)
+
+    Returns:
+        tuple: (DataFrame del TMY de 8760 filas en datos horarios, lista de la selección por mes)
+    """
+    anios, meses, valores, usados = estadisticos_diarios(df)
+    seleccion = seleccionar_meses(anios, meses, valores, usados, n_candidatos)
+
+    df = df[~((df['Month'] == 2) & (df['Day'] == 29))]
+    partes = [df[(df['Year'] == s['anio']) & (df['Month'] == s['mes'])].sort_values(['Day', 'Hour', 'Minute'])
+              for s in seleccion]
+    tmy = pd.concat(partes, ignore_index=True)
+
+    if horas_suavizado > 0:
+        limites = np.cumsum([len(p) for p in partes])[:-1]
+        cambia = [i for i, s in enumerate(seleccion[1:]) if s['anio'] != seleccion[i]['anio']]
+        tmy = suavizar_uniones(tmy, [int(limites[i]) for i in cambia], horas_suavizado)
+    if anio_objetivo is not None:
+        tmy['Year'] = anio_objetivo
+    return tmy, seleccion
+
+
+def escribir_tmy(df, ruta_salida, sitio, metadatos=None):
+    """
+    Escribe un TMY en el formato de los *_tmy_corregido.csv (encabezado NSRDB de dos líneas).
+
+    Si los metadatos traen los campos del encabezado NSRDB original se
+    conservan; si no, se escribe un encabezado mínimo con la ubicación.
+
+    Args:
+        df (pd.DataFrame): Datos del TMY
+        ruta_salida (str): Archivo de salida
+        sitio (str): Nombre del sitio
+        metadatos (dict): lat, lon, tz, elev y opcionalmente 'campos' del encabezado
+    """
+    metadatos = metadatos or {}
+    campos = dict(metadatos.get('campos') or {})
+    if campos.get('Source') is None:
+        campos = {
+            'Source': 'TMY-FS',
+            'Location ID': sitio,
+            'City': sitio,
+            'State': '-',
+            'Country': '-',
+            'Latitude': metadatos.get('lat', ''),
+            'Longitude': metadatos.get('lon', ''),
+            'Time Zone': metadatos.get('tz', ''),
+            'Elevation': metadatos.get('elev', '')
+        }
+    with open(ruta_salida, 'w', newline='') as f:
+        f.write(','.join(str(c) for c in campos.keys()) + '\n')
+        f.write(','.join('' if v is None else str(v) for v in campos.values()) + '\n')
+        df.to_csv(f, index=False)
+
+
+def generar_tmy_sitio(sitio, raiz, dir_salida, anio_desde=None, anio_hasta=None, anio_objetivo=None,
+                      n_candidatos=5):
+    """
+    Genera el TMY de un sitio del archivo multianual y lo guarda junto con la selección.
+
+    Escribe <sitio>_tmy_corregido.csv y <sitio>_tmy_seleccion.json en `dir_salida`.
+
+    Returns:
+        dict: Resumen (sitio, años disponibles, archivo, estado y error si lo hubo)
+    """
+    resultado = {'sitio': sitio, 'estado': 'ok', 'error': ''}
+    try:
+        df = leer_archivo(raiz, sitio, anio_desde, anio_hasta).drop(columns='sitio')
+        resultado['anios'] = int(df['Year'].nunique())
+        tmy, seleccion = generar_tmy(df, anio_objetivo, n_candidatos)
+        salida = os.path.join(dir_salida, f'{sitio}_tmy_corregido.csv')
+        escribir_tmy(tmy, salida, sitio, metadatos_sitio(raiz, sitio))
+        with open(salida.replace('_corregido.csv', '_seleccion.json'), 'w') as f:
+            json.dump(seleccion, f, indent=2)
+        resultado['archivo'] = salida
+        resultado['meses'] = ' '.join(f"{s['mes']}:{s['anio']}" for s in seleccion)
+    except Exception as e:
+        resultado['estado'] = 'error'
+        resultado['error'] = f'{type(e).__name__}: {e}'
+    return resultado
+
+
+def generar_tmy_sitios(raiz, dir_salida, sitios=None, n_procesos=None, **opciones):
+    """
+    Genera en paralelo el TMY de todos los sitios (o los indicados) del archivo multianual.
+
+    Args:
+        raiz (str): Directorio raíz del archivo particionado
+        dir_salida (str): Directorio de salida
+        sitios (list): Sitios a procesar (None = todos)
+        n_procesos (int): Procesos del pool (None = todos los núcleos)
+        **opciones: Argumentos de `generar_tmy_sitio`
+
+    Returns:
+        pd.DataFrame: Una fila por sitio (también guardada como indice_tmy.csv)
+    """
+    if sitios is None:
+        sitios = sorted({sitio for sitio, _, _ in listar_particiones(raiz)})
+    os.makedirs(dir_salida, exist_ok=True)
+    tarea = partial(generar_tmy_sitio, raiz=raiz, dir_salida=dir_salida, **opciones)
+    indice = pd.DataFrame(mapa_paralelo(tarea, sitios, n_procesos))
+    indice.to_csv(os.path.join(dir_salida, 'indice_tmy.csv'), index=False)
+    return indice
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Genera TMY (Finkelstein-Schafer, pesos Sandia) desde el archivo multianual',
+        epilog='Uso: python -m herramientas.generador_tmy <archivo> <salida> [opciones]')
+    parser.add_argument('archivo', help='Directorio raíz del archivo particionado por sitio y año')
+    parser.add_argument('salida', help='Directorio de salida')
+    parser.add_argument('--sitios', nargs='*', default=None, help='Sitios a procesar (por defecto, todos)')
+    parser.add_argument('--desde', type=int, default=None, help='Primer año candidato')
+    parser.add_argument('--hasta', type=int, default=None, help='Último año candidato')
+    parser.add_argument('--anio', type=int, default=2022, help='Año con que se etiqueta el TMY')
+    parser.add_argument('--candidatos', type=int, default=5, help='Candidatos por mes en la segunda etapa')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos (por defecto, todos los núcleos)')
+    args = parser.parse_args()
+
+    indice = generar_tmy_sitios(args.archivo, args.salida, args.sitios, args.procesos,
+                                anio_desde=args.desde, anio_hasta=args.hasta,
+                                anio_objetivo=args.anio, n_candidatos=args.candidatos)
+    print(f"TMY generados: {(indice['estado'] == 'ok').sum()} de {len(indice)}")
+    print(f"Índice guardado en: {os.path.join(args.salida, 'indice_tmy.csv')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+import argparse
+import glob
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from herramientas.archivo_clima import agregar_anios
+from herramientas.atipicos import filtrar_atipicos
+from herramientas.control_calidad import evaluar_y_guardar_qc, evaluar_y_guardar_qc_por_bloques
+from herramientas.lector_tmy import abrir_tmy_por_bloques, leer_tmy
+from herramientas.limpieza import limpiar_archivo_por_bloques, limpiar_dataframe
+from herramientas.posicion_solar import geometria_para_df
+from herramientas.relleno import anular_irradiancia_nocturna, rellenar_huecos
+
+# Extensiones de archivos meteorológicos reconocidas al recorrer un directorio
+EXTENSIONES = ('.csv', '.csv.gz', '.csv.bz2', '.zip')
+
+# Columnas del formato TMY3 que lee PySAM: columna de entrada -> nombre TMY3
+COLUMNAS_TMY3 = {
+    'Year': 'Year',
+    'Month': 'Month',
+    'Day': 'Day',
+    'Hour': 'Hour',
+    'Minute': 'Minute',
+    'GHI': 'GHI',
+    'DNI': 'DNI',
+    'DHI': 'DHI',
+    'Tdry': 'DryBulb',
+    'Tdew': 'DewPoint',
+    'RH': 'RelativeHumidity',
+    'Pres': 'Pressure',
+    'Wspd': 'WindSpeed',
+    'Wdir': 'WindDirection'
+}
+
+
+def listar_archivos(entrada):
+    """
+    Lista los archivos a procesar a partir de un directorio, un patrón glob o un archivo.
+
+    Args:
+        entrada (str): Directorio, patrón (p. ej. 'datos/*_tmy.csv') o archivo
+
+    Returns:
+        list: Rutas ordenadas
+    """
+    entrada = str(entrada)
+    if os.path.isdir(entrada):
+        rutas = [str(p) for p in Path(entrada).iterdir()
+                 if p.is_file() and p.name.lower().endswith(EXTENSIONES)]
+    else:
+        rutas = glob.glob(entrada)
+    return sorted(rutas)
+
+
+def nombre_base(ruta):
+    """Nombre del archivo sin extensión: 'calama_2019.csv.gz' -> 'calama_2019'"""
+    nombre = Path(ruta).name
+    for extension in sorted(EXTENSIONES, key=len, reverse=True):
+        if nombre.lower().endswith(extension):
+            return nombre[:-len(extension)]
+    return nombre
+
+
+def comprobar_nombres_unicos(rutas, nombre=nombre_base):
+    """
+    Verifica que cada archivo tenga un nombre de salida propio.
+
+    Dos archivos con el mismo nombre base (p. ej. x.csv y x.csv.gz, o el mismo
+    nombre en directorios distintos) escribirían las mismas salidas. Los
+    nombres se comparan sin distinguir mayúsculas, como en los sistemas de
+    archivos que no las distinguen.
+
+    Args:
+        rutas (list): Archivos de entrada
+        nombre (callable): Ruta -> nombre que define la salida
+
+    Raises:
+        ValueError: Si dos archivos comparten nombre de salida
+    """
+    por_nombre = {}
+    for ruta in rutas:
+        por_nombre.setdefault(nombre(ruta).casefold(), []).append(ruta)
+    repetidos = {n: grupo for n, grupo in por_nombre.items() if len(grupo) > 1}
+    if repetidos:
+        raise ValueError(f"Archivos con el mismo nombre de salida: {repetidos}")
+
+
+def nombre_sitio(ruta):
+    """Nombre del sitio a partir del archivo: 'calama_corrupted.csv.gz' -> 'calama'"""
+    return nombre_base(ruta).split('_')[0]
+
+
+def leer_sitios(ruta):
+    """
+    Lee un CSV de sitios con columnas sitio, lat, lon y opcionalmente tz y elev.
+
+    Returns:
+        dict: sitio -> (lat, lon, tz, elev)
+    """
+    df = pd.read_csv(ruta)
+    sitios = {}
+    for fila in df.itertuples(index=False):
+        tz = getattr(fila, 'tz', 0)
+        elev = getattr(fila, 'elev', 0)
+        sitios[str(fila.sitio)] = (float(fila.lat), float(fila.lon),
+                                   0.0 if pd.isna(tz) else float(tz),
+                                   0.0 if pd.isna(elev) else float(elev))
+    return sitios
+
+
+def escribir_tmy3(df, ruta_salida, sitio, lat, lon, tz=-4, elev=0):
+    """
+    Escribe un DataFrame limpio en el formato TMY3 estándar que lee PySAM.
+
+    Args:
+        df (pd.DataFrame): Datos con las columnas de `COLUMNAS_TMY3`
+        ruta_salida (str): Archivo de salida
+        sitio (str): Nombre del sitio para el encabezado
+        lat, lon (float): Coordenadas del sitio
+        tz (float): Zona horaria de las fechas
+        elev (float): Altitud en metros
+    """
+    df_tmy3 = df[list(COLUMNAS_TMY3.keys())].rename(columns=COLUMNAS_TMY3)
+    header = f"""TMY3 data for {sitio}\n{sitio}, {lat}, {lon}, {tz:g}, {elev:g}, TMY3, W/m2, C, %, m/s, deg, mm\n"""
+    with open(ruta_salida, 'w') as f:
+        f.write(header)
+        df_tmy3.to_csv(f, index=False)
+
+
+def _ubicacion(metadatos, sitio, sitios):
+    """
+    Coordenadas del encabezado o, si no las trae, de la tabla de sitios.
+
+    Returns:
+        tuple: ((lat, lon, tz, elev), (lat, lon, tz) para la posición solar o
+            None si no se conoce la ubicación)
+    """
+    lat, lon, tz, elev = metadatos.lat, metadatos.lon, metadatos.tz, metadatos.elev
+    if (lat is None or lon is None) and sitios and sitio in sitios:
+        lat, lon, tz, elev = sitios[sitio]
+    ubicacion = None if lat is None or lon is None else (lat, lon, tz or 0.0)
+    return (lat, lon, tz, elev), ubicacion
+
+
+def _registrar_qc(resultado, ruta_base, reporte):
+    """Agrega a la fila del índice la ruta del reporte de calidad y sus totales por regla"""
+    resultado['qc'] = ruta_base + '_qc.json'
+    resultado['celdas_marcadas'] = reporte['celdas_marcadas']
+    for nombre, regla in reporte['reglas'].items():
+        resultado[f'qc_{nombre}'] = regla['total']
+
+
+def procesar_archivo(ruta, dir_salida, sitios=None, anio_objetivo=None, max_hueco=3,
+                     semiventana_hampel=3, rellenar=True, formato_salida='original',
+                     tam_bloque=None, dir_archivo=None):
+    """
+    Limpia, rellena y controla la calidad de un archivo meteorológico crudo.
+
+    Etapas: control de calidad de los datos crudos (máscara y reporte JSON),
+    filtro de Hampel, límites físicos e interpolación de huecos cortos,
+    irradiancia nocturna a 0 y relleno de huecos largos. La ubicación se toma
+    del encabezado (NSRDB/TMY3) o, si no lo hay, de `sitios`. Sin ubicación se
+    omiten las etapas que necesitan la posición solar.
+
+    Las salidas se nombran con el archivo completo (<archivo>_procesado.csv),
+    no con el sitio, para que varios archivos de un mismo sitio (por ejemplo
+    descargas NSRDB de distintos años) no se sobrescriban.
+
+    Con `tam_bloque` el archivo se limpia por bloques con memoria acotada y el
+    control de calidad también se evalúa por bloques; se omiten la
+    irradiancia nocturna y el relleno, que necesitan la serie completa.
+
+    Nunca lanza excepciones: los errores quedan registrados en el resultado
+    para que un archivo defectuoso no detenga el lote.
+
+    Args:
+        ruta (str): Archivo de entrada
+        dir_salida (str): Directorio de salida
+        sitios (dict): sitio -> (lat, lon, tz, elev) para archivos sin metadatos
+        anio_objetivo (int): Año al que se ajustan las fechas (None = sin cambio)
+        max_hueco (int): Huecos de hasta este largo se interpolan linealmente
+        semiventana_hampel (int): Semiventana del filtro de Hampel (0 = sin filtro)
+        rellenar (bool): Rellenar los huecos largos
+        formato_salida (str): 'original' (conserva el encabezado) o 'tmy3' (PySAM)
+        tam_bloque (int): Filas por bloque para archivos grandes (None = en memoria)
+        dir_archivo (str): Si se indica, los datos limpios se agregan también al
+            archivo particionado por sitio y año con sus años originales
+
+    Returns:
+        dict: Fila del índice de ingesta
+    """
+    inicio = time.perf_counter()
+    sitio = nombre_sitio(ruta)
+    salida = os.path.join(dir_salida, f'{nombre_base(ruta)}_procesado.csv')
+    ruta_base = salida.replace('.csv', '')
+    resultado = {'archivo': str(ruta), 'sitio': sitio, 'estado': 'ok', 'error': '',
+                 'salida': salida, 'qc': ''}
+    try:
+        if tam_bloque:
+            with abrir_tmy_por_bloques(ruta, tam_bloque) as (metadatos, bloques):
+                _, ubicacion = _ubicacion(metadatos, sitio, sitios)
+                _registrar_qc(resultado, ruta_base,
+                              evaluar_y_guardar_qc_por_bloques(bloques, ruta_base, ubicacion=ubicacion))
+            limpiar_archivo_por_bloques(ruta, salida, tam_bloque=tam_bloque,
+                                        anio_objetivo=anio_objetivo, max_hueco=max_hueco,
+                                        semiventana_hampel=semiventana_hampel)
+            resultado.update(formato=metadatos.formato, lat=metadatos.lat, lon=metadatos.lon)
+            return resultado
+
+        datos = leer_tmy(ruta)
+        metadatos = datos.metadatos
+        df = datos.a_dataframe()
+
+        (lat, lon, tz, elev), ubicacion = _ubicacion(metadatos, sitio, sitios)
+        resultado.update(formato=metadatos.formato, lat=lat, lon=lon, tz=tz,
+                         filas=len(df), nulos_antes=int(df.isna().sum().sum()))
+
+        # Control de calidad de los datos crudos
+        _registrar_qc(resultado, ruta_base, evaluar_y_guardar_qc(df, ruta_base, ubicacion=ubicacion))
+
+        # Limpieza (se guardan los años originales para el archivo multianual)
+        anios_originales = df['Year'].copy() if 'Year' in df.columns else None
+        df, atipicos = filtrar_atipicos(df, semiventana=semiventana_hampel) if semiventana_hampel else (df, {})
+        resultado['atipicos'] = int(sum(atipicos.values()))
+        df = limpiar_dataframe(df, anio_objetivo=anio_objetivo, max_hueco=max_hueco)
+
+        # Irradiancia nocturna y relleno con la posición solar del sitio
+        if ubicacion is not None:
+            geometria = geometria_para_df(df, *ubicacion)
+            df, nocturnos = anular_irradiancia_nocturna(df, geometria['cenit'])
+            resultado['nocturnos_anulados'] = int(sum(nocturnos.values()))
+            if rellenar and df.isna().values.any():
+                df, _ = rellenar_huecos(df, *ubicacion)
+        resultado['nulos_despues'] = int(df.isna().sum().sum())
+
+        if dir_archivo and anios_originales is not None:
+            archivados = agregar_anios(dir_archivo, sitio, df.assign(Year=anios_originales), {
+                'formato': metadatos.formato, 'lat': lat, 'lon': lon, 'tz': tz, 'elev': elev,
+                'campos': metadatos.campos, 'fuente': os.path.basename(ruta)
+            })
+            resultado['anios_archivados'] = ' '.join(map(str, archivados['escritos']))
+            resultado['anios_omitidos'] = ' '.join(map(str, archivados['omitidos']))
+
+        if formato_salida == 'tmy3':
+            if ubicacion is None:
+                raise ValueError("El formato TMY3 necesita la ubicación del sitio")
+            escribir_tmy3(df, salida, sitio, lat, lon, tz or 0.0, elev or 0.0)
+        else:
+            with open(salida, 'w', newline='') as f:
+                f.writelines(metadatos.lineas_encabezado)
+                df.to_csv(f, index=False)
+    except Exception as e:
+        resultado['estado'] = 'error'
+        resultado['error'] = f'{type(e).__name__}: {e}'
+        resultado['traza'] = traceback.format_exc()
+    finally:
+        resultado['segundos'] = round(time.perf_counter() - inicio, 3)
+    return resultado
+
+
+def mapa_paralelo(funcion, tareas, n_procesos=None):
+    """
+    Aplica `funcion` a cada tarea en un pool de procesos y devuelve los resultados en orden.
+
+    Con un solo proceso (o una sola tarea) se ejecuta en el proceso actual,
+    lo que facilita depurar.
+
+    Args:
+        funcion (callable): Función de nivel de módulo (serializable con pickle)
+        tareas (list): Argumento de cada llamada
+        n_procesos (int): Procesos del pool (None = todos los núcleos)
+
+    Returns:
+        list: Resultados en el mismo orden que `tareas`
+    """
+    tareas = list(tareas)
+    n_procesos = n_procesos or os.cpu_count() or 1
+    if n_procesos == 1 or len(tareas) <= 1:
+        return [funcion(t) for t in tareas]
+    # Varias tareas por envío para repartir el costo de comunicación entre procesos
+    tam_envio = max(1, len(tareas) // (4 * n_procesos))
+    with ProcessPoolExecutor(max_workers=min(n_procesos, len(tareas))) as pool:
+        return list(pool.map(funcion, tareas, chunksize=tam_envio))
+
+
+def ingerir(entrada, dir_salida, n_procesos=None, sitios=None, **opciones):
+    """
+    Procesa en paralelo todos los archivos de un directorio o patrón y genera un índice.
+
+    Cada archivo se limpia y convierte en un proceso del pool con
+    `procesar_archivo`. Se escribe en `dir_salida`:
+        - <archivo>_procesado.csv, <archivo>_procesado_qc.npy y <archivo>_procesado_qc.json
+        - indice_ingesta.csv: una fila por archivo (estado, filas, nulos, QC, tiempos)
+        - indice_ingesta.json: totales del lote y errores con su traza
+
+    Args:
+        entrada (str): Directorio, patrón glob o archivo
+        dir_salida (str): Directorio de salida
+        n_procesos (int): Procesos del pool (None = todos los núcleos)
+        sitios (dict): sitio -> (lat, lon, tz, elev) para archivos sin metadatos
+        **opciones: Argumentos de `procesar_archivo`
+
+    Returns:
+        pd.DataFrame: Índice de ingesta
+    """
+    rutas = listar_archivos(entrada)
+    if not rutas:
+        raise FileNotFoundError(f"No se encontraron archivos en: {entrada}")
+    comprobar_nombres_unicos(rutas)
+    os.makedirs(dir_salida, exist_ok=True)
+
+    inicio = time.perf_counter()
+    tarea = partial(procesar_archivo, dir_salida=dir_salida, sitios=sitios, **opciones)
+    resultados = mapa_paralelo(tarea, rutas, n_procesos)
+    trazas = {r['archivo']: r.pop('traza') for r in resultados if 'traza' in r}
+
+    indice = pd.DataFrame(resultados)
+    indice.to_csv(os.path.join(dir_salida, 'indice_ingesta.csv'), index=False)
+
+    resumen = {
+        'entrada': str(entrada),
+        'archivos': len(rutas),
+        'correctos': int((indice['estado'] == 'ok').sum()),
+        'errores': int((indice['estado'] == 'error').sum()),
+        'segundos': round(time.perf_counter() - inicio, 3),
+        'totales_qc': {c: int(np.nansum(indice[c])) for c in indice.columns if c.startswith('qc_')},
+        'trazas': trazas
+    }
+    with open(os.path.join(dir_salida, 'indice_ingesta.json'), 'w') as f:
+        json.dump(resumen, f, indent=2, ensure_ascii=False)
+    return indice
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Ingesta en paralelo de archivos meteorológicos crudos (NSRDB/estaciones)',
+        epilog='Uso: python -m herramientas.ingesta <entrada> <salida> [opciones]')
+    parser.add_argument('entrada', help='Directorio, patrón glob o archivo')
+    parser.add_argument('salida', help='Directorio de salida')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos (por defecto, todos los núcleos)')
+    parser.add_argument('--sitios', help='CSV con columnas sitio, lat, lon, tz, elev para archivos sin metadatos')
+    parser.add_argument('--anio', type=int, default=None, help='Año al que se ajustan las fechas')
+    parser.add_argument('--max-hueco', type=int, default=3, help='Largo máximo de hueco a interpolar')
+    parser.add_argument('--hampel', type=int, default=3, help='Semiventana del filtro de Hampel (0 = sin filtro)')
+    parser.add_argument('--sin-relleno', action='store_true', help='No rellenar huecos largos')
+    parser.add_argument('--formato', choices=['original', 'tmy3'], default='original', help='Formato de salida')
+    parser.add_argument('--bloque', type=int, default=None, help='Filas por bloque para archivos grandes')
+    parser.add_argument('--archivo', default=None, help='Archivo multianual (particionado por sitio y año) donde agregar los datos')
+    args = parser.parse_args()
+
+    sitios = leer_sitios(args.sitios) if args.sitios else None
+    indice = ingerir(args.entrada, args.salida, n_procesos=args.procesos, sitios=sitios,
+                     anio_objetivo=args.anio, max_hueco=args.max_hueco,
+                     semiventana_hampel=args.hampel, rellenar=not args.sin_relleno,
+                     formato_salida=args.formato, tam_bloque=args.bloque, dir_archivo=args.archivo)
+
+    print(f"Archivos procesados: {len(indice)} ({(indice['estado'] == 'error').sum()} con error)")
+    print(f"Índice guardado en: {os.path.join(args.salida, 'indice_ingesta.csv')}")
+
+
+if __name__ == "__main__":
+    main()
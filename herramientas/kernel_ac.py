@@ -0,0 +1,181 @@
+import numpy as np
+
+from herramientas.cache_resultados import clave_simulacion
+from herramientas.pool_modelos import modelo_pv
+from herramientas.recurso import obtener_recurso
+
+# Campos de SystemDesign que solo afectan a la etapa de pérdidas DC e inversor
+CAMPOS_INVERSOR = ('dc_ac_ratio', 'inv_eff', 'losses')
+
+# Autoconsumo del inversor de PVWatts v8 como fracción de su potencia AC nominal
+# (Pso / Paco del modelo de Sandia que usa PVWatts con C0 = 0)
+PSO_RELATIVO = 0.004931
+
+# Parámetros del inversor con que se obtiene la DC base (no influyen en ella)
+_INVERSOR_BASE = {'dc_ac_ratio': 1.2, 'inv_eff': 96, 'losses': 0}
+
+# DC sin pérdidas ya simulada en este proceso: clave del diseño -> (dc en W, meses, horas por paso)
+_dc_base = {}
+
+
+def dc_sin_perdidas(ubicacion, diseno, base='PVWattsNone'):
+    """
+    Potencia DC del arreglo sin pérdidas del sistema (losses = 0), simulada una vez.
+
+    Se memoriza por contenido del recurso y por los campos de diseño que no son
+    del inversor, de modo que todos los escenarios que solo cambian
+    `dc_ac_ratio`, `inv_eff` o `losses` comparten la misma simulación.
+
+    Args:
+        ubicacion (str, dict o RecursoSolar): Ubicación (ver `obtener_recurso`)
+        diseno (dict): Campos de SystemDesign (los del inversor se ignoran)
+        base (str): Configuración por defecto de PySAM
+
+    Returns:
+        tuple: (DC por paso de tiempo en W, mes de cada paso, horas por paso)
+    """
+    recurso = obtener_recurso(ubicacion)
+    diseno_dc = {**{c: v for c, v in diseno.items() if c not in CAMPOS_INVERSOR}, **_INVERSOR_BASE}
+    clave = clave_simulacion(recurso, diseno_dc, base)
+    if clave not in _dc_base:
+        modelo = modelo_pv(recurso, diseno_dc, base)
+        modelo.execute()
+        dc = np.asarray(modelo.Outputs.dc, dtype=float)
+        dc.setflags(write=False)
+        meses = np.asarray(recurso.series['month'], dtype=int)
+        # Duración del paso según PySAM (energía anual / suma de potencias)
+        horas_paso = modelo.Outputs.annual_energy / (np.sum(modelo.Outputs.ac) / 1000)
+        _dc_base[clave] = (dc, meses, horas_paso)
+    return _dc_base[clave]
+
+
+def ac_desde_dc(dc, capacidad, dc_ac_ratio, inv_eff, losses):
+    """
+    Etapa de pérdidas DC e inversor de PVWatts v8, vectorizada sobre escenarios.
+
+    Reproduce el cálculo de PySAM: la DC se reduce por `losses`, el inversor
+    (Pdco = Paco / eficiencia nominal, Pso = PSO_RELATIVO * Paco) convierte
+    linealmente a AC y la salida se recorta en la potencia nominal AC.
+
+    Args:
+        dc (np.ndarray): DC sin pérdidas por paso de tiempo (W), forma (pasos,)
+            común a todos los escenarios o (k, pasos) con una DC por escenario
+        capacidad (float o np.ndarray): Capacidad DC (kW), común o de forma (k, 1)
+        dc_ac_ratio, inv_eff, losses (array): Parámetros de cada escenario, forma (k,)
+            (inv_eff y losses en %)
+
+    Returns:
+        tuple: (AC en W de forma (k, pasos), pérdidas por recorte en W de forma (k, pasos))
+    """
+    dc_ac_ratio, inv_eff, losses = (np.asarray(v, dtype=float).reshape(-1, 1)
+                                    for v in (dc_ac_ratio, inv_eff, losses))
+    paco = capacidad * 1000 / dc_ac_ratio
+    pdco = paco / (inv_eff / 100)
+    pso = PSO_RELATIVO * paco
+
+    dc_neta = np.atleast_2d(dc) * (1 - losses / 100)
+    ac_sin_recorte = np.where(dc_neta > pso, paco * (dc_neta - pso) / (pdco - pso), 0.0)
+    ac = np.minimum(ac_sin_recorte, paco)
+    return ac, ac_sin_recorte - ac
+
+
+def malla_inversor(dc_ac_ratio, inv_eff, losses):
+    """
+    Producto cartesiano de valores de los tres parámetros del inversor.
+
+    Returns:
+        tuple: Tres arrays planos (dc_ac_ratio, inv_eff, losses) con todas las combinaciones
+    """
+    malla = np.meshgrid(np.asarray(dc_ac_ratio, dtype=float), np.asarray(inv_eff, dtype=float),
+                        np.asarray(losses, dtype=float), indexing='ij')
+    return tuple(m.ravel() for m in malla)
+
+
+def barrer_inversor(ubicacion, diseno, dc_ac_ratio, inv_eff, losses, horaria=False,
+                    tam_bloque=256, base='PVWattsNone'):
+    """
+    Producción de muchos escenarios de inversor y pérdidas con una sola simulación.
+
+    Se simula una vez la DC sin pérdidas del diseño y la etapa AC se evalúa
+    para todos los escenarios con NumPy, en bloques de `tam_bloque` escenarios
+    para acotar la memoria.
+
+    Args:
+        ubicacion (str, dict o RecursoSolar): Ubicación (ver `obtener_recurso`)
+        diseno (dict): Campos de SystemDesign (debe incluir `system_capacity`)
+        dc_ac_ratio, inv_eff, losses (array): Parámetros por escenario; se
+            combinan por broadcasting (usar `malla_inversor` para una malla completa)
+        horaria (bool): Devolver también la energía por paso de cada escenario
+        tam_bloque (int): Escenarios evaluados a la vez
+        base (str): Configuración por defecto de PySAM
+
+    Returns:
+        dict: 'energia_anual' (k,), 'energia_mensual' (k, 12), 'perdidas_recorte'
+            (k,) en kWh, los parámetros de cada escenario y, si se pide,
+            'energia_horaria' (k, pasos) en kWh
+    """
+    dc, meses, horas_paso = dc_sin_perdidas(ubicacion, diseno, base)
+    dc_ac_ratio, inv_eff, losses = (np.ravel(v) for v in np.broadcast_arrays(
+        np.asarray(dc_ac_ratio, dtype=float), np.asarray(inv_eff, dtype=float),
+        np.asarray(losses, dtype=float)))
+    capacidad = float(diseno['system_capacity'])
+
+    indicador = np.zeros((len(meses), 12))
+    indicador[np.arange(len(meses)), meses - 1] = horas_paso / 1000  # W por paso -> kWh
+    if not horaria:
+        # Los pasos sin DC (noche) no producen AC en ningún escenario
+        activos = dc > 0
+        dc, indicador = dc[activos], indicador[activos]
+
+    n = len(dc_ac_ratio)
+    energia_mensual = np.empty((n, 12))
+    perdidas_recorte = np.empty(n)
+    energia_horaria = np.empty((n, len(dc))) if horaria else None
+    for inicio in range(0, n, tam_bloque):
+        fin = min(inicio + tam_bloque, n)
+        ac, recorte = ac_desde_dc(dc, capacidad, dc_ac_ratio[inicio:fin], inv_eff[inicio:fin],
+                                  losses[inicio:fin])
+        energia_mensual[inicio:fin] = ac @ indicador
+        perdidas_recorte[inicio:fin] = recorte.sum(axis=1) * horas_paso / 1000
+        if horaria:
+            energia_horaria[inicio:fin] = ac * horas_paso / 1000
+
+    resultados = {
+        'dc_ac_ratio': dc_ac_ratio,
+        'inv_eff': inv_eff,
+        'losses': losses,
+        'energia_anual': energia_mensual.sum(axis=1),
+        'energia_mensual': energia_mensual,
+        'perdidas_recorte': perdidas_recorte
+    }
+    if horaria:
+        resultados['energia_horaria'] = energia_horaria
+    return resultados
+
+
+def validar_con_pysam(ubicacion, diseno, dc_ac_ratio, inv_eff, losses, base='PVWattsNone'):
+    """
+    Compara el núcleo con simulaciones completas de PySAM escenario por escenario.
+
+    Args:
+        ubicacion (str, dict o RecursoSolar): Ubicación
+        diseno (dict): Campos de SystemDesign
+        dc_ac_ratio, inv_eff, losses (array): Escenarios a comprobar (pocos: cada
+            uno es una simulación completa)
+        base (str): Configuración por defecto de PySAM
+
+    Returns:
+        dict: Máximo error relativo en la energía anual y máximo error absoluto
+            en la potencia AC horaria (W)
+    """
+    barrido = barrer_inversor(ubicacion, diseno, dc_ac_ratio, inv_eff, losses, horaria=True, base=base)
+    horas_paso = dc_sin_perdidas(ubicacion, diseno, base)[2]
+    error_anual = error_horario = 0.0
+    for i in range(len(barrido['energia_anual'])):
+        modelo = modelo_pv(ubicacion, {**diseno, **{c: float(barrido[c][i]) for c in CAMPOS_INVERSOR}}, base)
+        modelo.execute()
+        ac = np.asarray(modelo.Outputs.ac)
+        error_anual = max(error_anual, abs(barrido['energia_anual'][i] / modelo.Outputs.annual_energy - 1))
+        error_horario = max(error_horario,
+                            np.abs(barrido['energia_horaria'][i] * 1000 / horas_paso - ac).max())
+    return {'error_relativo_anual': error_anual, 'error_ac_max_w': error_horario}
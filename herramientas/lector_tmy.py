@@ -0,0 +1,195 @@
+import bz2
+import contextlib
+import gzip
+import io
+import zipfile
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# Columnas de fecha que se devuelven como enteros
+COLUMNAS_FECHA = ['Year', 'Month', 'Day', 'Hour', 'Minute']
+
+
+@dataclass
+class MetadatosTMY:
+    """Metadatos de ubicación leídos del encabezado de un archivo meteorológico"""
+    formato: str                      # 'nsrdb', 'tmy3' o 'csv' (sin encabezado de metadatos)
+    nombre: str = ''
+    lat: float = None
+    lon: float = None
+    tz: float = None
+    elev: float = None
+    campos: dict = field(default_factory=dict)             # Campo del encabezado -> valor (texto)
+    lineas_encabezado: list = field(default_factory=list)  # Líneas originales, con salto de línea
+
+
+@dataclass
+class DatosTMY:
+    """Serie meteorológica leída: metadatos y un array tipado por columna"""
+    metadatos: MetadatosTMY
+    columnas: dict
+
+    def __len__(self):
+        return len(next(iter(self.columnas.values()))) if self.columnas else 0
+
+    def a_dataframe(self):
+        """Devuelve los datos como DataFrame, en el orden original de columnas"""
+        return pd.DataFrame(self.columnas)
+
+
+@contextlib.contextmanager
+def abrir_texto(ruta):
+    """
+    Abre un archivo de texto, descomprimiéndolo al vuelo si hace falta.
+
+    Se reconocen las extensiones .gz, .bz2 y .zip (se lee el primer .csv del
+    archivo zip). El contenido nunca se escribe descomprimido a disco.
+
+    Args:
+        ruta (str): Ruta del archivo
+
+    Yields:
+        file: Objeto de texto posicionado al inicio del contenido
+    """
+    ruta = str(ruta)
+    if ruta.endswith('.gz'):
+        with gzip.open(ruta, 'rt', newline='') as f:
+            yield f
+    elif ruta.endswith('.bz2'):
+        with bz2.open(ruta, 'rt', newline='') as f:
+            yield f
+    elif ruta.endswith('.zip'):
+        with zipfile.ZipFile(ruta) as zf:
+            miembros = [m for m in zf.namelist() if m.lower().endswith('.csv')] or zf.namelist()
+            if not miembros:
+                raise ValueError(f"Archivo zip vacío: {ruta}")
+            with zf.open(miembros[0]) as binario:
+                yield io.TextIOWrapper(binario, encoding='utf-8', newline='')
+    else:
+        with open(ruta, 'r', newline='') as f:
+            yield f
+
+
+def _a_float(valor):
+    try:
+        return float(str(valor).strip())
+    except ValueError:
+        return None
+
+
+def leer_encabezado(f):
+    """
+    Lee el encabezado de metadatos y los nombres de columna de un archivo abierto.
+
+    Formatos reconocidos:
+        - NSRDB: línea de nombres de campos ('Source,Location ID,...'), línea de
+          valores y luego la cabecera de columnas.
+        - TMY3 (PRUEBA_2): 'TMY3 data for <sitio>' y 'sitio, lat, lon, tz, elev, ...'.
+        - CSV simple: la primera línea ya es la cabecera de columnas.
+
+    Args:
+        f (file): Archivo de texto posicionado al inicio
+
+    Returns:
+        tuple: (MetadatosTMY, lista de nombres de columna). El archivo queda
+            posicionado al inicio de los datos.
+    """
+    linea1 = f.readline()
+    if linea1.startswith('Source'):
+        linea2 = f.readline()
+        campos = dict(zip([c.strip() for c in linea1.strip().split(',')],
+                          [v.strip() for v in linea2.strip().split(',')]))
+        metadatos = MetadatosTMY(
+            formato='nsrdb',
+            nombre=campos.get('Location ID', ''),
+            lat=_a_float(campos.get('Latitude')),
+            lon=_a_float(campos.get('Longitude')),
+            tz=_a_float(campos.get('Time Zone')),
+            elev=_a_float(campos.get('Elevation')),
+            campos=campos,
+            lineas_encabezado=[linea1, linea2]
+        )
+        cabecera = f.readline()
+    elif linea1.startswith('TMY3'):
+        linea2 = f.readline()
+        partes = [p.strip() for p in linea2.strip().split(',')]
+        metadatos = MetadatosTMY(
+            formato='tmy3',
+            nombre=partes[0],
+            lat=_a_float(partes[1]),
+            lon=_a_float(partes[2]),
+            tz=_a_float(partes[3]),
+            elev=_a_float(partes[4]),
+            lineas_encabezado=[linea1, linea2]
+        )
+        metadatos.campos = {
+            'Location': metadatos.nombre,
+            'Latitude': partes[1],
+            'Longitude': partes[2],
+            'Time Zone': partes[3],
+            'Elevation': partes[4]
+        }
+        cabecera = f.readline()
+    else:
+        metadatos = MetadatosTMY(formato='csv')
+        cabecera = linea1
+    return metadatos, [c.strip() for c in cabecera.strip().split(',')]
+
+
+def tipar_columnas(df):
+    """
+    Convierte un DataFrame leído a un dict de arrays tipados.
+
+    Las columnas de fecha se devuelven como int16 y el resto como float64;
+    los valores no numéricos quedan como NaN.
+
+    Args:
+        df (pd.DataFrame): Datos leídos
+
+    Returns:
+        dict: Nombre de columna -> array de NumPy
+    """
+    columnas = {}
+    for nombre in df.columns:
+        valores = pd.to_numeric(df[nombre], errors='coerce')
+        if nombre in COLUMNAS_FECHA and not valores.isna().any():
+            columnas[nombre] = valores.to_numpy().astype(np.int16)
+        else:
+            columnas[nombre] = valores.to_numpy(dtype=np.float64)
+    return columnas
+
+
+def leer_tmy(ruta):
+    """
+    Lee un archivo TMY/NSRDB (opcionalmente comprimido) en una sola pasada.
+
+    Args:
+        ruta (str): Ruta del archivo (.csv, .csv.gz, .bz2 o .zip)
+
+    Returns:
+        DatosTMY: Metadatos del encabezado y columnas tipadas
+    """
+    with abrir_texto(ruta) as f:
+        metadatos, nombres = leer_encabezado(f)
+        df = pd.read_csv(f, header=None, names=nombres)
+    return DatosTMY(metadatos=metadatos, columnas=tipar_columnas(df))
+
+
+@contextlib.contextmanager
+def abrir_tmy_por_bloques(ruta, tam_bloque=100_000):
+    """
+    Abre un archivo TMY/NSRDB para leerlo por bloques de tamaño fijo.
+
+    Args:
+        ruta (str): Ruta del archivo (.csv, .csv.gz, .bz2 o .zip)
+        tam_bloque (int): Número de filas por bloque
+
+    Yields:
+        tuple: (MetadatosTMY, iterador de DataFrames de hasta `tam_bloque` filas)
+    """
+    with abrir_texto(ruta) as f:
+        metadatos, nombres = leer_encabezado(f)
+        with pd.read_csv(f, header=None, names=nombres, chunksize=tam_bloque) as lector:
+            yield metadatos, lector
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+
+from herramientas.atipicos import filtrar_atipicos
+from herramientas.control_calidad import limites_rango
+from herramientas.lector_tmy import abrir_tmy_por_bloques
+
+
+def interpolar_huecos(valores, max_hueco):
+    """
+    Interpola linealmente los huecos (NaN) interiores de hasta `max_hueco` valores.
+
+    Los huecos más largos, y los que tocan el inicio o el final de la serie,
+    se dejan sin rellenar. Así el resultado de cada fila depende solo de las
+    `max_hueco + 1` filas vecinas a cada lado, lo que permite procesar por bloques.
+
+    Args:
+        valores (array): Serie con posibles NaN
+        max_hueco (int): Longitud máxima de hueco a interpolar
+
+    Returns:
+        array: Copia de la serie con los huecos cortos rellenados
+    """
+    valores = np.array(valores, dtype=np.float64)
+    nulos = np.isnan(valores)
+    if max_hueco <= 0 or not nulos.any() or nulos.all():
+        return valores
+
+    n = len(valores)
+    bordes = np.diff(np.concatenate(([0], nulos.astype(np.int8), [0])))
+    inicios = np.flatnonzero(bordes == 1)
+    fines = np.flatnonzero(bordes == -1)
+    validos = ((fines - inicios) <= max_hueco) & (inicios > 0) & (fines < n)
+    if not validos.any():
+        return valores
+
+    marcas = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(marcas, inicios[validos], 1)
+    np.add.at(marcas, fines[validos], -1)
+    rellenar = np.cumsum(marcas[:-1]) > 0
+
+    indice = np.arange(n)
+    valores[rellenar] = np.interp(indice[rellenar], indice[~nulos], valores[~nulos])
+    return valores
+
+
+def limpiar_dataframe(df, limites=None, anio_objetivo=None, max_hueco=0, semiventana_hampel=0):
+    """
+    Limpia un bloque de datos meteorológicos.
+
+    Reemplaza los valores atípicos (filtro de Hampel, si se pide), convierte a
+    numérico, aplica los límites físicos, fija el año (si se pide) e
+    interpola los huecos cortos.
+
+    Args:
+        df (pd.DataFrame): Datos a limpiar
+        limites (dict): Columna -> (mínimo, máximo). Por defecto se usan los
+            límites de rango de la tabla de reglas de control de calidad
+        anio_objetivo (int): Año al que se ajustan todas las fechas (None = sin cambio)
+        max_hueco (int): Longitud máxima de hueco a interpolar (0 = no interpolar)
+        semiventana_hampel (int): Semiventana del filtro de Hampel (0 = sin filtro)
+
+    Returns:
+        pd.DataFrame: Datos limpios
+    """
+    df = df.copy()
+    if semiventana_hampel > 0:
+        df, _ = filtrar_atipicos(df, semiventana=semiventana_hampel)
+    if limites is None:
+        limites = limites_rango(df.columns)
+    for columna, (minimo, maximo) in limites.items():
+        if columna in df.columns:
+            df[columna] = pd.to_numeric(df[columna], errors='coerce').clip(lower=minimo, upper=maximo)
+            if max_hueco > 0:
+                df[columna] = interpolar_huecos(df[columna].to_numpy(), max_hueco)
+    if anio_objetivo is not None:
+        df['Year'] = anio_objetivo
+    return df
+
+
+def procesar_por_bloques(bloques, funcion, contexto):
+    """
+    Aplica una función de ventana local a una secuencia de bloques de filas.
+
+    `funcion` recibe un DataFrame y devuelve otro de la misma longitud en el que
+    cada fila depende como mucho de las `contexto` filas vecinas a cada lado.
+    Entre bloques se conserva solo ese contexto, por lo que la memoria usada
+    es del orden de un bloque más 2·contexto filas, sin importar la longitud
+    total. El resultado es idéntico al de aplicar `funcion` a todo de una vez.
+
+    Args:
+        bloques (iterable): DataFrames consecutivos
+        funcion (callable): Transformación DataFrame -> DataFrame
+        contexto (int): Filas de contexto necesarias a cada lado
+
+    Yields:
+        pd.DataFrame: Bloques ya procesados, en orden
+    """
+    buffer = None
+    emitidas = 0  # Filas del inicio de `buffer` que ya se emitieron (solo contexto)
+    for bloque in bloques:
+        buffer = bloque if buffer is None else pd.concat([buffer, bloque])
+        listas = len(buffer) - contexto  # Filas cuyo contexto posterior ya está completo
+        if listas > emitidas:
+            yield funcion(buffer).iloc[emitidas:listas]
+            corte = max(0, listas - contexto)
+            buffer = buffer.iloc[corte:]
+            emitidas = listas - corte
+    if buffer is not None and len(buffer) > emitidas:
+        yield funcion(buffer).iloc[emitidas:]
+
+
+def limpiar_archivo_por_bloques(archivo_entrada, archivo_salida, limites=None, tam_bloque=100_000,
+                                anio_objetivo=None, max_hueco=0, semiventana_hampel=0):
+    """
+    Limpia un archivo meteorológico por bloques y escribe la salida de forma incremental.
+
+    Pensado para registros largos (multianuales o subhorarios): la memoria se
+    mantiene acotada por `tam_bloque` sin importar el largo del archivo. Se
+    conservan las líneas de metadatos del encabezado original.
+
+    Args:
+        archivo_entrada (str): Archivo de entrada (.csv, .csv.gz, .bz2 o .zip)
+        archivo_salida (str): Archivo CSV de salida
+        limites (dict): Columna -> (mínimo, máximo) (por defecto, los de la tabla de reglas QC)
+        tam_bloque (int): Filas por bloque
+        anio_objetivo (int): Año al que se ajustan todas las fechas (None = sin cambio)
+        max_hueco (int): Longitud máxima de hueco a interpolar (0 = no interpolar)
+        semiventana_hampel (int): Semiventana del filtro de Hampel (0 = sin filtro)
+
+    Returns:
+        MetadatosTMY: Metadatos leídos del encabezado
+    """
+    def limpiar(df):
+        return limpiar_dataframe(df, limites, anio_objetivo, max_hueco, semiventana_hampel)
+
+    # Contexto necesario a cada lado: ventana de Hampel más el hueco más largo a interpolar
+    contexto = semiventana_hampel + max_hueco + 1
+
+    with abrir_tmy_por_bloques(archivo_entrada, tam_bloque) as (metadatos, bloques):
+        with open(archivo_salida, 'w', newline='') as f:
+            f.writelines(metadatos.lineas_encabezado)
+            cabecera = True
+            for procesado in procesar_por_bloques(bloques, limpiar, contexto):
+                procesado.to_csv(f, index=False, header=cabecera)
+                cabecera = False
+    return metadatos
@@ -0,0 +1,261 @@
+import argparse
+import time
+from pathlib import Path
+from statistics import NormalDist
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from herramientas.kernel_ac import barrer_inversor
+from herramientas.recurso import UBICACIONES, obtener_recurso
+from herramientas.surrogado import lcoe_fcr
+
+# Distribuciones por defecto de un sistema PV: los rangos de PARAMETROS['PV']
+# del análisis de LCOE como triangulares centradas en su valor medio
+DISTRIBUCIONES_PV = {
+    'capital_cost': ('triangular', 800_000, 1_000_000, 1_200_000),  # $/MW
+    'fixed_operating_cost': ('triangular', 30_000, 50_000, 70_000),  # $/MW por año
+    'variable_operating_cost': ('triangular', 0.005, 0.01, 0.015),  # $/kWh
+    'fixed_charge_rate': ('triangular', 0.05, 0.07, 0.09),
+    'tasa_descuento': ('triangular', 0.05, 0.07, 0.09),
+    'precio_energia': ('normal', 0.09, 0.015),  # $/kWh
+    'losses': ('triangular', 10, 14, 18),  # %
+    'degradacion': ('triangular', 0.3, 0.5, 0.8),  # % por año
+    'vida_util': 25  # años
+}
+
+# Diseño del sistema simulado (las pérdidas se toman de cada sorteo)
+DISENO_PV = {'dc_ac_ratio': 1.2, 'inv_eff': 96, 'array_type': 0}
+
+# Puntos de la tabla de energía en función de las pérdidas
+PUNTOS_PERDIDAS = 41
+
+# Percentiles que se informan. La energía y el VAN van en excedencia, como en
+# la práctica de financiación (Pxx: probabilidad xx % de superar el valor, así
+# P90 es el caso conservador); el LCOE va en no excedencia (probabilidad xx %
+# de no superarlo), de modo que su P90 también es el caso conservador
+PERCENTILES = (10, 50, 90)
+EXCEDENCIA = {'energia_anual': True, 'lcoe': False, 'van': True}
+
+
+def muestrear(distribuciones, n, semilla=0):
+    """
+    Sorteos de cada parámetro según su distribución.
+
+    Cada distribución es un número (constante) o una tupla:
+    ('normal', media, desviación), ('lognormal', media, desviación) del
+    logaritmo, ('uniforme', mínimo, máximo) o ('triangular', mínimo, moda, máximo).
+
+    Args:
+        distribuciones (dict): Parámetro -> distribución
+        n (int): Número de sorteos
+        semilla (int): Semilla del generador aleatorio
+
+    Returns:
+        dict: Parámetro -> array de forma (n,)
+    """
+    rng = np.random.default_rng(semilla)
+    generadores = {
+        'normal': rng.normal,
+        'lognormal': rng.lognormal,
+        'uniforme': rng.uniform,
+        'triangular': rng.triangular
+    }
+    sorteos = {}
+    for parametro, distribucion in distribuciones.items():
+        if np.isscalar(distribucion):
+            sorteos[parametro] = np.full(n, float(distribucion))
+            continue
+        tipo, *argumentos = distribucion
+        if tipo not in generadores:
+            raise ValueError(f"Distribución desconocida para {parametro}: {tipo!r}")
+        sorteos[parametro] = generadores[tipo](*argumentos, size=n)
+    return sorteos
+
+
+def cuantiles(distribucion, unitarios):
+    """
+    Valores de una distribución en los cuantiles dados (inversa de la función de distribución).
+
+    Permite llevar a cada distribución de `muestrear` puntos de [0, 1]
+    de un diseño cuasi aleatorio (Sobol, hipercubo latino).
+
+    Args:
+        distribucion: Número o tupla con el formato de `muestrear`
+        unitarios (np.ndarray): Probabilidades en (0, 1)
+
+    Returns:
+        np.ndarray: Valores con la forma de `unitarios`
+    """
+    u = np.clip(np.asarray(unitarios, dtype=float), 1e-12, 1 - 1e-12)
+    if np.isscalar(distribucion):
+        return np.full(u.shape, float(distribucion))
+    tipo, *argumentos = distribucion
+    if tipo == 'uniforme':
+        minimo, maximo = argumentos
+        return minimo + u * (maximo - minimo)
+    if tipo == 'triangular':
+        minimo, moda, maximo = argumentos
+        corte = (moda - minimo) / (maximo - minimo)
+        return np.where(u < corte, minimo + np.sqrt(u * (maximo - minimo) * (moda - minimo)),
+                        maximo - np.sqrt((1 - u) * (maximo - minimo) * (maximo - moda)))
+    if tipo in ('normal', 'lognormal'):
+        media, desviacion = argumentos
+        valores = np.vectorize(NormalDist(media, desviacion).inv_cdf, otypes=[float])(u)
+        return np.exp(valores) if tipo == 'lognormal' else valores
+    raise ValueError(f"Distribución desconocida: {tipo!r}")
+
+
+def energia_por_perdidas(ubicacion, capacidad, perdidas, diseno=None):
+    """
+    Tabla de energía anual en función de las pérdidas del sistema.
+
+    La DC del diseño se simula una sola vez (o se toma de la caché del
+    proceso) y la etapa de pérdidas e inversor se evalúa con NumPy para una
+    malla de pérdidas que cubre los sorteos, por lo que incluye el recorte
+    del inversor exacto de PVWatts.
+
+    Args:
+        ubicacion (str, dict o RecursoSolar): Ubicación (ver `obtener_recurso`)
+        capacidad (float): Capacidad DC (kW)
+        perdidas (np.ndarray): Pérdidas sorteadas (%)
+        diseno (dict): Campos de SystemDesign sobre `DISENO_PV`
+
+    Returns:
+        tuple: (malla de pérdidas en %, energía anual en kWh de cada punto)
+    """
+    lat = obtener_recurso(ubicacion).lat
+    diseno = {
+        **DISENO_PV,
+        'system_capacity': capacidad,
+        'tilt': abs(lat),
+        'azimuth': 180 if lat > 0 else 0,
+        **(diseno or {})
+    }
+    malla = np.linspace(max(np.min(perdidas), 0.0), min(np.max(perdidas), 99.0), PUNTOS_PERDIDAS)
+    barrido = barrer_inversor(ubicacion, diseno, dc_ac_ratio=diseno['dc_ac_ratio'],
+                              inv_eff=diseno['inv_eff'], losses=malla)
+    return malla, barrido['energia_anual']
+
+
+def indicadores(energia_anual, capacidad, s):
+    """
+    LCOE y VAN de cada sorteo, vectorizados.
+
+    La energía del año t es E·(1 - degradación)^(t-1). El LCOE usa la
+    fórmula de Lcoefcr con la energía nivelada (la media descontada de la
+    energía de cada año); el VAN descuenta los flujos anuales con sumas
+    geométricas cerradas, sin recorrer los años.
+
+    Args:
+        energia_anual (np.ndarray): Energía del primer año de cada sorteo (kWh)
+        capacidad (float): Capacidad DC (kW)
+        s (dict): Sorteos de los parámetros (ver `DISTRIBUCIONES_PV`)
+
+    Returns:
+        dict: 'lcoe' ($/kWh) y 'van' ($) de cada sorteo
+    """
+    r, n = s['tasa_descuento'], s['vida_util']
+    retencion = 1 - s['degradacion'] / 100
+    descuento = 1 / (1 + r)
+    q = retencion * descuento
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Sumas de 1 / (1 + r)^t y de (1 - d)^(t-1) / (1 + r)^t para t = 1..n
+        anualidad = np.where(np.isclose(descuento, 1.0), n,
+                             descuento * (1 - descuento ** n) / (1 - descuento))
+        energia_descontada = np.where(np.isclose(q, 1.0), n * descuento, descuento * (1 - q ** n) / (1 - q))
+    energia_nivelada = energia_anual * energia_descontada / anualidad
+
+    capital = s['capital_cost'] * capacidad / 1000
+    operacion_fija = s['fixed_operating_cost'] * capacidad / 1000
+    lcoe = lcoe_fcr(energia_nivelada, capital, s['fixed_charge_rate'], operacion_fija,
+                    s['variable_operating_cost'])
+    van = (energia_anual * energia_descontada * (s['precio_energia'] - s['variable_operating_cost'])
+           - operacion_fija * anualidad - capital)
+    return {'lcoe': lcoe, 'van': van}
+
+
+def montecarlo(ubicacion, n=100_000, distribuciones=None, capacidad=1000.0, diseno=None, semilla=0):
+    """
+    Distribución del LCOE y el VAN de una ubicación por Monte Carlo.
+
+    La energía de cada sorteo se interpola en la tabla de `energia_por_perdidas`
+    (una sola simulación de PySAM por ubicación y diseño) y el resto es
+    aritmética vectorizada sobre los sorteos.
+
+    Args:
+        ubicacion (str, dict o RecursoSolar): Ubicación (ver `obtener_recurso`)
+        n (int): Número de sorteos
+        distribuciones (dict): Distribuciones sobre `DISTRIBUCIONES_PV`
+        capacidad (float): Capacidad DC (kW)
+        diseno (dict): Campos de SystemDesign sobre `DISENO_PV`
+        semilla (int): Semilla del muestreo
+
+    Returns:
+        dict: 'sorteos' (parámetros), 'energia_anual', 'lcoe' y 'van' (arrays
+            de forma (n,)) y 'percentiles': indicador -> {Pxx: valor} (ver
+            `EXCEDENCIA` para la convención de cada indicador)
+    """
+    sorteos = muestrear({**DISTRIBUCIONES_PV, **(distribuciones or {})}, n, semilla)
+    malla, energias = energia_por_perdidas(ubicacion, capacidad, sorteos['losses'], diseno)
+    energia_anual = np.interp(sorteos['losses'], malla, energias)
+    resultados = {'sorteos': sorteos, 'energia_anual': energia_anual,
+                  **indicadores(energia_anual, capacidad, sorteos)}
+    resultados['percentiles'] = {}
+    for indicador, excedencia in EXCEDENCIA.items():
+        cuantiles = [100 - p if excedencia else p for p in PERCENTILES]
+        resultados['percentiles'][indicador] = dict(zip((f'P{p}' for p in PERCENTILES),
+                                                        np.percentile(resultados[indicador], cuantiles)))
+    return resultados
+
+
+def graficar_histogramas(resultados, titulo, archivo):
+    """Histogramas del LCOE y el VAN con los percentiles marcados"""
+    fig, ejes = plt.subplots(1, 2, figsize=(12, 4.5))
+    for eje, (indicador, etiqueta, escala) in zip(ejes, (('lcoe', 'LCOE ($/kWh)', 1.0),
+                                                        ('van', 'VAN (M$)', 1e-6))):
+        eje.hist(resultados[indicador] * escala, bins=100, color='steelblue', alpha=0.8)
+        for nombre, valor in resultados['percentiles'][indicador].items():
+            eje.axvline(valor * escala, color='darkred', linestyle='--', linewidth=1)
+            eje.annotate(nombre, (valor * escala, eje.get_ylim()[1] * 0.95), ha='center', fontsize=8)
+        eje.set_xlabel(etiqueta)
+        eje.set_ylabel('Sorteos')
+        eje.grid(True, alpha=0.3)
+    fig.suptitle(titulo)
+    fig.tight_layout()
+    fig.savefig(archivo, dpi=150, bbox_inches='tight')
+    plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Distribución probabilística del LCOE y el VAN de un sistema PV por Monte Carlo",
+        epilog="Uso: python -m herramientas.montecarlo [--ubicaciones Sevilla] [--sorteos 100000] [--salida DIR]"
+    )
+    parser.add_argument('--ubicaciones', nargs='+', choices=list(UBICACIONES), default=list(UBICACIONES),
+                        help="Ubicaciones (por defecto, todas)")
+    parser.add_argument('--sorteos', type=int, default=100_000, help="Sorteos por ubicación")
+    parser.add_argument('--capacidad', type=float, default=1000.0, help="Capacidad DC en kW")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla del muestreo")
+    parser.add_argument('--salida', default='resultados_montecarlo', help="Directorio de los histogramas")
+    args = parser.parse_args()
+
+    Path(args.salida).mkdir(exist_ok=True)
+    for nombre in args.ubicaciones:
+        inicio = time.perf_counter()
+        resultados = montecarlo(UBICACIONES[nombre], args.sorteos, capacidad=args.capacidad, semilla=args.semilla)
+        segundos = time.perf_counter() - inicio
+        percentiles = resultados['percentiles']
+        print(f"\n{nombre} ({args.sorteos:,} sorteos en {segundos:.2f} s):")
+        print("  Energía (GWh, excedencia): " + ", ".join(f"{p} {v / 1e6:.3f}"
+                                                         for p, v in percentiles['energia_anual'].items()))
+        print("  VAN (M$, excedencia):      " + ", ".join(f"{p} {v / 1e6:.3f}" for p, v in percentiles['van'].items()))
+        print("  LCOE ($/kWh, no exced.):   " + ", ".join(f"{p} {v:.4f}" for p, v in percentiles['lcoe'].items()))
+        print(f"  Probabilidad de VAN negativo: {np.mean(resultados['van'] < 0):.1%}")
+        archivo = Path(args.salida) / f'montecarlo_{nombre}.png'
+        graficar_histogramas(resultados, f'Monte Carlo - PV en {nombre}', archivo)
+        print(f"  Histogramas: {archivo}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import numpy as np
+
+
+def refinar_curvas(funcion, rangos, tolerancia=2e-4, presupuesto=30, relativa=True):
+    """
+    Muestreo adaptativo de curvas de una variable por bisección de intervalos.
+
+    Cada curva parte de los extremos de su rango y el punto medio. Cada punto
+    nuevo es el centro de un intervalo ya muestreado y sirve a la vez de
+    prueba: si su valor se aparta de la interpolación lineal entre los
+    extremos del intervalo más que la tolerancia, las dos mitades se vuelven a
+    dividir. Así los tramos lineales quedan con tres puntos y las zonas curvas
+    (por ejemplo el inicio del recorte del inversor) se resuelven con más detalle.
+
+    El presupuesto es común a todas las curvas: si no alcanza para todos los
+    intervalos pendientes se refinan primero los de mayor error, sea cual sea
+    su curva. Las evaluaciones de cada ronda se piden juntas para que
+    `funcion` pueda vectorizarlas.
+
+    Args:
+        funcion (callable): Recibe una lista de pares (curva, valor) y devuelve
+            la respuesta de cada uno
+        rangos (dict): Curva -> (mínimo, máximo) de su variable
+        tolerancia (float): Error de interpolación lineal admitido
+        presupuesto (int): Evaluaciones totales como máximo (al menos 3 por curva)
+        relativa (bool): Medir el error relativo a la respuesta en vez de absoluto
+
+    Returns:
+        dict: Curva -> (valores ordenados de la variable, respuesta en cada uno)
+    """
+    evaluados = {curva: {} for curva in rangos}
+
+    def evaluar(puntos):
+        for (curva, valor), respuesta in zip(puntos, np.asarray(funcion(puntos), dtype=float)):
+            evaluados[curva][valor] = respuesta
+
+    evaluar([(curva, float(v)) for curva, (a, b) in rangos.items() for v in (a, b, (a + b) / 2)])
+    usadas = 3 * len(rangos)
+
+    # Intervalos pendientes: (error de su punto medio, curva, izquierda, derecha)
+    pendientes = [(_error(evaluados[curva], a, b, relativa), curva, a, b) for curva, (a, b) in rangos.items()]
+    while True:
+        a_dividir = sorted((p for p in pendientes if p[0] > tolerancia), key=lambda p: -p[0])
+        a_dividir = a_dividir[:max(presupuesto - usadas, 0) // 2]  # Cada división evalúa dos puntos medios
+        if not a_dividir:
+            break
+        mitades = [(curva, a, (a + b) / 2) for _, curva, a, b in a_dividir]
+        mitades += [(curva, (a + b) / 2, b) for _, curva, a, b in a_dividir]
+        evaluar([(curva, (a + b) / 2) for curva, a, b in mitades])
+        usadas += len(mitades)
+        divididos = {p[1:] for p in a_dividir}
+        pendientes = [p for p in pendientes if p[1:] not in divididos]
+        pendientes += [(_error(evaluados[curva], a, b, relativa), curva, a, b) for curva, a, b in mitades]
+
+    resultado = {}
+    for curva, puntos in evaluados.items():
+        valores = np.array(sorted(puntos))
+        resultado[curva] = (valores, np.array([puntos[v] for v in valores]))
+    return resultado
+
+
+def refinar_curva(funcion, inferior, superior, tolerancia=2e-4, presupuesto=9, relativa=True):
+    """
+    Muestreo adaptativo de una sola curva (ver `refinar_curvas`).
+
+    Args:
+        funcion (callable): Recibe un array de valores y devuelve la respuesta de cada uno
+        inferior, superior (float): Rango de la variable
+        tolerancia (float): Error de interpolación lineal admitido
+        presupuesto (int): Evaluaciones como máximo
+        relativa (bool): Medir el error relativo a la respuesta en vez de absoluto
+
+    Returns:
+        tuple: (valores ordenados de la variable, respuesta en cada uno)
+    """
+    curvas = refinar_curvas(lambda puntos: funcion(np.array([v for _, v in puntos])),
+                            {None: (inferior, superior)}, tolerancia, presupuesto, relativa)
+    return curvas[None]
+
+
+def _error(puntos, a, b, relativa):
+    """Desvío del punto medio de [a, b] respecto a la recta entre los extremos"""
+    medio = puntos[(a + b) / 2]
+    error = abs(medio - (puntos[a] + puntos[b]) / 2)
+    return error / abs(medio) if relativa and medio != 0 else error
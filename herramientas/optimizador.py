@@ -0,0 +1,323 @@
+import argparse
+import math
+
+from herramientas.cache_resultados import simular_pv
+from herramientas.ejecutor import ejecutar_barrido
+from herramientas.recurso import UBICACIONES, obtener_recurso
+from herramientas.surrogado import lcoe_fcr
+
+# Costos por defecto: los valores medios de PARAMETROS['PV'] del análisis de
+# LCOE más los términos que hacen que cada parámetro de diseño tenga un costo
+COSTOS_POR_DEFECTO = {
+    'capital_cost': 1_000_000,  # $/MW DC, sin inversor ni sobrecosto de montaje
+    'fixed_operating_cost': 50_000,  # $/MW por año
+    'variable_operating_cost': 0.01,  # $/kWh
+    'fixed_charge_rate': 0.07,
+    'costo_inversor': 80,  # $/kW AC
+    'costo_terreno': 2.0,  # $/m² de terreno (capital)
+    # Sobrecosto de la estructura por tipo de montaje ($/kW DC)
+    'sobrecosto_montaje': {0: 0, 1: 0, 2: 90, 3: 100, 4: 250},
+    'precio_energia': 0.09,  # $/kWh (para el VAN)
+    'tasa_descuento': 0.07,
+    'vida_util': 25  # años
+}
+
+# Eficiencia del módulo estándar de PVWatts: área de módulos = capacidad / (eficiencia · 1 kW/m²)
+EFICIENCIA_MODULO = 0.19
+
+# Campos fijos del diseño optimizado
+DISENO_FIJO = {'system_capacity': 1000.0, 'inv_eff': 96.0, 'losses': 14.0}
+
+# Límites por defecto de los parámetros continuos; el azimut se expresa como
+# desvío respecto al ecuador (ver `diseno_desde_variables`)
+LIMITES = {
+    'tilt': (0.0, 60.0),
+    'desvio_azimut': (-60.0, 60.0),
+    'dc_ac_ratio': (1.0, 1.6),
+    'gcr': (0.2, 0.7)
+}
+
+# Resolución de cada parámetro: las evaluaciones se redondean a ella, lo que
+# fija la tolerancia de la búsqueda y hace que puntos cercanos compartan simulación
+RESOLUCION = {'tilt': 1.0, 'desvio_azimut': 2.0, 'dc_ac_ratio': 0.01, 'gcr': 0.01}
+
+# Parámetros que influyen en la simulación de cada array_type (PVWatts ignora el
+# resto): en cubierta y con seguidor de dos ejes no hay autosombreado entre filas
+PARAMETROS_POR_TIPO = {
+    0: ('tilt', 'desvio_azimut', 'gcr', 'dc_ac_ratio'),
+    1: ('tilt', 'desvio_azimut', 'dc_ac_ratio'),
+    2: ('tilt', 'desvio_azimut', 'gcr', 'dc_ac_ratio'),
+    3: ('tilt', 'desvio_azimut', 'gcr', 'dc_ac_ratio'),
+    4: ('dc_ac_ratio',)
+}
+
+# Fracción del intervalo que queda tras cada paso de la sección dorada
+RAZON_AUREA = (math.sqrt(5) - 1) / 2
+
+
+class PresupuestoAgotado(Exception):
+    """Se alcanzó el número máximo de simulaciones de una optimización"""
+
+
+def diseno_desde_variables(variables, array_type, lat):
+    """
+    Campos de SystemDesign a partir de las variables de la búsqueda.
+
+    El azimut se busca como desvío respecto al ecuador (180 en el hemisferio
+    norte, 0 en el sur) para que los mismos límites sirvan en ambos hemisferios.
+
+    Args:
+        variables (dict): tilt, desvio_azimut, dc_ac_ratio y gcr
+        array_type (int): Tipo de montaje de PVWatts
+        lat (float): Latitud de la ubicación
+
+    Returns:
+        dict: Diseño completo para `simular_pv`
+    """
+    azimut_ecuador = 180.0 if lat > 0 else 0.0
+    return {
+        **DISENO_FIJO,
+        'array_type': array_type,
+        'tilt': variables['tilt'],
+        'azimuth': (azimut_ecuador + variables['desvio_azimut']) % 360,
+        'dc_ac_ratio': variables['dc_ac_ratio'],
+        'gcr': variables['gcr']
+    }
+
+
+def indicadores_financieros(energia_anual, diseno, costos=None):
+    """
+    LCOE y VAN de un diseño.
+
+    El capital incluye los módulos (`capital_cost` por MW DC), el inversor
+    (por kW AC, de modo que `dc_ac_ratio` tiene un costo), el sobrecosto del
+    montaje y el terreno, cuya área es la de los módulos dividida por `gcr`
+    (en cubierta, array_type 1, no se paga terreno).
+
+    Args:
+        energia_anual (float): Energía anual (kWh)
+        diseno (dict): Campos de SystemDesign
+        costos (dict): Costos sobre `COSTOS_POR_DEFECTO`
+
+    Returns:
+        dict: 'lcoe' ($/kWh), 'van' ($) y 'capital' ($)
+    """
+    c = {**COSTOS_POR_DEFECTO, **(costos or {})}
+    capacidad = diseno['system_capacity']
+    area_terreno = 0.0 if int(diseno['array_type']) == 1 else capacidad / EFICIENCIA_MODULO / diseno['gcr']
+    capital = (c['capital_cost'] * capacidad / 1000
+               + c['costo_inversor'] * capacidad / diseno['dc_ac_ratio']
+               + c['sobrecosto_montaje'][int(diseno['array_type'])] * capacidad
+               + c['costo_terreno'] * area_terreno)
+    operacion_fija = c['fixed_operating_cost'] * capacidad / 1000
+    lcoe = float(lcoe_fcr(energia_anual, capital, c['fixed_charge_rate'], operacion_fija,
+                          c['variable_operating_cost']))
+    flujo_anual = energia_anual * (c['precio_energia'] - c['variable_operating_cost']) - operacion_fija
+    r, n = c['tasa_descuento'], c['vida_util']
+    anualidad = (1 - (1 + r) ** -n) / r if r > 0 else n
+    return {'lcoe': lcoe, 'van': flujo_anual * anualidad - capital, 'capital': capital}
+
+
+class EvaluadorDiseno:
+    """
+    Evalúa diseños de una ubicación con memorización y un presupuesto de simulaciones.
+
+    Las variables se redondean a `RESOLUCION` antes de evaluar; un diseño ya
+    evaluado (o cuyos campos relevantes para su array_type coinciden con uno
+    evaluado) no consume presupuesto. Las simulaciones pasan además por la
+    caché persistente de `cache_resultados`.
+    """
+
+    def __init__(self, ubicacion, objetivo='lcoe', presupuesto=60, costos=None):
+        if objetivo not in ('lcoe', 'van'):
+            raise ValueError(f"Objetivo desconocido: {objetivo!r} (use 'lcoe' o 'van')")
+        self.ubicacion = ubicacion
+        self.lat = obtener_recurso(ubicacion).lat
+        self.objetivo = objetivo
+        self.presupuesto = presupuesto
+        self.costos = costos
+        self.simulaciones = 0
+        self.historial = []  # Un dict por diseño distinto evaluado
+        self._memoria = {}
+        self.mejor = None
+
+    def _clave(self, variables, array_type):
+        return (array_type,) + tuple(variables[p] for p in PARAMETROS_POR_TIPO[array_type])
+
+    def valor(self, variables, array_type):
+        """
+        Valor a minimizar de un diseño (LCOE, o -VAN si el objetivo es el VAN).
+
+        Raises:
+            PresupuestoAgotado: Si el diseño es nuevo y ya no quedan simulaciones
+        """
+        variables = {p: round(round(v / RESOLUCION[p]) * RESOLUCION[p], 6) for p, v in variables.items()}
+        clave = self._clave(variables, array_type)
+        if clave not in self._memoria:
+            if self.simulaciones >= self.presupuesto:
+                raise PresupuestoAgotado
+            diseno = diseno_desde_variables(variables, array_type, self.lat)
+            energia = simular_pv(self.ubicacion, diseno)['annual_energy']
+            self.simulaciones += 1
+            registro = {**variables, 'array_type': array_type, 'azimuth': diseno['azimuth'],
+                        'energia_anual': energia, **indicadores_financieros(energia, diseno, self.costos)}
+            registro['valor'] = registro['lcoe'] if self.objetivo == 'lcoe' else -registro['van']
+            self._memoria[clave] = registro
+            self.historial.append(registro)
+            if self.mejor is None or registro['valor'] < self.mejor['valor']:
+                self.mejor = registro
+        return self._memoria[clave]['valor']
+
+
+def seccion_dorada(funcion, inferior, superior, tolerancia):
+    """
+    Mínimo de una función unimodal en [inferior, superior] por sección dorada.
+
+    Args:
+        funcion (callable): Función de una variable
+        inferior, superior (float): Intervalo de búsqueda
+        tolerancia (float): Ancho final del intervalo
+
+    Returns:
+        tuple: (argumento del mínimo, valor)
+    """
+    a, b = inferior, superior
+    x1, x2 = b - RAZON_AUREA * (b - a), a + RAZON_AUREA * (b - a)
+    f1, f2 = funcion(x1), funcion(x2)
+    while b - a > tolerancia:
+        if f1 <= f2:
+            b, x2, f2 = x2, x1, f1
+            x1 = b - RAZON_AUREA * (b - a)
+            f1 = funcion(x1)
+        else:
+            a, x1, f1 = x1, x2, f2
+            x2 = a + RAZON_AUREA * (b - a)
+            f2 = funcion(x2)
+    # Los extremos del intervalo final pueden ser mejores si el mínimo está en un límite
+    candidatos = [(f1, x1), (f2, x2), (funcion(a), a), (funcion(b), b)]
+    valor, x = min(candidatos)
+    return x, valor
+
+
+def punto_inicial(lat):
+    """Diseño de las reglas actuales del repositorio: inclinación = |latitud|, mirando al ecuador"""
+    return {'tilt': min(abs(lat), LIMITES['tilt'][1]), 'desvio_azimut': 0.0, 'dc_ac_ratio': 1.2, 'gcr': 0.4}
+
+
+def busqueda_coordenadas(evaluador, array_type, inicio, limites=None, max_ciclos=3):
+    """
+    Búsqueda por coordenadas con sección dorada en cada parámetro.
+
+    Cada ciclo minimiza el objetivo en un parámetro a la vez, con los demás
+    fijos en el mejor valor encontrado. Termina cuando un ciclo no mejora más
+    que la resolución o al agotar el presupuesto del evaluador.
+
+    Args:
+        evaluador (EvaluadorDiseno): Evaluador con memoria y presupuesto
+        array_type (int): Tipo de montaje
+        inicio (dict): Valores iniciales de las variables
+        limites (dict): Parámetro -> (mínimo, máximo), sobre `LIMITES`
+        max_ciclos (int): Ciclos completos como máximo
+
+    Returns:
+        dict: Variables del mejor diseño encontrado para este array_type
+    """
+    limites = {**LIMITES, **(limites or {})}
+    actual = dict(inicio)
+    valor_actual = evaluador.valor(actual, array_type)
+    for _ in range(max_ciclos):
+        valor_ciclo = valor_actual
+        for parametro in PARAMETROS_POR_TIPO[array_type]:
+            x, valor = seccion_dorada(lambda v: evaluador.valor({**actual, parametro: v}, array_type),
+                                      *limites[parametro], tolerancia=RESOLUCION[parametro])
+            if valor < valor_actual:
+                actual[parametro], valor_actual = x, valor
+        if valor_ciclo - valor_actual <= 1e-6 * abs(valor_ciclo):
+            break
+    return actual
+
+
+def optimizar_diseno(ubicacion, objetivo='lcoe', presupuesto=60, tipos=(0, 1, 2, 3, 4), costos=None,
+                     limites=None):
+    """
+    Diseño PV de mínimo LCOE (o máximo VAN) de una ubicación con un presupuesto de simulaciones.
+
+    Se evalúa cada array_type en el diseño de las reglas actuales y luego se
+    optimizan los tipos en orden de ese valor inicial con `busqueda_coordenadas`,
+    mientras quede presupuesto. Cada simulación se memoriza por diseño.
+
+    Args:
+        ubicacion (str, dict o RecursoSolar): Ubicación (ver `obtener_recurso`)
+        objetivo (str): 'lcoe' (minimizar) o 'van' (maximizar)
+        presupuesto (int): Simulaciones de PySAM como máximo
+        tipos (tuple): array_type candidatos
+        costos (dict): Costos sobre `COSTOS_POR_DEFECTO`
+        limites (dict): Límites de los parámetros sobre `LIMITES`
+
+    Returns:
+        dict: 'mejor' (registro del mejor diseño), 'inicial' (reglas actuales
+            con array_type 0 si está entre los tipos), 'historial' y 'simulaciones'
+    """
+    evaluador = EvaluadorDiseno(ubicacion, objetivo, presupuesto, costos)
+    inicio = punto_inicial(evaluador.lat)
+    iniciales = {}
+    try:
+        for array_type in tipos:
+            iniciales[array_type] = evaluador.valor(inicio, array_type)
+        for array_type in sorted(iniciales, key=iniciales.get):
+            busqueda_coordenadas(evaluador, array_type, inicio, limites)
+    except PresupuestoAgotado:
+        pass
+    # Los primeros registros de cada tipo son los del punto inicial
+    inicial = next((r for r in evaluador.historial if r['array_type'] == 0), None)
+    return {'mejor': evaluador.mejor, 'inicial': inicial, 'historial': evaluador.historial,
+            'simulaciones': evaluador.simulaciones}
+
+
+def _optimizar(escenario):
+    """Optimización de una ubicación (se ejecuta en un trabajador)"""
+    nombre, objetivo, presupuesto, tipos = escenario
+    return optimizar_diseno(nombre, objetivo, presupuesto, tipos)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Optimiza el diseño PV (inclinación, azimut, dc_ac_ratio, gcr y montaje) de cada ubicación",
+        epilog="Uso: python -m herramientas.optimizador [--objetivo van] [--presupuesto 60] [--tipos 0 2 3]"
+    )
+    parser.add_argument('--ubicaciones', nargs='+', choices=list(UBICACIONES), default=list(UBICACIONES),
+                        help="Ubicaciones (por defecto, todas)")
+    parser.add_argument('--objetivo', choices=['lcoe', 'van'], default='lcoe', help="Objetivo de la optimización")
+    parser.add_argument('--presupuesto', type=int, default=60, help="Simulaciones de PySAM por ubicación")
+    parser.add_argument('--tipos', nargs='+', type=int, choices=sorted(PARAMETROS_POR_TIPO), default=[0, 1, 2, 3, 4],
+                        help="array_type candidatos")
+    parser.add_argument('--procesos', type=int, default=None, help="Procesos en paralelo (por defecto, todos los núcleos)")
+    args = parser.parse_args()
+
+    escenarios = [(nombre, args.objetivo, args.presupuesto, tuple(args.tipos)) for nombre in args.ubicaciones]
+    salidas = ejecutar_barrido(_optimizar, escenarios, recursos={n: UBICACIONES[n] for n in args.ubicaciones},
+                               n_procesos=args.procesos)
+    for (nombre, *_), salida in zip(escenarios, salidas):
+        print(f"\n{nombre}:")
+        if salida['estado'] == 'error':
+            print(f"  Error en la optimización: {salida['error']}")
+            continue
+        resultado = salida['resultado']
+        for etiqueta, r in (('Reglas actuales', resultado['inicial']), ('Óptimo', resultado['mejor'])):
+            if r is None:
+                continue
+            # Los parámetros que no influyen en el tipo de montaje no se muestran
+            relevantes = PARAMETROS_POR_TIPO[r['array_type']]
+            campos = [f"array_type {r['array_type']}"]
+            if 'tilt' in relevantes:
+                campos += [f"inclinación {r['tilt']:.0f}°", f"azimut {r['azimuth']:.0f}°"]
+            campos.append(f"dc_ac_ratio {r['dc_ac_ratio']:.2f}")
+            if 'gcr' in relevantes:
+                campos.append(f"gcr {r['gcr']:.2f}")
+            print(f"  {etiqueta + ':':<17} {', '.join(campos)} -> "
+                  f"LCOE {r['lcoe']:.4f} $/kWh, VAN {r['van'] / 1e6:.3f} M$")
+        print(f"  Simulaciones: {resultado['simulaciones']} de {args.presupuesto}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import PySAM.Lcoefcr as lcoe
+import PySAM.Pvwattsv8 as pv
+
+from herramientas.recurso import obtener_recurso
+
+# Modelos calientes de este proceso. Cada trabajador de un pool de procesos
+# tiene los suyos: (huella del recurso, configuración base) ->
+# (modelo, parámetros asignados, SystemDesign de la configuración base)
+_modelos_pv = {}
+_modelo_lcoe = None
+_parametros_lcoe = {}
+
+# Contadores para verificar cuánto trabajo se ahorra
+_estadisticas = {'modelos_creados': 0, 'escenarios': 0, 'asignaciones': 0}
+
+
+def _asignar_cambios(grupo, actuales, parametros):
+    """Asigna en un grupo de PySAM solo los parámetros cuyo valor cambió"""
+    cambios = 0
+    for nombre, valor in parametros.items():
+        if nombre not in actuales or actuales[nombre] != valor:
+            setattr(grupo, nombre, valor)
+            actuales[nombre] = valor
+            cambios += 1
+    _estadisticas['asignaciones'] += cambios
+    return cambios
+
+
+def modelo_pv(ubicacion, diseno, base='PVWattsNone'):
+    """
+    Devuelve un modelo Pvwattsv8 caliente de la ubicación con el diseño pedido.
+
+    El modelo y el recurso solar se crean y asignan una sola vez por proceso y
+    ubicación; en cada llamada solo se asignan los campos de SystemDesign cuyo
+    valor difiere del escenario anterior. Los campos que no se pasan vuelven al
+    valor de la configuración base, igual que en un modelo recién creado.
+
+    El modelo es compartido: sus salidas son válidas hasta la siguiente
+    llamada con la misma ubicación.
+
+    Args:
+        ubicacion (str, dict o RecursoSolar): Ubicación (ver `obtener_recurso`)
+        diseno (dict): Campos de SystemDesign -> valor
+        base (str): Configuración por defecto de PySAM
+
+    Returns:
+        Pvwattsv8: Modelo listo para `execute()`
+    """
+    recurso = obtener_recurso(ubicacion)
+    # La huella cubre las series: dos recursos del mismo sitio con datos
+    # distintos no comparten modelo
+    clave = (recurso.huella(), base)
+    if clave not in _modelos_pv:
+        modelo = pv.default(base)
+        recurso.asignar(modelo)
+        por_defecto = modelo.SystemDesign.export()
+        _modelos_pv[clave] = (modelo, dict(por_defecto), por_defecto)
+        _estadisticas['modelos_creados'] += 1
+    modelo, actuales, por_defecto = _modelos_pv[clave]
+    _asignar_cambios(modelo.SystemDesign, actuales, {**por_defecto, **diseno})
+    _estadisticas['escenarios'] += 1
+    return modelo
+
+
+def modelo_lcoe(parametros):
+    """
+    Devuelve el modelo Lcoefcr caliente del proceso con los parámetros pedidos.
+
+    Args:
+        parametros (dict): Campos de SimpleLCOE -> valor
+
+    Returns:
+        Lcoefcr: Modelo listo para `execute()`
+    """
+    global _modelo_lcoe
+    if _modelo_lcoe is None:
+        _modelo_lcoe = lcoe.new()
+        _parametros_lcoe.clear()
+        _estadisticas['modelos_creados'] += 1
+    _asignar_cambios(_modelo_lcoe.SimpleLCOE, _parametros_lcoe, parametros)
+    return _modelo_lcoe
+
+
+def calcular_lcoe_fcr(annual_energy, capital_cost, fixed_charge_rate, fixed_operating_cost,
+                      variable_operating_cost):
+    """LCOE ($/kWh) con el modelo Lcoefcr caliente del proceso"""
+    modelo = modelo_lcoe({
+        'annual_energy': annual_energy,
+        'capital_cost': capital_cost,
+        'fixed_charge_rate': fixed_charge_rate,
+        'fixed_operating_cost': fixed_operating_cost,
+        'variable_operating_cost': variable_operating_cost
+    })
+    modelo.execute()
+    return modelo.Outputs.lcoe_fcr
+
+
+def inicializar_trabajador(ubicaciones=(), base='PVWattsNone'):
+    """
+    Precalienta los modelos de un proceso trabajador (para `initializer` de un pool).
+
+    Args:
+        ubicaciones (iterable): Ubicaciones cuyos modelos se crean de antemano
+        base (str): Configuración por defecto de PySAM
+    """
+    for ubicacion in ubicaciones:
+        modelo_pv(ubicacion, {}, base)
+    modelo_lcoe({})
+
+
+def estadisticas_pool():
+    """Modelos creados, escenarios atendidos y parámetros asignados en este proceso"""
+    return dict(_estadisticas, modelos_en_pool=len(_modelos_pv))
+
+
+def vaciar_pool():
+    """Descarta los modelos calientes de este proceso"""
+    global _modelo_lcoe
+    _modelos_pv.clear()
+    _modelo_lcoe = None
+    _parametros_lcoe.clear()
+    for clave in _estadisticas:
+        _estadisticas[clave] = 0
@@ -0,0 +1,216 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Constante solar (W/m²)
+CONSTANTE_SOLAR = 1367.0
+
+# Turbidez de Linke por defecto para el cielo despejado (atmósfera rural limpia)
+TURBIDEZ_LINKE = 3.0
+
+
+def _a_fraccion_anual(instantes):
+    """Día del año y hora decimal de un array datetime64 (NaN en fechas inválidas)"""
+    instantes = np.asarray(instantes, dtype='datetime64[s]')
+    inicio_anio = instantes.astype('datetime64[Y]')
+    dia = (instantes.astype('datetime64[D]') - inicio_anio).astype(np.float64) + 1
+    hora = (instantes - instantes.astype('datetime64[D]')).astype(np.float64) / 3600
+    invalidos = np.isnat(instantes)
+    dia[invalidos] = np.nan
+    hora[invalidos] = np.nan
+    return dia, hora
+
+
+def posicion_solar(instantes, lat, lon, tz):
+    """
+    Posición del sol para cualquier número de sitios e instantes en una sola llamada.
+
+    Usa las series de Spencer (1971) para declinación, ecuación del tiempo y
+    distancia Tierra-Sol. Los instantes están en hora estándar local de cada
+    sitio (zona horaria `tz`).
+
+    Args:
+        instantes (array): Fechas datetime64, forma (n,)
+        lat, lon (float o array): Coordenadas en grados, forma () o (sitios,)
+        tz (float o array): Zona horaria en horas, forma () o (sitios,)
+
+    Returns:
+        dict: 'cenit', 'azimut' (grados, desde el norte en sentido horario),
+            'cos_cenit' y 'extraterrestre' (W/m² normal al haz), con forma
+            (n,) para un sitio o (sitios, n) para varios
+    """
+    un_sitio = np.ndim(lat) == 0
+    lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))[:, None]
+    lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))[:, None]
+    tz = np.atleast_1d(np.asarray(tz, dtype=np.float64))[:, None]
+
+    dia, hora = _a_fraccion_anual(instantes)
+    b = 2 * np.pi * (dia - 1) / 365
+    declinacion = (0.006918 - 0.399912 * np.cos(b) + 0.070257 * np.sin(b)
+                   - 0.006758 * np.cos(2 * b) + 0.000907 * np.sin(2 * b)
+                   - 0.002697 * np.cos(3 * b) + 0.00148 * np.sin(3 * b))
+    ecuacion_tiempo = 229.18 * (0.000075 + 0.001868 * np.cos(b) - 0.032077 * np.sin(b)
+                                - 0.014615 * np.cos(2 * b) - 0.040849 * np.sin(2 * b))
+    extraterrestre = CONSTANTE_SOLAR * (1.00011 + 0.034221 * np.cos(b) + 0.00128 * np.sin(b)
+                                        + 0.000719 * np.cos(2 * b) + 0.000077 * np.sin(2 * b))
+
+    hora_solar = hora + (4 * (lon - 15 * tz) + ecuacion_tiempo) / 60
+    angulo_horario = np.radians(15 * (hora_solar - 12))
+    phi = np.radians(lat)
+
+    cos_cenit = (np.sin(phi) * np.sin(declinacion)
+                 + np.cos(phi) * np.cos(declinacion) * np.cos(angulo_horario))
+    cos_cenit = np.clip(cos_cenit, -1.0, 1.0)
+    cenit = np.degrees(np.arccos(cos_cenit))
+
+    sen_cenit = np.sqrt(1 - cos_cenit**2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cos_azimut = (np.sin(declinacion) - cos_cenit * np.sin(phi)) / (sen_cenit * np.cos(phi))
+    azimut = np.degrees(np.arccos(np.clip(np.nan_to_num(cos_azimut), -1.0, 1.0)))
+    azimut = np.where(np.sin(angulo_horario) > 0, 360 - azimut, azimut)
+
+    resultado = {
+        'cenit': cenit,
+        'azimut': azimut,
+        'cos_cenit': cos_cenit,
+        'extraterrestre': np.broadcast_to(extraterrestre, cenit.shape).copy()
+    }
+    if un_sitio:
+        resultado = {k: v[0] for k, v in resultado.items()}
+    return resultado
+
+
+def cielo_despejado(cos_cenit, extraterrestre, elevacion=0.0, turbidez=TURBIDEZ_LINKE):
+    """
+    Irradiancia de cielo despejado según el modelo de Ineichen y Perez (2002).
+
+    Args:
+        cos_cenit (array): Coseno del ángulo cenital
+        extraterrestre (array): Irradiancia extraterrestre normal (W/m²)
+        elevacion (float o array): Altitud del sitio en metros (por sitio si es array)
+        turbidez (float): Turbidez de Linke
+
+    Returns:
+        dict: 'ghi', 'dni' y 'dhi' de cielo despejado (W/m²), 0 de noche
+    """
+    cos_cenit = np.asarray(cos_cenit, dtype=np.float64)
+    elevacion = np.asarray(elevacion, dtype=np.float64)
+    if elevacion.ndim == 1 and cos_cenit.ndim == 2:
+        elevacion = elevacion[:, None]
+
+    with np.errstate(invalid='ignore'):
+        dia = cos_cenit > 0
+    coseno = np.where(dia, cos_cenit, 1.0)
+    cenit = np.degrees(np.arccos(coseno))
+    # Masa de aire relativa (Kasten y Young, 1989) corregida por altitud
+    masa_aire = 1 / (coseno + 0.50572 * (96.07995 - cenit) ** -1.6364)
+    masa_aire = masa_aire * np.exp(-elevacion / 8434.5)
+
+    fh1 = np.exp(-elevacion / 8000)
+    fh2 = np.exp(-elevacion / 1250)
+    cg1 = 5.09e-5 * elevacion + 0.868
+    cg2 = 3.92e-5 * elevacion + 0.0387
+
+    ghi = (cg1 * extraterrestre * coseno
+           * np.exp(-cg2 * masa_aire * (fh1 + fh2 * (turbidez - 1)))
+           * np.exp(0.01 * masa_aire ** 1.8))
+    b = 0.664 + 0.163 / fh1
+    dni = b * extraterrestre * np.exp(-0.09 * masa_aire * (turbidez - 1))
+    dni_maximo = ghi * (1 - (0.1 - 0.2 * np.exp(-turbidez)) / (0.1 + 0.882 / fh1)) / coseno
+    dni = np.minimum(dni, dni_maximo)
+
+    ghi = np.where(dia, np.maximum(ghi, 0.0), 0.0)
+    dni = np.where(dia, np.maximum(dni, 0.0), 0.0)
+    dhi = np.maximum(ghi - dni * np.where(dia, cos_cenit, 0.0), 0.0)
+    return {'ghi': ghi, 'dni': dni, 'dhi': dhi}
+
+
+def instantes_anuales(anio, paso_minutos=60, desfase_minutos=0, sin_29_febrero=True):
+    """
+    Instantes regulares de un año completo (convención TMY: sin 29 de febrero).
+
+    Args:
+        anio (int): Año
+        paso_minutos (int): Paso temporal
+        desfase_minutos (int): Corrimiento de todo el eje temporal, con signo (p. ej.
+            30 en el NSRDB; uno negativo adelanta el primer instante al año anterior)
+        sin_29_febrero (bool): Excluir el 29 de febrero en años bisiestos
+
+    Returns:
+        array: Fechas datetime64[s]
+    """
+    inicio = np.datetime64(f'{anio:04d}-01-01T00:00', 's')
+    fin = np.datetime64(f'{anio + 1:04d}-01-01T00:00', 's')
+    instantes = np.arange(inicio, fin, np.timedelta64(paso_minutos, 'm'))
+    if sin_29_febrero:
+        # Se filtra antes del corrimiento: los pasos excluidos son los marcados el 29 de febrero
+        dias = instantes.astype('datetime64[D]')
+        febrero_29 = (dias - dias.astype('datetime64[M]')).astype(int) == 28
+        febrero_29 &= dias.astype('datetime64[M]').astype(int) % 12 == 1
+        instantes = instantes[~febrero_29]
+    return instantes + np.timedelta64(desfase_minutos, 'm')
+
+
+@lru_cache(maxsize=512)
+def geometria_anual(lat, lon, tz, anio, paso_minutos=60, desfase_minutos=0, elevacion=0.0):
+    """
+    Posición solar y cielo despejado de un año completo para un sitio, con caché.
+
+    Se calcula una sola vez por (lat, lon, tz, año, paso, desfase, elevación)
+    y los arrays devueltos son de solo lectura para poder compartirlos entre
+    control de calidad, relleno, gráficos y evaluación rápida.
+
+    Returns:
+        dict: 'instantes', 'cenit', 'azimut', 'cos_cenit', 'extraterrestre',
+            'ghi_despejado', 'dni_despejado' y 'dhi_despejado'
+    """
+    instantes = instantes_anuales(anio, paso_minutos, desfase_minutos)
+    geometria = posicion_solar(instantes, lat, lon, tz)
+    despejado = cielo_despejado(geometria['cos_cenit'], geometria['extraterrestre'], elevacion)
+    resultado = {'instantes': instantes, **geometria,
+                 **{f'{k}_despejado': v for k, v in despejado.items()}}
+    for valores in resultado.values():
+        valores.setflags(write=False)
+    return resultado
+
+
+def geometria_para_df(df, lat, lon, tz, elevacion=0.0, desfase_minutos=0):
+    """
+    Posición solar y cielo despejado para las filas de un DataFrame meteorológico.
+
+    Si el DataFrame es un año regular (un solo valor de Year, paso constante y
+    sin 29 de febrero, como los TMY) se usa la caché de `geometria_anual`; en
+    otro caso se calcula directamente para sus fechas.
+
+    Args:
+        df (pd.DataFrame): Datos con columnas Year, Month, Day, Hour, Minute
+        lat, lon (float): Coordenadas del sitio
+        tz (float): Zona horaria de las fechas
+        elevacion (float): Altitud del sitio en metros
+        desfase_minutos (int): Corrimiento entre la marca de tiempo y el instante
+            representativo del dato (p. ej. -15 alinea los TMY del NSRDB, cuyas
+            marcas HH:30 corresponden a la geometría de HH:15)
+
+    Returns:
+        dict: Mismas claves que `geometria_anual`, con un valor por fila
+    """
+    anios = df['Year'].to_numpy()
+    minutos = df['Minute'].to_numpy()
+    paso = {8760: 60, 17520: 30, 35040: 15, 105120: 5}.get(len(df))
+    if paso is not None and (anios == anios[0]).all():
+        # Los minutos deben seguir el paso desde la primera fila (0, 30, 0, 30... con paso 30)
+        esperados = (minutos[0] + paso * np.arange(len(df))) % 60
+        primera, ultima = df.iloc[0], df.iloc[-1]
+        if ((minutos == esperados).all()
+                and (primera['Month'], primera['Day'], primera['Hour']) == (1, 1, 0)
+                and (ultima['Month'], ultima['Day']) == (12, 31)):
+            return geometria_anual(float(lat), float(lon), float(tz), int(anios[0]),
+                                   paso, int(minutos[0]) + desfase_minutos, float(elevacion))
+
+    fechas = df[['Year', 'Month', 'Day', 'Hour', 'Minute']].apply(pd.to_numeric, errors='coerce')
+    instantes = pd.to_datetime(fechas, errors='coerce').to_numpy() + np.timedelta64(desfase_minutos, 'm')
+    geometria = posicion_solar(instantes, lat, lon, tz)
+    despejado = cielo_despejado(geometria['cos_cenit'], geometria['extraterrestre'], elevacion)
+    return {'instantes': instantes, **geometria,
+            **{f'{k}_despejado': v for k, v in despejado.items()}}
@@ -0,0 +1,119 @@
+import base64
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+
+import numpy as np
+
+
+def _canonico(valor):
+    """Convierte un escenario a tipos JSON estables (tuplas como listas, números de NumPy como float)"""
+    if isinstance(valor, dict):
+        return {str(k): _canonico(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple, np.ndarray)):
+        return [_canonico(v) for v in valor]
+    if isinstance(valor, (bool, str)) or valor is None:
+        return valor
+    if isinstance(valor, (int, float, np.number)):
+        return float(valor)
+    return repr(valor)
+
+
+def clave_punto_control(escenario):
+    """
+    Identidad de un escenario para los puntos de control.
+
+    Args:
+        escenario: Escenario de un barrido (tuplas, dicts, números y textos)
+
+    Returns:
+        str: Hash hexadecimal del contenido del escenario
+    """
+    contenido = json.dumps(_canonico(escenario), sort_keys=True)
+    return hashlib.sha256(contenido.encode()).hexdigest()
+
+
+class PuntosControl:
+    """
+    Registro en disco de los escenarios terminados de un barrido largo.
+
+    Es un archivo JSONL con una línea por escenario terminado: su clave
+    (`clave_punto_control`) y la salida serializada con pickle en base64. Cada
+    línea se escribe y sincroniza con el disco en cuanto el escenario termina,
+    así que una interrupción solo pierde los escenarios en curso; una última
+    línea incompleta se ignora al leer. Solo se guardan las salidas con
+    estado 'ok': los escenarios con error se vuelven a intentar al reanudar.
+
+    Un archivo con escenarios terminados no se descarta sin pedirlo: hay que
+    reanudarlo o reiniciarlo explícitamente.
+    """
+
+    def __init__(self, ruta, reanudar=False, reiniciar=False):
+        """
+        Args:
+            ruta (str o Path): Archivo JSONL de puntos de control
+            reanudar (bool): Cargar los escenarios ya terminados
+            reiniciar (bool): Descartar los escenarios ya terminados y empezar de nuevo
+
+        Raises:
+            FileExistsError: Si el archivo ya tiene escenarios terminados y no
+                se pidió reanudar ni reiniciar
+        """
+        if reanudar and reiniciar:
+            raise ValueError("No se puede reanudar y reiniciar a la vez")
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self.completados = {}  # Clave -> salida
+        if reanudar and self.ruta.exists():
+            contenido = self.ruta.read_text(encoding='utf-8')
+            for linea in contenido.splitlines():
+                try:
+                    registro = json.loads(linea)
+                    salida = pickle.loads(base64.b64decode(registro['salida']))
+                except (ValueError, KeyError, pickle.UnpicklingError, EOFError):
+                    continue  # Línea cortada por una interrupción
+                self.completados[registro['clave']] = salida
+            if contenido and not contenido.endswith('\n'):
+                # Cerrar la línea cortada para que el siguiente registro empiece en una propia
+                with open(self.ruta, 'a', encoding='utf-8') as f:
+                    f.write('\n')
+        else:
+            if not reiniciar and self.ruta.exists() and self.ruta.stat().st_size > 0:
+                with open(self.ruta, 'r', encoding='utf-8') as f:
+                    n = sum(1 for linea in f if linea.strip())
+                raise FileExistsError(f"{self.ruta} ya registra {n} escenarios terminados")
+            self.ruta.write_text('', encoding='utf-8')
+
+    def __len__(self):
+        return len(self.completados)
+
+    def __contains__(self, escenario):
+        return clave_punto_control(escenario) in self.completados
+
+    def obtener(self, escenario):
+        """Salida guardada de un escenario, o None si no terminó"""
+        return self.completados.get(clave_punto_control(escenario))
+
+    def guardar(self, escenario, salida):
+        """
+        Registra la salida de un escenario terminado.
+
+        Args:
+            escenario: Escenario evaluado
+            salida (dict): Salida de `ejecutor.ejecutar_barrido` ('estado', 'resultado', 'error')
+        """
+        if salida.get('estado') != 'ok':
+            return
+        clave = clave_punto_control(escenario)
+        registro = {'clave': clave, 'salida': base64.b64encode(pickle.dumps(salida)).decode('ascii')}
+        with open(self.ruta, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.completados[clave] = salida
+
+    def resumen(self):
+        """Texto con los escenarios recuperados del archivo"""
+        return f"{len(self)} escenarios terminados en {self.ruta}"
@@ -0,0 +1,180 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from herramientas.cache_tmy import cargar_tmy, hash_archivo
+from herramientas.control_calidad import VARIABLES
+
+# Raíz del repositorio (los TMY corregidos se buscan relativos a ella)
+RAIZ = Path(__file__).resolve().parents[1]
+DIR_TMY = RAIZ / 'tmy_corregidos'
+
+# Registro único de ubicaciones usado por los scripts de simulación
+UBICACIONES = {
+    'Sevilla': {
+        'archivo': str(DIR_TMY / 'Sevilla_tmy_corregido.csv'),
+        'lat': 37.37,
+        'lon': -5.98,
+        'elev': 14,
+        'tz': 1
+    },
+    'Iquique': {
+        'archivo': str(DIR_TMY / 'Iquique_tmy_corregido.csv'),
+        'lat': -20.22,
+        'lon': -70.15,
+        'elev': 45,
+        'tz': -4
+    },
+    'Jodhpur': {
+        'archivo': str(DIR_TMY / 'Jodhpur_tmy_corregido.csv'),
+        'lat': 26.30,
+        'lon': 73.02,
+        'elev': 224,
+        'tz': 5.5
+    }
+}
+
+# Claves de solar_resource_data de PySAM -> variable (fecha o variable canónica)
+CAMPOS_RECURSO = {
+    'year': 'Year',
+    'month': 'Month',
+    'day': 'Day',
+    'hour': 'Hour',
+    'minute': 'Minute',
+    'dn': 'DNI',
+    'df': 'DHI',
+    'gh': 'GHI',
+    'tdry': 'Tdry',
+    'wspd': 'Wspd'
+}
+
+# Recursos ya construidos en este proceso: (archivo, hash, lat, lon, tz, elev) -> RecursoSolar
+_recursos = {}
+
+
+@dataclass
+class RecursoSolar:
+    """Recurso solar de una ubicación, listo para asignarse a cualquier número de modelos PySAM"""
+    nombre: str
+    lat: float
+    lon: float
+    tz: float
+    elev: float
+    archivo: str = ''
+    series: dict = field(default_factory=dict)  # Clave de solar_resource_data -> lista
+    _huella: str = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def solar_resource_data(self):
+        """Diccionario en el formato de SolarResource.solar_resource_data"""
+        datos = {'lat': self.lat, 'lon': self.lon, 'tz': self.tz}
+        if self.elev is not None:
+            datos['elev'] = self.elev
+        return {**datos, **self.series}
+
+    def asignar(self, modelo):
+        """Asigna el recurso a un modelo PySAM (Pvwattsv8 u otro con grupo SolarResource)"""
+        modelo.SolarResource.solar_resource_data = self.solar_resource_data
+        return modelo
+
+    def huella(self):
+        """
+        Hash SHA-256 del contenido del recurso (metadatos y series), calculado una sola vez.
+
+        Dos recursos con los mismos datos tienen la misma huella aunque vengan
+        de archivos distintos, por lo que sirve como clave de resultados.
+        """
+        if self._huella is None:
+            h = hashlib.sha256()
+            metadatos = [self.lat, self.lon, self.tz, self.elev]
+            h.update(json.dumps([None if v is None else float(v) for v in metadatos]).encode())
+            for clave in sorted(self.series):
+                h.update(clave.encode())
+                h.update(np.asarray(self.series[clave], dtype=np.float64).tobytes())
+            self._huella = h.hexdigest()
+        return self._huella
+
+    def __len__(self):
+        return len(self.series.get('gh', []))
+
+
+def recurso_desde_dataframe(nombre, df, lat, lon, tz, elev=None, archivo=''):
+    """
+    Convierte las series de un DataFrame meteorológico a listas una sola vez.
+
+    Args:
+        nombre (str): Nombre de la ubicación
+        df (pd.DataFrame): Datos con fechas, irradiancia, temperatura y viento
+        lat, lon (float): Coordenadas
+        tz (float): Zona horaria
+        elev (float): Altitud en metros (None = no se pasa a PySAM)
+        archivo (str): Archivo de origen, si lo hay
+
+    Returns:
+        RecursoSolar: Recurso de la ubicación
+    """
+    columna_de = {}
+    for columna in df.columns:
+        columna_de.setdefault(VARIABLES.get(columna, columna), columna)
+    faltantes = [v for v in CAMPOS_RECURSO.values() if v not in columna_de]
+    if faltantes:
+        raise KeyError(f"Faltan columnas en {archivo or nombre}: {faltantes}")
+    series = {clave: df[columna_de[variable]].to_numpy().tolist()
+              for clave, variable in CAMPOS_RECURSO.items()}
+    return RecursoSolar(nombre=nombre, lat=lat, lon=lon, tz=tz, elev=elev,
+                        archivo=str(archivo), series=series)
+
+
+def construir_recurso(nombre, archivo, lat, lon, tz, elev):
+    """Lee un TMY corregido (desde la caché columnar) y construye su recurso solar"""
+    df, _ = cargar_tmy(archivo)
+    return recurso_desde_dataframe(nombre, df, lat, lon, tz, elev, archivo)
+
+
+def _clave_ubicacion(ubicacion):
+    """Nombre, datos y clave de memorización de una ubicación (str o dict)"""
+    if isinstance(ubicacion, str):
+        nombre, ubicacion = ubicacion, UBICACIONES[ubicacion]
+    else:
+        nombre = ubicacion.get('nombre', Path(ubicacion['archivo']).stem.split('_')[0])
+    clave = (str(ubicacion['archivo']), hash_archivo(ubicacion['archivo']),
+             ubicacion['lat'], ubicacion['lon'], ubicacion['tz'], ubicacion.get('elev'))
+    return nombre, ubicacion, clave
+
+
+def obtener_recurso(ubicacion):
+    """
+    Devuelve el recurso solar de una ubicación, construyéndolo solo la primera vez.
+
+    El recurso se memoriza por proceso según el contenido del archivo (hash)
+    y los metadatos, de modo que todas las simulaciones de una ubicación
+    comparten las mismas listas.
+
+    Args:
+        ubicacion (str, dict o RecursoSolar): Nombre de `UBICACIONES` o dict con
+            archivo, lat, lon, tz y elev (opcional)
+
+    Returns:
+        RecursoSolar: Recurso de la ubicación
+    """
+    if isinstance(ubicacion, RecursoSolar):
+        return ubicacion
+    nombre, ubicacion, clave = _clave_ubicacion(ubicacion)
+    if clave not in _recursos:
+        _recursos[clave] = construir_recurso(nombre, ubicacion['archivo'], ubicacion['lat'],
+                                             ubicacion['lon'], ubicacion['tz'], ubicacion.get('elev'))
+    return _recursos[clave]
+
+
+def registrar_recurso(ubicacion, recurso):
+    """
+    Registra un recurso ya construido para que `obtener_recurso(ubicacion)` lo devuelva.
+
+    Lo usan los procesos trabajadores que reciben el recurso por memoria
+    compartida en lugar de leerlo del archivo.
+    """
+    _recursos[_clave_ubicacion(ubicacion)[2]] = recurso
+    return recurso
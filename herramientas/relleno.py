@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+
+from herramientas.control_calidad import VARIABLES
+from herramientas.limpieza import interpolar_huecos
+from herramientas.posicion_solar import geometria_para_df
+
+# Por debajo de este coseno del cenit (sol a menos de ~4° sobre el horizonte)
+# no se despeja DNI dividiendo por cos(Z): el error se dispara
+COS_CENIT_MINIMO = 0.065
+
+
+def noche_completa(cenit):
+    """
+    Filas en que el sol está bajo el horizonte en ese instante y en los dos vecinos.
+
+    Exigir también los vecinos hace que la máscara no dependa de si la marca
+    de tiempo es el inicio, el centro o el final del intervalo promediado,
+    y deja intactos los amaneceres y atardeceres.
+
+    Args:
+        cenit (array): Ángulo cenital en grados por fila
+
+    Returns:
+        array: Máscara booleana
+    """
+    with np.errstate(invalid='ignore'):
+        bajo = np.asarray(cenit, dtype=np.float64) > 90
+    noche = bajo.copy()
+    noche[1:] &= bajo[:-1]
+    noche[:-1] &= bajo[1:]
+    return noche
+
+
+def anular_irradiancia_nocturna(df, cenit):
+    """
+    Fija en 0 la irradiancia (GHI, DNI, DHI) en las horas de noche completa.
+
+    Args:
+        df (pd.DataFrame): Datos meteorológicos
+        cenit (array): Ángulo cenital en grados por fila
+
+    Returns:
+        tuple: (DataFrame corregido, dict columna -> número de valores anulados)
+    """
+    df = df.copy()
+    noche = noche_completa(cenit)
+    conteo = {}
+    for columna in [c for c in df.columns if VARIABLES.get(c) in ('GHI', 'DNI', 'DHI')]:
+        valores = pd.to_numeric(df[columna], errors='coerce').to_numpy(dtype=np.float64)
+        anular = noche & (valores != 0) & ~np.isnan(valores)
+        df.loc[anular, columna] = 0
+        conteo[columna] = int(np.count_nonzero(anular))
+    return df, conteo
+
+
+def fraccion_difusa_erbs(kt):
+    """
+    Fracción difusa DHI/GHI según el modelo de descomposición de Erbs et al. (1982).
+
+    Args:
+        kt (array): Índice de claridad GHI / (I0·cosZ)
+
+    Returns:
+        array: Fracción difusa kd
+    """
+    kt = np.asarray(kt, dtype=np.float64)
+    polinomio = 0.9511 - 0.1604 * kt + 4.388 * kt**2 - 16.638 * kt**3 + 12.336 * kt**4
+    return np.where(kt <= 0.22, 1 - 0.09 * kt, np.where(kt <= 0.8, polinomio, 0.165))
+
+
+def rellenar_irradiancia(ghi, dni, dhi, cos_cenit, extraterrestre):
+    """
+    Reconstruye componentes de irradiancia faltantes a partir de las demás.
+
+    - De noche (cosZ <= 0) los faltantes son 0.
+    - Si falta una componente se despeja de GHI = DNI·cosZ + DHI.
+    - Si solo se conoce GHI, DHI y DNI se obtienen con el modelo de Erbs.
+    Los casos restantes (solo DNI o DHI, o las tres ausentes) quedan como NaN.
+
+    Args:
+        ghi, dni, dhi (array): Componentes con posibles NaN
+        cos_cenit (array): Coseno del ángulo cenital
+        extraterrestre (array): Irradiancia extraterrestre normal (W/m²)
+
+    Returns:
+        tuple: (ghi, dni, dhi rellenados, dict método -> número de valores rellenados)
+    """
+    ghi, dni, dhi = (np.array(x, dtype=np.float64) for x in (ghi, dni, dhi))
+    faltan_ghi, faltan_dni, faltan_dhi = np.isnan(ghi), np.isnan(dni), np.isnan(dhi)
+    n_faltan = faltan_ghi.astype(int) + faltan_dni + faltan_dhi
+    dia = cos_cenit > 0
+    sol_alto = cos_cenit > COS_CENIT_MINIMO
+    coseno = np.maximum(cos_cenit, COS_CENIT_MINIMO)
+    conteo = {}
+
+    # Noche
+    noche = ~dia & (n_faltan > 0)
+    for x, falta in ((ghi, faltan_ghi), (dni, faltan_dni), (dhi, faltan_dhi)):
+        x[~dia & falta] = 0.0
+    conteo['noche'] = int(np.count_nonzero(noche))
+
+    # Cierre: falta exactamente una componente
+    cierre = dia & (n_faltan == 1)
+    m = cierre & faltan_ghi
+    ghi[m] = dni[m] * cos_cenit[m] + dhi[m]
+    m = cierre & faltan_dhi
+    dhi[m] = np.maximum(ghi[m] - dni[m] * cos_cenit[m], 0.0)
+    m = cierre & faltan_dni
+    dni[m] = np.where(sol_alto[m], np.maximum(ghi[m] - dhi[m], 0.0) / coseno[m], 0.0)
+    conteo['cierre'] = int(np.count_nonzero(cierre))
+
+    # Descomposición: solo se conoce GHI
+    descomposicion = dia & faltan_dni & faltan_dhi & ~faltan_ghi
+    m = descomposicion
+    kt = np.clip(ghi[m] / (extraterrestre[m] * coseno[m]), 0.0, 1.0)
+    dhi[m] = fraccion_difusa_erbs(kt) * ghi[m]
+    dni[m] = np.where(sol_alto[m], (ghi[m] - dhi[m]) / coseno[m], 0.0)
+    conteo['descomposicion'] = int(np.count_nonzero(m))
+
+    return ghi, dni, dhi, conteo
+
+
+def promedio_dias_vecinos(valores, pasos_por_dia, dias_vecinos=3):
+    """
+    Valor medio a la misma hora en los días vecinos (±1..dias_vecinos), ignorando NaN.
+
+    Args:
+        valores (array): Serie con posibles NaN
+        pasos_por_dia (int): Número de registros por día
+        dias_vecinos (int): Días a cada lado considerados
+
+    Returns:
+        array: Promedio por posición (NaN si ningún vecino tiene dato)
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    n = len(valores)
+    desplazados = np.full((2 * dias_vecinos, n), np.nan)
+    for i, dias in enumerate(range(1, dias_vecinos + 1)):
+        paso = dias * pasos_por_dia
+        if paso < n:
+            desplazados[2 * i, paso:] = valores[:-paso]
+            desplazados[2 * i + 1, :-paso] = valores[paso:]
+    validos = ~np.isnan(desplazados)
+    suma = np.where(validos, desplazados, 0.0).sum(axis=0)
+    cantidad = validos.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(cantidad > 0, suma / cantidad, np.nan)
+
+
+def _pasos_por_dia(df):
+    """Registros por día a partir del paso temporal más frecuente de Hour/Minute"""
+    minutos = (df['Hour'].to_numpy(dtype=np.int64) * 60 + df['Minute'].to_numpy(dtype=np.int64))
+    diferencias = np.diff(minutos) % 1440
+    diferencias = diferencias[diferencias > 0]
+    if len(diferencias) == 0:
+        return 24
+    paso = np.bincount(diferencias).argmax()
+    return int(round(1440 / paso))
+
+
+def rellenar_huecos(df, lat, lon, tz, max_hueco_corto=3, dias_vecinos=3):
+    """
+    Rellena los valores faltantes de un año (o más) de datos meteorológicos.
+
+    1. Irradiancia: ceros nocturnos, cierre GHI = DNI·cosZ + DHI y
+       descomposición de Erbs cuando solo se conoce GHI. La posición solar
+       sale de la caché de `posicion_solar`.
+    2. Huecos cortos (hasta `max_hueco_corto` registros): interpolación lineal.
+    3. Huecos largos: promedio a la misma hora en los días vecinos.
+
+    Todas las etapas son operaciones vectorizadas sobre la serie completa.
+
+    Args:
+        df (pd.DataFrame): Datos con columnas Year, Month, Day, Hour, Minute
+        lat, lon (float): Coordenadas del sitio en grados
+        tz (float): Zona horaria de las fechas (horas respecto de UTC)
+        max_hueco_corto (int): Largo máximo de hueco a interpolar
+        dias_vecinos (int): Días a cada lado para rellenar huecos largos
+
+    Returns:
+        tuple: (DataFrame rellenado, dict columna -> dict método -> número de valores)
+    """
+    df = df.copy()
+    columnas = [c for c in df.columns if c in VARIABLES and VARIABLES[c] != 'Zenith']
+    resumen = {c: {} for c in columnas}
+
+    irradiancia = {VARIABLES[c]: c for c in columnas if VARIABLES[c] in ('GHI', 'DNI', 'DHI')}
+    if len(irradiancia) == 3:
+        geometria = geometria_para_df(df, lat, lon, tz)
+        ghi, dni, dhi, conteo = rellenar_irradiancia(
+            df[irradiancia['GHI']], df[irradiancia['DNI']], df[irradiancia['DHI']],
+            geometria['cos_cenit'], geometria['extraterrestre'])
+        antes = {c: df[c].isna() for c in irradiancia.values()}
+        for variable, valores in (('GHI', ghi), ('DNI', dni), ('DHI', dhi)):
+            columna = irradiancia[variable]
+            df[columna] = valores
+            resumen[columna]['irradiancia'] = int((antes[columna] & df[columna].notna()).sum())
+        resumen['_irradiancia'] = conteo
+
+    pasos_dia = _pasos_por_dia(df)
+    for columna in columnas:
+        valores = df[columna].to_numpy(dtype=np.float64)
+        faltantes = np.isnan(valores)
+        valores = interpolar_huecos(valores, max_hueco_corto)
+        resumen[columna]['interpolacion'] = int(np.count_nonzero(faltantes & ~np.isnan(valores)))
+
+        faltantes = np.isnan(valores)
+        if faltantes.any():
+            vecinos = promedio_dias_vecinos(valores, pasos_dia, dias_vecinos)
+            valores = np.where(faltantes, vecinos, valores)
+        resumen[columna]['dias_vecinos'] = int(np.count_nonzero(faltantes & ~np.isnan(valores)))
+        resumen[columna]['sin_rellenar'] = int(np.count_nonzero(np.isnan(valores)))
+        df[columna] = valores
+
+    return df, resumen
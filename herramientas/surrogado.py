@@ -0,0 +1,504 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import PySAM
+
+from herramientas.cache_resultados import simular_pv
+from herramientas.ejecutor import ejecutar_barrido
+from herramientas.escenarios import muestreo_lhs
+from herramientas.recurso import RAIZ, UBICACIONES, obtener_recurso
+
+# Directorio por defecto de los surrogados guardados (en la raíz del repositorio)
+DIR_SURROGADOS = RAIZ / '.surrogados'
+
+# Parámetros continuos del diseño que cubre el surrogado
+PARAMETROS_DISENO = ('dc_ac_ratio', 'losses', 'tilt', 'azimuth', 'gcr')
+
+# Rangos por defecto de cada parámetro; el azimut se centra en el ecuador (ver `rangos_por_defecto`)
+RANGOS_DISENO = {
+    'dc_ac_ratio': (1.0, 1.5),
+    'losses': (8.0, 20.0),  # %
+    'tilt': (0.0, 60.0),  # grados
+    'azimuth': (90.0, 270.0),  # grados, hemisferio norte
+    'gcr': (0.2, 0.6)
+}
+
+# Campos fijos del diseño durante el muestreo (los de `diseno_pv` del análisis de LCOE)
+DISENO_FIJO = {'system_capacity': 1000.0, 'inv_eff': 96.0, 'array_type': 0}
+
+# Regularización de los ajustes por mínimos cuadrados (sobre entradas en [-1, 1])
+REGULARIZACION = 1e-8
+
+
+def rangos_por_defecto(ubicacion):
+    """
+    Rangos de `RANGOS_DISENO` con el azimut orientado hacia el ecuador.
+
+    En el hemisferio sur el azimut se expresa en (-90, 90) para que el
+    intervalo sea continuo alrededor de 0 (norte); al simular se lleva a [0, 360).
+
+    Args:
+        ubicacion (str, dict o RecursoSolar): Ubicación (ver `obtener_recurso`)
+
+    Returns:
+        dict: Parámetro -> (mínimo, máximo)
+    """
+    rangos = dict(RANGOS_DISENO)
+    if obtener_recurso(ubicacion).lat < 0:
+        rangos['azimuth'] = (-90.0, 90.0)
+    return rangos
+
+
+def _exponentes(dimensiones, grado):
+    """Exponentes de los monomios de grado total <= grado (el primero es la constante)"""
+    return np.array([e for g in range(grado + 1) for e in itertools.product(range(g + 1), repeat=dimensiones)
+                     if sum(e) == g], dtype=int).reshape(-1, dimensiones)
+
+
+def _monomios(x, exponentes):
+    """Matriz (puntos x monomios) evaluada en entradas normalizadas"""
+    grado = exponentes.max(initial=0)
+    # Potencias de cada entrada calculadas una vez: (grado + 1, puntos, dimensiones)
+    potencias = x[None, :, :] ** np.arange(grado + 1)[:, None, None]
+    columnas = np.ones((x.shape[0], len(exponentes)))
+    for d in range(x.shape[1]):
+        columnas *= potencias[exponentes[:, d], :, d].T
+    return columnas
+
+
+def _ajustar_polinomio(x, y, grado):
+    exponentes = _exponentes(x.shape[1], grado)
+    a = _monomios(x, exponentes)
+    coeficientes = np.linalg.solve(a.T @ a + REGULARIZACION * np.eye(a.shape[1]), a.T @ y)
+    return {'tipo': 'polinomio', 'grado': grado, 'exponentes': exponentes, 'coeficientes': coeficientes}
+
+
+def _ajustar_rbf(x, y):
+    """Interpolador de base radial cúbica (phi(r) = r³) con cola lineal"""
+    n, d = x.shape
+    phi = np.linalg.norm(x[:, None, :] - x[None, :, :], axis=2) ** 3
+    p = np.hstack([np.ones((n, 1)), x])
+    sistema = np.block([[phi, p], [p.T, np.zeros((d + 1, d + 1))]])
+    sistema[:n, :n] += REGULARIZACION * np.eye(n)
+    solucion = np.linalg.solve(sistema, np.concatenate([y, np.zeros(d + 1)]))
+    return {'tipo': 'rbf', 'centros': x.copy(), 'pesos': solucion[:n], 'cola': solucion[n:]}
+
+
+def _ajustar(x, y, modelo):
+    """Ajusta un modelo ('poli2', 'poli3' o 'rbf') sobre entradas normalizadas"""
+    if modelo == 'rbf':
+        return _ajustar_rbf(x, y)
+    return _ajustar_polinomio(x, y, int(modelo[-1]))
+
+
+def _evaluar(ajuste, x):
+    if ajuste['tipo'] == 'polinomio':
+        return _monomios(x, ajuste['exponentes']) @ ajuste['coeficientes']
+    r = np.linalg.norm(x[:, None, :] - ajuste['centros'][None, :, :], axis=2)
+    return r ** 3 @ ajuste['pesos'] + ajuste['cola'][0] + x @ ajuste['cola'][1:]
+
+
+def _terminos(modelo, dimensiones):
+    """Número de coeficientes libres de un modelo (limita con cuántas muestras se puede ajustar)"""
+    if modelo == 'rbf':
+        return dimensiones + 2
+    return len(_exponentes(dimensiones, int(modelo[-1])))
+
+
+def validacion_cruzada(x, y, modelo, pliegues=5, semilla=0, factor=1.0):
+    """
+    Error de validación cruzada en k pliegues de un tipo de modelo.
+
+    Args:
+        x (np.ndarray): Entradas normalizadas en [-1, 1], forma (n, d)
+        y (np.ndarray): Respuesta, forma (n,)
+        modelo (str): 'poli2', 'poli3' o 'rbf'
+        pliegues (int): Número de pliegues
+        semilla (int): Semilla del reparto en pliegues
+        factor (float o np.ndarray): Factor por el que se multiplican respuesta y
+            predicción antes de medir el error
+
+    Returns:
+        dict: 'rmse' y 'error_relativo_max' de las predicciones fuera de muestra
+    """
+    n = len(y)
+    orden = np.random.default_rng(semilla).permutation(n)
+    predicciones = np.empty(n)
+    for prueba in np.array_split(orden, min(pliegues, n)):
+        entrenamiento = np.setdiff1d(orden, prueba)
+        predicciones[prueba] = _evaluar(_ajustar(x[entrenamiento], y[entrenamiento], modelo), x[prueba])
+    y = y * factor
+    errores = predicciones * factor - y
+    return {'rmse': float(np.sqrt(np.mean(errores ** 2))),
+            'error_relativo_max': float(np.max(np.abs(errores) / np.abs(y)))}
+
+
+def lcoe_fcr(annual_energy, capital_cost, fixed_charge_rate, fixed_operating_cost, variable_operating_cost):
+    """
+    LCOE ($/kWh) con la fórmula del modelo Lcoefcr de PySAM, vectorizada.
+
+    Equivale a `pool_modelos.calcular_lcoe_fcr` pero admite arrays en todos
+    los argumentos (se combinan por broadcasting).
+
+    Returns:
+        np.ndarray: LCOE de cada escenario
+    """
+    return ((np.asarray(fixed_charge_rate) * capital_cost + fixed_operating_cost) / np.asarray(annual_energy)
+            + variable_operating_cost)
+
+
+def caracteristicas(puntos, azimut_ecuador):
+    """
+    Variables en que se ajusta el surrogado a partir de diseños en unidades físicas.
+
+    La orientación entra como las componentes horizontales de la normal del
+    módulo (sin(tilt) por el seno y el coseno del desvío respecto al ecuador)
+    y el `gcr` multiplicado por sin(tilt), que es lo que controla el
+    autosombreado entre filas. Con ellas la respuesta es casi polinómica en
+    todo el rango de orientaciones.
+
+    Args:
+        puntos (np.ndarray): Diseños (n, d) con las columnas de `PARAMETROS_DISENO`
+        azimut_ecuador (float): Azimut que mira al ecuador (180 o 0)
+
+    Returns:
+        np.ndarray: Características de forma (n, d)
+    """
+    dc_ac_ratio, losses, tilt, azimuth, gcr = np.asarray(puntos, dtype=float).T
+    inclinacion, desvio = np.radians(tilt), np.radians(azimuth - azimut_ecuador)
+    return np.column_stack([dc_ac_ratio, losses, np.sin(inclinacion) * np.sin(desvio),
+                            np.sin(inclinacion) * np.cos(desvio), gcr * np.sin(inclinacion)])
+
+
+def _factor_perdidas(puntos):
+    """Fracción que dejan pasar las pérdidas del sistema (la respuesta se ajusta sin ella)"""
+    return 1 - np.asarray(puntos, dtype=float)[:, PARAMETROS_DISENO.index('losses')] / 100
+
+
+class Surrogado:
+    """
+    Superficie de respuesta del rendimiento específico anual (kWh/kW) de una ubicación.
+
+    Se ajusta sobre las simulaciones de un diseño de experimentos en los
+    parámetros de `PARAMETROS_DISENO`. El modelo predice el rendimiento antes
+    de las pérdidas del sistema (casi proporcional a 1 - losses/100) en función
+    de `caracteristicas`, escaladas a [-1, 1] en el rango muestreado. Evaluarlo
+    cuesta microsegundos por punto; fuera de los rangos el surrogado extrapola
+    y su error no está acotado.
+    """
+
+    def __init__(self, rangos, ajuste, procedencia, muestras=None, rendimientos=None):
+        self.rangos = {p: tuple(map(float, rangos[p])) for p in PARAMETROS_DISENO}
+        self.ajuste = ajuste
+        self.procedencia = procedencia
+        self.muestras = muestras  # Diseños simulados (n, d) en unidades físicas
+        self.rendimientos = rendimientos  # Rendimiento específico de PySAM (n,) en kWh/kW
+        self.azimut_ecuador = float(np.mean(self.rangos['azimuth']))
+        self._centro = np.array([np.mean(self.rangos[p]) for p in PARAMETROS_DISENO])
+
+    def normalizar(self, puntos):
+        """Características de diseños (n, d) en unidades físicas, escaladas con las del ajuste"""
+        return (caracteristicas(puntos, self.azimut_ecuador) - self.ajuste['centro']) / self.ajuste['semiancho']
+
+    def _matriz(self, **parametros):
+        """Columnas de los parámetros combinadas por broadcasting (los omitidos toman el centro del rango)"""
+        desconocidos = set(parametros) - set(PARAMETROS_DISENO)
+        if desconocidos:
+            raise ValueError(f"Parámetros sin cubrir por el surrogado: {sorted(desconocidos)}")
+        valores = [parametros.get(p, c) for p, c in zip(PARAMETROS_DISENO, self._centro)]
+        columnas = np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in valores])
+        return np.stack([c.ravel() for c in columnas], axis=1), columnas[0].shape
+
+    def rendimiento(self, **parametros):
+        """
+        Rendimiento específico anual (kWh/kW) de uno o varios diseños.
+
+        Args:
+            **parametros: Valores (escalares o arrays, combinados por
+                broadcasting) de los campos de `PARAMETROS_DISENO`
+
+        Returns:
+            np.ndarray: Rendimiento con la forma del broadcasting de los argumentos
+        """
+        puntos, forma = self._matriz(**parametros)
+        return (_evaluar(self.ajuste, self.normalizar(puntos)) * _factor_perdidas(puntos)).reshape(forma)
+
+    def energia_anual(self, capacidad, **parametros):
+        """Energía anual (kWh) de un sistema de `capacidad` kW DC (ver `rendimiento`)"""
+        return np.asarray(capacidad) * self.rendimiento(**parametros)
+
+    def lcoe(self, capacidad, capital_cost, fixed_charge_rate, fixed_operating_cost, variable_operating_cost,
+             **parametros):
+        """
+        LCOE ($/kWh) con la energía del surrogado.
+
+        Los costos siguen las convenciones de `PARAMETROS` del análisis de
+        LCOE: capital y operación fija por MW, que se escalan por la capacidad.
+
+        Args:
+            capacidad (float): Capacidad DC (kW)
+            capital_cost (float o array): Costo de capital ($/MW)
+            fixed_charge_rate (float o array): Tasa de cargo fijo
+            fixed_operating_cost (float o array): Costo fijo de operación ($/MW por año)
+            variable_operating_cost (float o array): Costo variable de operación ($/kWh)
+            **parametros: Parámetros de diseño (ver `rendimiento`)
+
+        Returns:
+            np.ndarray: LCOE con la forma del broadcasting de los argumentos
+        """
+        return lcoe_fcr(self.energia_anual(capacidad, **parametros), capital_cost * (capacidad / 1000),
+                        fixed_charge_rate, fixed_operating_cost * (capacidad / 1000), variable_operating_cost)
+
+    def curva(self, parametro, puntos=200, **base):
+        """
+        Curva densa de rendimiento al variar un parámetro con los demás fijos.
+
+        Args:
+            parametro (str): Parámetro que se recorre en todo su rango
+            puntos (int): Número de valores
+            **base: Valores de los demás parámetros (por defecto, el centro de su rango)
+
+        Returns:
+            tuple: (valores del parámetro, rendimiento en kWh/kW)
+        """
+        valores = np.linspace(*self.rangos[parametro], puntos)
+        return valores, self.rendimiento(**{**base, parametro: valores})
+
+    def a_dict(self):
+        """Representación serializable en JSON"""
+        ajuste = {c: v.tolist() if isinstance(v, np.ndarray) else v for c, v in self.ajuste.items()}
+        datos = {'rangos': self.rangos, 'ajuste': ajuste, 'procedencia': self.procedencia}
+        if self.muestras is not None:
+            datos['muestras'] = np.asarray(self.muestras).tolist()
+            datos['rendimientos'] = np.asarray(self.rendimientos).tolist()
+        return datos
+
+    @classmethod
+    def desde_dict(cls, datos):
+        ajuste = {c: np.asarray(v) if isinstance(v, list) else v for c, v in datos['ajuste'].items()}
+        muestras = datos.get('muestras')
+        return cls(datos['rangos'], ajuste, datos['procedencia'],
+                   None if muestras is None else np.asarray(muestras),
+                   None if muestras is None else np.asarray(datos['rendimientos']))
+
+    def guardar(self, ruta):
+        """Guarda el surrogado en JSON (escritura atómica)"""
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=ruta.parent, prefix='.tmp_', suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.a_dict(), f, indent=1, ensure_ascii=False)
+        os.replace(tmp, ruta)
+        return ruta
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Lee un surrogado guardado con `guardar`"""
+        with open(ruta, 'r') as f:
+            return cls.desde_dict(json.load(f))
+
+
+def disenos_muestreo(muestras, diseno_fijo=None):
+    """Diseños de SystemDesign de cada fila de muestras (n, d) en unidades físicas"""
+    diseno_fijo = {**DISENO_FIJO, **(diseno_fijo or {})}
+    return [{**diseno_fijo, **{p: float(v) % 360 if p == 'azimuth' else float(v)
+                               for p, v in zip(PARAMETROS_DISENO, fila)}}
+            for fila in np.asarray(muestras)]
+
+
+def _simular(escenario):
+    """Rendimiento específico de un diseño (se ejecuta en un trabajador)"""
+    nombre, diseno = escenario
+    salida = simular_pv(nombre, diseno)
+    return salida['annual_energy'] / diseno['system_capacity']
+
+
+def simular_muestras(ubicacion, muestras, diseno_fijo=None, n_procesos=1):
+    """
+    Rendimiento específico anual (kWh/kW) de PySAM en cada diseño muestreado.
+
+    Args:
+        ubicacion (str): Nombre de una ubicación de `UBICACIONES`
+        muestras (np.ndarray): Diseños (n, d) en unidades físicas
+        diseno_fijo (dict): Campos de SystemDesign que no se muestrean
+        n_procesos (int): Procesos en paralelo (1 = en serie)
+
+    Returns:
+        np.ndarray: Rendimiento de cada diseño
+    """
+    escenarios = [(ubicacion, diseno) for diseno in disenos_muestreo(muestras, diseno_fijo)]
+    salidas = ejecutar_barrido(_simular, escenarios, recursos={ubicacion: UBICACIONES[ubicacion]},
+                               n_procesos=n_procesos)
+    errores = [s['error'] for s in salidas if s['estado'] == 'error']
+    if errores:
+        raise RuntimeError(f"Fallaron {len(errores)} simulaciones del muestreo: {errores[0]}")
+    return np.array([s['resultado'] for s in salidas])
+
+
+def ajustar_surrogado(muestras, rendimientos, rangos, modelos=('poli2', 'poli3', 'rbf'), pliegues=5,
+                      procedencia=None):
+    """
+    Elige por validación cruzada el mejor modelo y lo ajusta con todas las muestras.
+
+    Los modelos con más coeficientes que muestras de entrenamiento se descartan.
+
+    Args:
+        muestras (np.ndarray): Diseños (n, d) en unidades físicas
+        rendimientos (np.ndarray): Rendimiento específico simulado (n,)
+        rangos (dict): Parámetro -> (mínimo, máximo)
+        modelos (tuple): Candidatos: 'poli2', 'poli3', 'rbf'
+        pliegues (int): Pliegues de la validación cruzada
+        procedencia (dict): Metadatos que se guardan con el surrogado
+
+    Returns:
+        Surrogado: Con el error de validación cruzada de cada candidato en su procedencia
+    """
+    muestras, rendimientos = np.asarray(muestras, dtype=float), np.asarray(rendimientos, dtype=float)
+    f = caracteristicas(muestras, np.mean(rangos['azimuth']))
+    centro, semiancho = (f.max(axis=0) + f.min(axis=0)) / 2, (f.max(axis=0) - f.min(axis=0)) / 2
+    semiancho[semiancho == 0] = 1.0  # Parámetros con rango de un solo valor
+    x = (f - centro) / semiancho
+    factor = _factor_perdidas(muestras)
+
+    entrenamiento = len(rendimientos) * (pliegues - 1) // pliegues
+    validacion = {}
+    for modelo in modelos:
+        if _terminos(modelo, x.shape[1]) < entrenamiento:
+            # El error se informa sobre el rendimiento final (con pérdidas)
+            validacion[modelo] = validacion_cruzada(x, rendimientos / factor, modelo, pliegues, factor=factor)
+    if not validacion:
+        raise ValueError(f"Muy pocas muestras ({len(rendimientos)}) para los modelos {list(modelos)}")
+    elegido = min(validacion, key=lambda m: validacion[m]['rmse'])
+    ajuste = {**_ajustar(x, rendimientos / factor, elegido), 'centro': centro, 'semiancho': semiancho}
+    procedencia = {**(procedencia or {}), 'modelo': elegido, 'validacion_cruzada': validacion,
+                   'pliegues': pliegues}
+    return Surrogado(rangos, ajuste, procedencia, muestras, rendimientos)
+
+
+def _clave_surrogado(recurso, rangos, diseno_fijo, n_muestras, semilla, modelos, base):
+    contenido = {
+        'recurso': recurso.huella(),
+        'rangos': rangos,
+        'diseno_fijo': diseno_fijo,
+        'n_muestras': n_muestras,
+        'semilla': semilla,
+        'modelos': list(modelos),
+        'base': base,
+        'pysam': PySAM.__version__
+    }
+    return hashlib.sha256(json.dumps(contenido, sort_keys=True).encode()).hexdigest()
+
+
+def construir_surrogado(ubicacion, n_muestras=150, rangos=None, diseno_fijo=None, semilla=0,
+                        modelos=('poli2', 'poli3', 'rbf'), pliegues=5, n_procesos=1,
+                        directorio=DIR_SURROGADOS, reconstruir=False):
+    """
+    Construye (o lee si ya existe) el surrogado de una ubicación.
+
+    Se muestrea un hipercubo latino de `n_muestras` diseños en `rangos`, se
+    simula cada uno con PySAM (usando la caché de simulaciones) y se ajusta
+    el modelo con menor error de validación cruzada. El surrogado se guarda
+    en `directorio` con su procedencia: huella del recurso, versión de PySAM,
+    rangos, diseño fijo, semilla y errores de validación.
+
+    Args:
+        ubicacion (str): Nombre de una ubicación de `UBICACIONES`
+        n_muestras (int): Simulaciones del diseño de experimentos
+        rangos (dict): Parámetro -> (mínimo, máximo); por defecto `rangos_por_defecto`
+        diseno_fijo (dict): Campos de SystemDesign que no se muestrean (sobre `DISENO_FIJO`)
+        semilla (int): Semilla del muestreo
+        modelos (tuple): Modelos candidatos
+        pliegues (int): Pliegues de la validación cruzada
+        n_procesos (int): Procesos para las simulaciones
+        directorio (str): Dónde guardar los surrogados (None = no guardar)
+        reconstruir (bool): Ignorar un surrogado guardado con la misma configuración
+
+    Returns:
+        Surrogado: El surrogado ajustado
+    """
+    recurso = obtener_recurso(UBICACIONES[ubicacion])
+    rangos = {p: tuple(map(float, v)) for p, v in (rangos or rangos_por_defecto(ubicacion)).items()}
+    diseno_fijo = {**DISENO_FIJO, **(diseno_fijo or {})}
+    clave = _clave_surrogado(recurso, rangos, diseno_fijo, n_muestras, semilla, modelos, 'PVWattsNone')
+    ruta = Path(directorio) / f'{ubicacion}_{clave[:16]}.json' if directorio else None
+    if ruta is not None and ruta.exists() and not reconstruir:
+        return Surrogado.cargar(ruta)
+
+    inicio = time.perf_counter()
+    limites = np.array([rangos[p] for p in PARAMETROS_DISENO])
+    muestras = limites[:, 0] + muestreo_lhs(n_muestras, len(PARAMETROS_DISENO), semilla) * np.diff(limites, axis=1).T
+    rendimientos = simular_muestras(ubicacion, muestras, diseno_fijo, n_procesos)
+    procedencia = {
+        'ubicacion': ubicacion,
+        'recurso': recurso.huella(),
+        'archivo': recurso.archivo,
+        'pysam': PySAM.__version__,
+        'base': 'PVWattsNone',
+        'diseno_fijo': diseno_fijo,
+        'n_muestras': n_muestras,
+        'semilla': semilla,
+        'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'clave': clave
+    }
+    surrogado = ajustar_surrogado(muestras, rendimientos, rangos, modelos, pliegues, procedencia)
+    surrogado.procedencia['segundos_construccion'] = round(time.perf_counter() - inicio, 2)
+    if ruta is not None:
+        surrogado.guardar(ruta)
+    return surrogado
+
+
+def tiempo_evaluacion(surrogado, repeticiones=200, tam_lote=10_000):
+    """
+    Costo de evaluar el surrogado.
+
+    Returns:
+        tuple: (µs por llamada con un solo diseño, µs por diseño en lotes de `tam_lote`)
+    """
+    punto = {p: np.mean(r) for p, r in surrogado.rangos.items()}
+    lote = {p: np.random.default_rng(0).uniform(*r, tam_lote) for p, r in surrogado.rangos.items()}
+    tiempos = []
+    for parametros, n in ((punto, 1), (lote, tam_lote)):
+        inicio = time.perf_counter()
+        for _ in range(repeticiones if n == 1 else 5):
+            surrogado.rendimiento(**parametros)
+        tiempos.append((time.perf_counter() - inicio) / (repeticiones if n == 1 else 5) / n * 1e6)
+    return tuple(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Construye surrogados del rendimiento anual PV sobre los parámetros de diseño",
+        epilog="Uso: python -m herramientas.surrogado [--ubicaciones Sevilla] [--muestras 150] [--procesos 4]"
+    )
+    parser.add_argument('--ubicaciones', nargs='+', choices=list(UBICACIONES), default=list(UBICACIONES),
+                        help="Ubicaciones (por defecto, todas)")
+    parser.add_argument('--muestras', type=int, default=150, help="Simulaciones de PySAM por ubicación")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla del hipercubo latino")
+    parser.add_argument('--procesos', type=int, default=1, help="Procesos para las simulaciones")
+    parser.add_argument('--directorio', default=str(DIR_SURROGADOS), help="Directorio de los surrogados")
+    parser.add_argument('--reconstruir', action='store_true', help="Ignorar surrogados ya guardados")
+    args = parser.parse_args()
+
+    for ubicacion in args.ubicaciones:
+        surrogado = construir_surrogado(ubicacion, args.muestras, semilla=args.semilla, n_procesos=args.procesos,
+                                        directorio=args.directorio, reconstruir=args.reconstruir)
+        procedencia = surrogado.procedencia
+        print(f"\n{ubicacion}: modelo '{procedencia['modelo']}' con {procedencia['n_muestras']} simulaciones "
+              f"({procedencia.get('segundos_construccion', 0):.1f} s)")
+        for modelo, error in procedencia['validacion_cruzada'].items():
+            print(f"  {modelo:<6} RMSE {error['rmse']:7.2f} kWh/kW, "
+                  f"error relativo máx. {error['error_relativo_max']:.2%}")
+        individual, lote = tiempo_evaluacion(surrogado)
+        print(f"  Evaluación: {individual:.0f} µs por llamada, {lote:.2f} µs por diseño en lote")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,85 @@
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
+import argparse
+import os
+import sys
+from pathlib import Path
 
-def process_tmy_file(input_file, output_file):
-    # Leer el archivo TMY, incluyendo las primeras dos líneas que contienen la información de ubicación
-    with open(input_file, 'r') as f:
-        header_lines = [next(f) for _ in range(2)]
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from herramientas.ingesta import comprobar_nombres_unicos, listar_archivos, mapa_paralelo, nombre_base
+from herramientas.lector_tmy import leer_tmy
+from herramientas.limpieza import limpiar_archivo_por_bloques, limpiar_dataframe
+from herramientas.posicion_solar import geometria_para_df
+from herramientas.relleno import anular_irradiancia_nocturna
+
+def process_tmy_file(input_file, output_file, tam_bloque=None):
+    # Modo por bloques para registros largos (multianuales o subhorarios):
+    # la memoria queda acotada por tam_bloque y la salida se escribe de forma incremental
+    if tam_bloque:
+        metadatos = limpiar_archivo_por_bloques(input_file, output_file, tam_bloque=tam_bloque,
+                                                anio_objetivo=2022)
+        print(f"Archivo procesado y guardado como: {output_file}")
+        print(f"Latitud: {metadatos.lat}, Longitud: {metadatos.lon}")
+        return
     
-    # Extraer latitud y longitud de la segunda línea
-    location_data = header_lines[1].split(',')
-    lat = float(location_data[5].strip())  # Índice 5 para latitud
-    lon = float(location_data[6].strip())  # Índice 6 para longitud
+    # Leer el archivo TMY (también .gz, .bz2 o .zip) en una sola pasada:
+    # las dos primeras líneas contienen la información de ubicación
+    datos = leer_tmy(input_file)
+    header_lines = datos.metadatos.lineas_encabezado
     
-    # Leer los datos principales
-    df = pd.read_csv(input_file, skiprows=2)
+    # Latitud y longitud se buscan por nombre de campo en el encabezado
+    lat = datos.metadatos.lat
+    lon = datos.metadatos.lon
     
-    # Verificar y corregir datos
-    df['GHI'] = df['GHI'].clip(lower=0)
-    df['DHI'] = df['DHI'].clip(lower=0)
-    df['DNI'] = df['DNI'].clip(lower=0)
-    df['Temperature'] = df['Temperature'].clip(lower=-20, upper=50)
-    df['Wind Speed'] = df['Wind Speed'].clip(lower=0, upper=30)
+    # Datos principales
+    df = datos.a_dataframe()
     
-    # Solo procesar Solar Zenith Angle si la columna existe
-    if 'Solar Zenith Angle' in df.columns:
-        df['Solar Zenith Angle'] = df['Solar Zenith Angle'].clip(lower=0, upper=180)
+    # Verificar y corregir datos con los límites de la tabla de reglas QC
+    # (Solar Zenith Angle solo si la columna existe)
+    df = limpiar_dataframe(df, anio_objetivo=2022)
     
-    df['Year'] = 2022
+    # Irradiancia nocturna a 0 con la posición solar calculada (no depende de que
+    # el archivo traiga la columna Solar Zenith Angle)
+    if lat is not None and lon is not None:
+        tz = datos.metadatos.tz if datos.metadatos.tz is not None else 0
+        geometria = geometria_para_df(df, lat, lon, tz)
+        df, anulados = anular_irradiancia_nocturna(df, geometria['cenit'])
+        print(f"Valores de irradiancia nocturna anulados: {anulados}")
     
-    # Guardar el archivo con las líneas de encabezado originales
+    # Guardar el archivo con las líneas de encabezado originales (un CSV plano no trae)
     with open(output_file, 'w') as f:
-        f.write(header_lines[0])
-        f.write(header_lines[1])
+        f.writelines(header_lines)
         df.to_csv(f, index=False)
     
     print(f"Archivo procesado y guardado como: {output_file}")
     print(f"Latitud: {lat}, Longitud: {lon}")
 
-# Configuración
-TipoData = 2  # 1: Iquique, 2: Sevilla, 3: Jodhpur
+def nombre_salida(input_file):
+    """Archivo de salida de cada archivo original: 'sevilla_tmy.csv.gz' -> 'Sevilla_tmy_corregido.csv'"""
+    base = nombre_base(input_file)
+    return f"{base[:1].upper()}{base[1:]}_corregido.csv"
+
+def _procesar(argumentos):
+    process_tmy_file(*argumentos)
+
+def main():
+    # Archivos originales por defecto (antes se elegía uno con la variable TipoData)
+    base_dir = '/home/josefa_montoya/Josefamontoya/josefamontoya'
+    originales = [os.path.join(base_dir, nombre) for nombre in
+                  ['Iquique_tmy.csv', 'sevilla_tmy.csv', 'jodhpur_tmy.csv']]
+    
+    parser = argparse.ArgumentParser(description='Corrige archivos TMY del NSRDB')
+    parser.add_argument('entradas', nargs='*', default=originales,
+                        help='Archivos, directorios o patrones glob (por defecto, los tres sitios originales)')
+    parser.add_argument('--salida', default='.', help='Directorio de salida')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos en paralelo (por defecto, todos los núcleos)')
+    parser.add_argument('--bloque', type=int, default=None, help='Filas por bloque para registros largos')
+    args = parser.parse_args()
+    
+    # Cada archivo se procesa en un proceso distinto
+    archivos = [ruta for entrada in args.entradas for ruta in (listar_archivos(entrada) or [entrada])]
+    # Dos archivos con el mismo nombre de salida se sobrescribirían entre procesos
+    comprobar_nombres_unicos(archivos, nombre_salida)
+    tareas = [(ruta, os.path.join(args.salida, nombre_salida(ruta)), args.bloque) for ruta in archivos]
+    mapa_paralelo(_procesar, tareas, args.procesos)
 
-if TipoData == 1:
-    process_tmy_file('/home/josefa_montoya/Josefamontoya/josefamontoya/Iquique_tmy.csv', 
-                    'Iquique_tmy_corregido.csv')
-elif TipoData == 2:
-    process_tmy_file('/home/josefa_montoya/Josefamontoya/josefamontoya/sevilla_tmy.csv', 
-                    'Sevilla_tmy_corregido.csv')
-elif TipoData == 3:
-    process_tmy_file('/home/josefa_montoya/Josefamontoya/josefamontoya/jodhpur_tmy.csv', 
-                    'Jodhpur_tmy_corregido.csv')
-else:
-    print("Tipo de datos no válido") 
\ No newline at end of file
+if __name__ == "__main__":
+    main()